@@ -1,6 +1,10 @@
 from django.contrib import admin
-from api.models import Job, Company
+from api.models import Job, Company, SavedSearch, Skill, SkillCategory, SkillSynonym
 
 # Register your models here.
 admin.site.register(Job)
 admin.site.register(Company)
+admin.site.register(Skill)
+admin.site.register(SkillCategory)
+admin.site.register(SkillSynonym)
+admin.site.register(SavedSearch)
@@ -0,0 +1,166 @@
+"""
+Company analytics: rollups of the raw JobEvent rows (api.events).
+
+The rollup_events command folds events newer than its watermark into
+JobDailyStats (views and apply clicks per job and day) and JobSkillStats
+(distinct signed-in applicants per job and portfolio skill), one batch per
+transaction together with the new watermark, so every event is counted
+exactly once however often the command runs. The dashboard endpoints only
+read these tables: a company's dashboard touches one row per job and day
+in the requested range instead of every event.
+
+Run it after compact_events, e.g. both every few minutes from cron.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+WATERMARK = "job-events"
+
+
+def _add_counts(model, key_fields, counts, extra):
+    """
+    Adds {key tuple: {field: n}} to the rows of model identified by
+    key_fields, creating missing rows; extra(key) gives their other fields.
+    """
+    if not counts:
+        return
+    lookup = {f"{field}__in": {key[i] for key in counts} for i, field in enumerate(key_fields)}
+    existing = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in model.objects.filter(**lookup)
+        if tuple(getattr(row, field) for field in key_fields) in counts
+    }
+    changed, new = [], []
+    fields = set()
+    for key, deltas in counts.items():
+        row = existing.get(key)
+        if row is None:
+            row = model(**dict(zip(key_fields, key)), **extra(key))
+            new.append(row)
+        else:
+            changed.append(row)
+        for field, n in deltas.items():
+            setattr(row, field, getattr(row, field) + n)
+            fields.add(field)
+    model.objects.bulk_update(changed, sorted(fields), batch_size=1000)
+    model.objects.bulk_create(new, batch_size=1000)
+
+
+def roll_up_batch(events, watermark):
+    """Folds [JobEvent values dicts] into the rollup tables."""
+    from .models import JobDailyStats, JobEvent, JobSkillStats, Portfolio
+
+    companies = {}
+    daily = defaultdict(Counter)
+    applicants = set()
+    for event in events:
+        companies[event["job_id"]] = event["company_id"]
+        day = timezone.localtime(event["occurred_at"]).date()
+        field = "views" if event["kind"] == JobEvent.KIND_VIEW else "apply_clicks"
+        daily[(event["job_id"], day)][field] += 1
+        if event["kind"] == JobEvent.KIND_APPLY and event["user_id"]:
+            applicants.add((event["job_id"], event["user_id"]))
+
+    # Applicants are counted once per job: drop those seen in earlier batches.
+    if applicants:
+        seen = set(
+            JobEvent.objects.filter(
+                kind=JobEvent.KIND_APPLY,
+                id__lte=watermark,
+                job_id__in={job_id for job_id, _ in applicants},
+                user_id__in={user_id for _, user_id in applicants},
+            ).values_list("job_id", "user_id")
+        )
+        applicants -= seen
+    skills = dict(
+        Portfolio.objects.filter(user_id__in={user_id for _, user_id in applicants}).values_list("user_id", "skill_ids")
+    )
+    by_skill = defaultdict(Counter)
+    for job_id, user_id in applicants:
+        for skill_id in skills.get(user_id, ()):
+            by_skill[(job_id, skill_id)]["applicants"] += 1
+
+    _add_counts(JobDailyStats, ("job_id", "day"), daily, lambda key: {"company_id": companies[key[0]]})
+    _add_counts(JobSkillStats, ("job_id", "skill_id"), by_skill, lambda key: {"company_id": companies[key[0]]})
+
+
+def roll_up_events(batch_size=10000):
+    """Folds all events newer than the watermark into the rollups. Returns the number processed."""
+    from .models import JobEvent, RollupWatermark
+
+    RollupWatermark.objects.get_or_create(name=WATERMARK)
+    processed = 0
+    while True:
+        with transaction.atomic():
+            # Locks the watermark, so concurrent runs take turns.
+            watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+            events = list(
+                JobEvent.objects.filter(id__gt=watermark.last_event_id)
+                .order_by("id")
+                .values("id", "job_id", "company_id", "kind", "user_id", "occurred_at")[:batch_size]
+            )
+            if not events:
+                return processed
+            roll_up_batch(events, watermark.last_event_id)
+            watermark.last_event_id = events[-1]["id"]
+            watermark.save(update_fields=["last_event_id"])
+        processed += len(events)
+
+
+def job_titles(job_ids):
+    from .models import ArchivedJob, Job
+
+    titles = dict(ArchivedJob.objects.filter(id__in=job_ids).values_list("id", "title"))
+    titles.update(Job.objects.filter(id__in=job_ids).values_list("id", "title"))
+    return titles
+
+
+def skill_distribution(stats, limit=20):
+    """The skills with the most applicants among JobSkillStats rows."""
+    top = list(
+        stats.values("skill_id", "skill__name")
+        .annotate(n=Sum("applicants"))
+        .order_by("-n", "skill__name")
+        .values_list("skill__name", "n")[:limit]
+    )
+    return [{"skill": name, "applicants": n} for name, n in top]
+
+
+def company_dashboard(company_id, days):
+    """Totals per job, a daily series and the applicant skill distribution of a company."""
+    from .models import JobDailyStats, JobSkillStats
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    stats = JobDailyStats.objects.filter(company_id=company_id, day__gte=since)
+    per_job = list(
+        stats.values("job_id").annotate(views=Sum("views"), apply_clicks=Sum("apply_clicks")).order_by("-views")
+    )
+    titles = job_titles([row["job_id"] for row in per_job])
+    return {
+        "since": since,
+        "jobs": [{**row, "title": titles.get(row["job_id"])} for row in per_job],
+        "daily": list(
+            stats.values("day").annotate(views=Sum("views"), apply_clicks=Sum("apply_clicks")).order_by("day")
+        ),
+        "applicant_skills": skill_distribution(JobSkillStats.objects.filter(company_id=company_id)),
+    }
+
+
+def job_dashboard(job_id, days):
+    """The daily series and applicant skill distribution of one job."""
+    from .models import JobDailyStats, JobSkillStats
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return {
+        "since": since,
+        "daily": list(
+            JobDailyStats.objects.filter(job_id=job_id, day__gte=since)
+            .order_by("day")
+            .values("day", "views", "apply_clicks")
+        ),
+        "applicant_skills": skill_distribution(JobSkillStats.objects.filter(job_id=job_id)),
+    }
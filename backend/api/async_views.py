@@ -0,0 +1,221 @@
+"""
+Async-native read endpoints for jobs, companies and portfolios.
+
+DRF viewsets are sync-only, so under ASGI every request to them holds a
+thread-pool slot for its whole lifetime. These views run on the event loop
+and only touch the ORM through its async API (acount, aget, aiterator), so
+a burst of slow or idle readers does not need a thread each. Filtering,
+search, ordering, pagination and the response shape mirror the matching
+DRF viewsets, and the serializers are reused as-is on prefetched objects.
+"""
+import math
+from functools import reduce
+from operator import or_
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+
+from .lifecycle import archived_job_data
+from .models import Company, Job, Portfolio
+from .serializers import CompanySerializer, JobSerializer, PortfolioSerializer
+from .throttling import ClientRateThrottle
+from .views import CompanyViewSet, JobViewSet, PortfolioViewSet, StandardPagination
+
+
+def not_found(detail="Not found."):
+    return JsonResponse({"detail": detail}, status=404)
+
+
+class InvalidFilters(Exception):
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = {field: [str(message) for message in messages] for field, messages in errors.items()}
+
+
+class AsyncReadEndpoint:
+
+    def __init__(self, viewset, serializer_class, queryset, list_queryset=None, archived=None):
+        self.viewset = viewset
+        self.serializer_class = serializer_class
+        self.queryset = queryset
+        self.list_queryset = list_queryset or queryset
+        # Optional pk -> data lookup for objects moved out of the queryset
+        self.archived = archived
+
+    def get_queryset(self):
+        return self.queryset()
+
+    async def filter_queryset(self, request, queryset):
+        """The filtered queryset; raises InvalidFilters like DjangoFilterBackend's 400."""
+        params = request.GET
+
+        if params:
+            # Building the filterset validates tag names against the DB,
+            # which the sync-only django-filter forms do outside the loop.
+            filterset = self.viewset.filterset_class(params, queryset=queryset, request=request)
+            if not await sync_to_async(filterset.is_valid)():
+                raise InvalidFilters(filterset.errors)
+            queryset = await sync_to_async(lambda: filterset.qs)()
+
+        search = params.get("search", "").strip()
+        if search:
+            for term in search.split():
+                queryset = queryset.filter(
+                    reduce(or_, (Q(**{f"{field}__icontains": term}) for field in self.viewset.search_fields))
+                )
+            queryset = queryset.distinct()
+
+        ordering = [
+            field for field in params.get("ordering", "").split(",")
+            if field and field.lstrip("-") in self.viewset.ordering_fields
+        ]
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+
+        return queryset
+
+    def paginate_params(self, request):
+        try:
+            page = max(int(request.GET.get("page", 1)), 1)
+        except ValueError:
+            page = 1
+        try:
+            page_size = int(request.GET.get(StandardPagination.page_size_query_param, StandardPagination.page_size))
+        except ValueError:
+            page_size = StandardPagination.page_size
+        page_size = min(max(page_size, 1), StandardPagination.max_page_size)
+        return page, page_size
+
+    def page_url(self, request, page):
+        params = request.GET.copy()
+        params["page"] = page
+        return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+    async def throttled(self, request):
+        """
+        The per-user or per-IP limit ClientRateThrottle applies to the
+        viewsets, with the client authenticated by the viewset's
+        authentication classes.
+        """
+        throttle = ClientRateThrottle()
+        drf_request = Request(request, authenticators=[auth() for auth in self.viewset.authentication_classes])
+
+        def allow():
+            return throttle.allow_request(drf_request, self.viewset)
+
+        # The local bucket table never blocks for long; cache backends and
+        # token authentication may do I/O.
+        try:
+            if settings.RATE_LIMIT_BACKEND == "local" and "HTTP_AUTHORIZATION" not in request.META:
+                allowed = allow()
+            else:
+                allowed = await sync_to_async(allow)()
+        except AuthenticationFailed as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=401)
+        if allowed:
+            return None
+        response = JsonResponse({"detail": "Request was throttled."}, status=429)
+        response["Retry-After"] = str(math.ceil(throttle.wait()))
+        return response
+
+    async def list(self, request):
+        if throttled := await self.throttled(request):
+            return throttled
+
+        try:
+            queryset = await self.filter_queryset(request, self.list_queryset())
+        except InvalidFilters as exc:
+            return JsonResponse(exc.errors, status=400)
+        page, page_size = self.paginate_params(request)
+
+        count = await queryset.acount()
+        offset = (page - 1) * page_size
+        if offset and offset >= count:
+            return not_found("Invalid page.")
+
+        objects = [
+            obj async for obj in queryset[offset:offset + page_size].aiterator(chunk_size=page_size)
+        ]
+        context = {"request": request}
+
+        return JsonResponse({
+            "count": count,
+            "next": self.page_url(request, page + 1) if offset + page_size < count else None,
+            "previous": self.page_url(request, page - 1) if page > 1 else None,
+            "results": self.serializer_class(objects, many=True, context=context).data,
+        })
+
+    async def retrieve(self, request, pk):
+        if throttled := await self.throttled(request):
+            return throttled
+
+        try:
+            obj = await self.get_queryset().aget(pk=pk)
+        except ObjectDoesNotExist:
+            data = await sync_to_async(self.archived)(pk) if self.archived else None
+            return JsonResponse(data) if data is not None else not_found()
+
+        return JsonResponse(self.serializer_class(obj, context={"request": request}).data)
+
+
+jobs = AsyncReadEndpoint(
+    JobViewSet,
+    JobSerializer,
+    lambda: Job.objects.select_related("company")
+    .prefetch_related("tech_tags", "company__industry")
+    .order_by("-created_at"),
+    list_queryset=lambda: Job.objects.live()
+    .select_related("company")
+    .prefetch_related("tech_tags", "company__industry")
+    .order_by("-created_at"),
+    archived=archived_job_data,
+)
+
+companies = AsyncReadEndpoint(
+    CompanyViewSet,
+    CompanySerializer,
+    lambda: Company.objects.prefetch_related("industry").order_by("-created_at"),
+)
+
+portfolios = AsyncReadEndpoint(
+    PortfolioViewSet,
+    PortfolioSerializer,
+    lambda: Portfolio.objects.prefetch_related("skills", "projects__tech_stack").order_by("-created_at"),
+)
+
+
+@require_safe
+async def job_list(request):
+    return await jobs.list(request)
+
+
+@require_safe
+async def job_detail(request, pk):
+    return await jobs.retrieve(request, pk)
+
+
+@require_safe
+async def company_list(request):
+    return await companies.list(request)
+
+
+@require_safe
+async def company_detail(request, pk):
+    return await companies.retrieve(request, pk)
+
+
+@require_safe
+async def portfolio_list(request):
+    return await portfolios.list(request)
+
+
+@require_safe
+async def portfolio_detail(request, pk):
+    return await portfolios.retrieve(request, pk)
@@ -0,0 +1,171 @@
+"""
+JWT authentication that rebuilds request.user from token claims.
+
+Tokens carry the user's role, staff flag, company ID and job-posting
+entitlements plus a token version ("tver"). ClaimsJWTAuthentication turns
+them into a User instance with only those fields loaded, so authenticated
+requests skip the users table entirely; any other field is fetched lazily
+(Django deferred field) if a view actually touches it.
+
+Whenever role, staff/active status, company or entitlements change the
+user's token_version is bumped (see api.signals); the claims of tokens
+carrying an older version are ignored and the user is loaded from the
+database as before, until the client refreshes its token. The
+current version is read from the cache, so validating it costs no query
+once warm. A bump only clears the cached version in the default cache; when
+that cache is local to the process (LocMemCache), other workers would keep
+the old version, so it is then cached for JWT_TOKEN_VERSION_LOCAL_CACHE_SECONDS
+only.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+TOKEN_VERSION_CLAIM = "tver"
+# Cache backends whose entries other worker processes can't see
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def _cache_key(user_id):
+    return f"user-token-version:{user_id}"
+
+
+def token_version_cache_seconds():
+    if settings.CACHES["default"]["BACKEND"] in LOCAL_CACHE_BACKENDS:
+        return settings.JWT_TOKEN_VERSION_LOCAL_CACHE_SECONDS
+    return settings.JWT_TOKEN_VERSION_CACHE_SECONDS
+
+
+def current_token_version(user_id):
+    from .models import User
+
+    key = _cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list("token_version", flat=True).first()
+        if version is None:
+            return None
+        cache.set(key, version, token_version_cache_seconds())
+    return version
+
+
+def bump_token_version(user_id):
+    """Invalidates all outstanding tokens of a user whose claims changed."""
+    from .models import User
+
+    User.objects.filter(pk=user_id).update(token_version=F("token_version") + 1)
+    # Drop the cached version now and again once the bump is visible, so a
+    # concurrent request can't re-cache the old value in between.
+    cache.delete(_cache_key(user_id))
+    transaction.on_commit(lambda: cache.delete(_cache_key(user_id)))
+
+
+def add_claims(token, user):
+    token["username"] = user.username
+    token["role"] = user.role
+    token["is_staff"] = user.is_staff
+    token["company_id"] = user.company_account_id
+    token["job_credit"] = user.has_active_job_posting_plan
+    token["subscribed"] = user.has_active_subscription
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+def user_from_claims(token):
+    """A User with only the claim fields loaded; nothing is read from the DB."""
+    from .models import User
+
+    loaded = {
+        "id": User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM]),
+        "username": token["username"],
+        "role": token["role"],
+        "is_staff": token["is_staff"],
+        "is_active": True,
+        "has_active_job_posting_plan": token["job_credit"],
+        "token_version": token[TOKEN_VERSION_CLAIM],
+    }
+    # from_db() expects values in model field order
+    fields = [f.attname for f in User._meta.concrete_fields if f.attname in loaded]
+    user = User.from_db("default", fields, [loaded[name] for name in fields])
+    user.company_account_id = token["company_id"]
+    if token["company_id"] is None:
+        user.company_account = None
+    user.subscription_claim = token["subscribed"]
+    return user
+
+
+def token_user_id(request):
+    """
+    The user ID of a valid access token in the request's Authorization
+    header, or None. Verifies the signature only; no database access.
+    """
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header is not None else None
+    if raw is None:
+        return None
+    try:
+        return auth.get_validated_token(raw).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            # Tokens issued before claims were added: fall back to a lookup.
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = current_token_version(user_id)
+        if version is None:
+            raise AuthenticationFailed("User not found.", code="user_not_found")
+        if version != validated_token[TOKEN_VERSION_CLAIM]:
+            # Claims are stale: never trust them, load the user instead. The
+            # client gets fresh claims (and the fast path) on its next refresh.
+            return super().get_user(validated_token)
+        return user_from_claims(validated_token)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Used by Djoser's /auth/jwt/create/ (SIMPLE_JWT["TOKEN_OBTAIN_SERIALIZER"])."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Used by /auth/jwt/refresh/. Re-reads the user so the new access token
+    carries current claims even when the refresh token's are outdated.
+    """
+
+    def validate(self, attrs):
+        from .models import User
+
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        add_claims(refresh, user)
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        return data
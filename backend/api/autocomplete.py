@@ -0,0 +1,150 @@
+"""
+Process-local prefix index for skill autocomplete (/api/tags/autocomplete/).
+
+Every synonym of every skill (see api.skills) is a key in a sorted array,
+so "js", "java" and "javascript" all find their skill by prefix. Results are
+skills ranked by usage (Skill.job_count + portfolio_count). Prefixes
+matching many keys have a precomputed top-k list; any other prefix bisects
+to its key range, which is at most SCAN_LIMIT long, and ranks that.
+
+Tag changes in this process adjust the weights in place and replace a
+generation token in the default cache; other processes rebuild from the
+database (two small tables) when they see a new generation, checking at
+most every SKILL_AUTOCOMPLETE_CHECK_SECONDS.
+"""
+import heapq
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .skills import normalize_skill_name
+
+GENERATION_KEY = "skill-autocomplete-generation"
+TOP_K = 25
+# Prefixes matching more keys than this get a precomputed top-k list
+SCAN_LIMIT = 64
+
+
+class SkillPrefixIndex:
+
+    def __init__(self, skills, synonyms, generation=None):
+        """
+        skills: [(id, name, usage)], synonyms: [(normalized name, skill_id)].
+        """
+        self.generation = generation
+        self.names = {skill_id: name for skill_id, name, _ in skills}
+        self.weights = {skill_id: count for skill_id, _, count in skills}
+        pairs = sorted((key, skill_id) for key, skill_id in synonyms if skill_id in self.names)
+        self.keys = [key for key, _ in pairs]
+        self.skill_ids = [skill_id for _, skill_id in pairs]
+        self.keys_of = {}
+        for key, skill_id in pairs:
+            self.keys_of.setdefault(skill_id, []).append(key)
+
+        # Breadth-first over prefixes: once a prefix matches few keys, so do
+        # all of its extensions, which therefore need no precomputed list.
+        self.top = {}
+        frontier = {key[:1] for key in self.keys}
+        while frontier:
+            extended = set()
+            for prefix in frontier:
+                start, end = self._range(prefix)
+                if end - start <= SCAN_LIMIT:
+                    continue
+                self.top[prefix] = self._rank(start, end, TOP_K)
+                extended.update(key[:len(prefix) + 1] for key in self.keys[start:end] if len(key) > len(prefix))
+            frontier = extended
+
+    def _range(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        return start, bisect_left(self.keys, prefix + "\uffff", start)
+
+    def _rank(self, start, end, limit):
+        # Most used first, then alphabetically
+        return heapq.nsmallest(
+            limit,
+            set(self.skill_ids[start:end]),
+            key=lambda skill_id: (-self.weights[skill_id], self.names[skill_id].lower()),
+        )
+
+    def search(self, query, limit=10):
+        prefix = normalize_skill_name(query)
+        if not prefix:
+            return []
+        if prefix in self.top and limit <= TOP_K:
+            skill_ids = self.top[prefix][:limit]
+        else:
+            skill_ids = self._rank(*self._range(prefix), limit)
+        return [
+            {"id": skill_id, "name": self.names[skill_id], "count": self.weights[skill_id]}
+            for skill_id in skill_ids
+        ]
+
+    def apply_deltas(self, deltas):
+        """Adjusts usage counts in place and re-ranks the affected prefixes."""
+        affected = set()
+        for skill_id, delta in deltas.items():
+            if skill_id in self.weights:
+                self.weights[skill_id] = max(self.weights[skill_id] + delta, 0)
+                affected.update(
+                    key[:n] for key in self.keys_of.get(skill_id, ()) for n in range(1, len(key) + 1)
+                )
+        for prefix in affected & self.top.keys():
+            self.top[prefix] = self._rank(*self._range(prefix), TOP_K)
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def load_index(generation=None):
+    from .models import Skill, SkillSynonym
+
+    return SkillPrefixIndex(
+        [
+            (skill_id, name, jobs + portfolios)
+            for skill_id, name, jobs, portfolios in Skill.objects.values_list(
+                "id", "name", "job_count", "portfolio_count"
+            )
+        ],
+        list(SkillSynonym.objects.values_list("name", "skill_id")),
+        generation,
+    )
+
+
+def get_index():
+    """This process's index, rebuilt when another process changed skills."""
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < settings.SKILL_AUTOCOMPLETE_CHECK_SECONDS:
+        return _index
+
+    with _lock:
+        generation = cache.get(GENERATION_KEY)
+        if _index is None or generation != _index.generation:
+            _index = load_index(generation)
+        _checked_at = now
+        return _index
+
+
+def skill_usage_changed(deltas):
+    """Called after commit when usage counts changed in this process."""
+    generation = uuid.uuid4().hex
+    cache.set(GENERATION_KEY, generation, None)
+    with _lock:
+        if _index is not None:
+            _index.apply_deltas(deltas)
+            _index.generation = generation
+
+
+def skills_changed():
+    """Called when skills or synonyms were added: every process reloads."""
+    global _index
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _index = None
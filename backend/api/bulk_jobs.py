@@ -0,0 +1,174 @@
+"""
+Bulk job writes for subscribed companies: POST /api/jobs/bulk/ with a list
+of jobs, where items carrying an "id" update that job and the others create
+one.
+
+Entitlements are checked once for the whole request and every item is
+validated before anything is written. The writes then run in a single
+transaction with a fixed number of statements per batch: bulk_create /
+bulk_update for the job rows and TaggedItem.bulk_create() for their tags.
+None of these call Job.save() or send model signals, so the structured
+location, skill IDs, denormalized counters, cached company profile and
+salary histograms, and job alerts that single writes keep up to date are
+handled here explicitly.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from taggit.models import Tag, TaggedItem
+
+from .company_profile import invalidate_company_profile
+from .counters import jobs_changed
+from .locations import FIELDS as LOCATION_FIELDS
+from .models import Job
+from .percolator import match_new_jobs
+from .salaries import salary_histograms_changed
+from .permissions import ensure_user_can_post_job
+from .serializers import JobSerializer
+from .skills import rebuild_skill_ids
+
+
+def ensure_user_can_bulk_post(user):
+    ensure_user_can_post_job(user)
+    if not user.has_active_subscription:
+        raise PermissionDenied("Bulk posting requires an unlimited posting subscription.")
+
+
+def validate_items(user, items):
+    """
+    Returns (creates, updates, errors): validated data for new jobs, (job,
+    validated data) pairs for updates, and one error dict per input item
+    (empty for valid items).
+    """
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValidationError("Expected a list of jobs.")
+    if not items:
+        raise ValidationError("Expected at least one job.")
+    if len(items) > settings.JOB_BULK_MAX_ITEMS:
+        raise ValidationError(f"At most {settings.JOB_BULK_MAX_ITEMS} jobs per request.")
+
+    errors = [{} for _ in items]
+    ids = [item["id"] for item in items if item.get("id") is not None]
+    jobs = Job.objects.in_bulk([pk for pk in ids if isinstance(pk, int)])
+
+    new_items = [index for index, item in enumerate(items) if item.get("id") is None]
+    creates = []
+    if new_items:
+        serializer = JobSerializer(data=[items[index] for index in new_items], many=True)
+        if serializer.is_valid():
+            creates = serializer.validated_data
+        else:
+            for index, item_errors in zip(new_items, serializer.errors):
+                errors[index] = item_errors
+
+    updates = []
+    seen = set()
+    for index, item in enumerate(items):
+        pk = item.get("id")
+        if pk is None:
+            continue
+        job = jobs.get(pk) if isinstance(pk, int) else None
+        if job is None:
+            errors[index] = {"id": ["Job not found."]}
+        elif job.company_id != user.company_account_id and user.role != "ADMIN":
+            errors[index] = {"id": ["You can only edit jobs from your own company."]}
+        elif pk in seen:
+            errors[index] = {"id": ["Job is listed more than once."]}
+        else:
+            seen.add(pk)
+            serializer = JobSerializer(job, data=item, partial=True)
+            if serializer.is_valid():
+                updates.append((job, serializer.validated_data))
+            else:
+                errors[index] = serializer.errors
+    return creates, updates, errors
+
+
+def tag_ids(names):
+    """{name: Tag id} for tag names, creating the missing tags in bulk."""
+    names = set(names)
+    known = dict(Tag.objects.filter(name__in=names).values_list("name", "id"))
+    missing = names - set(known)
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name, slug=slugify(name)) for name in missing], ignore_conflicts=True)
+        known.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+        # Names whose slug collided with another tag's get a unique slug from Tag.save().
+        for name in missing - set(known):
+            known[name] = Tag.objects.get_or_create(name=name)[0].id
+    return known
+
+
+def write_tags(tagged):
+    """Replaces the tech tags of jobs: tagged is {job_id: [tag names]}."""
+    if not tagged:
+        return
+    content_type = ContentType.objects.get_for_model(Job)
+    ids = tag_ids(name for names in tagged.values() for name in names)
+    TaggedItem.objects.filter(content_type=content_type, object_id__in=list(tagged)).delete()
+    TaggedItem.objects.bulk_create([
+        TaggedItem(tag_id=ids[name], content_type=content_type, object_id=job_id)
+        for job_id, names in tagged.items()
+        for name in set(names)
+    ])
+
+
+def bulk_write_jobs(user, creates, updates, batch_size=500):
+    """
+    Writes validated jobs (see validate_items) inside the caller's
+    transaction. Returns (created IDs, updated IDs).
+    """
+    now = timezone.now()
+    transitions = []
+    tagged = {}
+
+    new_jobs = []
+    new_tags = []
+    for data in creates:
+        data = dict(data)
+        new_tags.append(data.pop("tech_tags", None))
+        job = Job(**data, company_id=user.company_account_id, posted_by=user)
+        job.fill_location()  # bulk_create() skips Job.save()
+        new_jobs.append(job)
+    Job.objects.bulk_create(new_jobs, batch_size=batch_size)
+    for job, names in zip(new_jobs, new_tags):
+        transitions.append((None, (job.status, job.company_id, [])))
+        if names:
+            tagged[job.pk] = names
+
+    fields = {"updated_at"}
+    for job, data in updates:
+        before = (job.status, job.company_id, job.skill_ids)
+        data = dict(data)
+        if "tech_tags" in data:
+            tagged[job.pk] = data.pop("tech_tags")
+        for field, value in data.items():
+            setattr(job, field, value)
+            fields.add(field)
+        if "location" in data:
+            job.fill_location()
+            fields.update(LOCATION_FIELDS)
+        if job.status == Job.STATUS_EXPIRED and job.expires_at and job.expires_at > now:
+            # Extending the expiry date reopens the posting (as in Job.save()).
+            job.status = Job.STATUS_ACTIVE
+            fields.add("status")
+        job.updated_at = now
+        transitions.append((before, (job.status, job.company_id, job.skill_ids)))
+    Job.objects.bulk_update([job for job, _ in updates], sorted(fields), batch_size=batch_size)
+
+    # Status changes first, with the old skill IDs; rebuild_skill_ids then
+    # counts the skill changes of the jobs that are active afterwards.
+    jobs_changed(transitions)
+    write_tags(tagged)
+    if tagged:
+        rebuild_skill_ids(Job, list(tagged), batch_size)
+
+    for company_id in {job.company_id for job in new_jobs} | {job.company_id for job, _ in updates}:
+        invalidate_company_profile(company_id)
+    salary_histograms_changed()
+    created = [job.pk for job in new_jobs]
+    if created:
+        transaction.on_commit(lambda: match_new_jobs(created))
+    return created, [job.pk for job, _ in updates]
@@ -0,0 +1,73 @@
+"""
+Company pages in one request: /api/companies/by-slug/{slug}/profile/
+returns the company, its live jobs and the tags they use.
+
+The payload is built with a fixed number of queries (company, its industry
+tags, live jobs, their tech tags) and cached per company slug until the
+company or one of its jobs changes (see api.signals) or the first listed
+job expires, whichever is sooner. COMPANY_PROFILE_CACHE_SECONDS bounds how
+long a payload survives changes made outside the ORM.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+
+def _cache_key(slug):
+    return f"company-profile:{slug}"
+
+
+def build_company_profile(slug, request=None):
+    """The profile payload and the moment it goes stale, or (None, None)."""
+    from .models import Company, Job
+    from .serializers import CompanyJobSerializer, CompanySerializer
+
+    company = Company.objects.prefetch_related("industry").filter(slug=slug).first()
+    if company is None:
+        return None, None
+    jobs = list(
+        Job.objects.live()
+        .filter(company=company)
+        .prefetch_related("tech_tags")
+        .order_by("-created_at")
+    )
+    context = {"request": request}
+    tags = sorted({tag.name for job in jobs for tag in job.tech_tags.all()})
+    data = {
+        "company": CompanySerializer(company, context=context).data,
+        "jobs": CompanyJobSerializer(jobs, many=True, context=context).data,
+        "tags": tags,
+    }
+    expiries = [job.expires_at for job in jobs if job.expires_at is not None]
+    return data, min(expiries, default=None)
+
+
+def company_profile(slug, request=None):
+    """The cached profile payload of a company, or None if there is no such company."""
+    key = _cache_key(slug)
+    data = cache.get(key)
+    if data is None:
+        data, stale_at = build_company_profile(slug, request)
+        if data is None:
+            return None
+        timeout = settings.COMPANY_PROFILE_CACHE_SECONDS
+        if stale_at is not None:
+            timeout = max(min(timeout, int((stale_at - timezone.now()).total_seconds())), 1)
+        cache.set(key, data, timeout)
+    return data
+
+
+def invalidate_company_profile(company_id=None, slug=None):
+    """Drops a company's cached profile, now and once the change is committed."""
+    if slug is None:
+        from .models import Company
+
+        slug = Company.objects.filter(pk=company_id).values_list("slug", flat=True).first()
+        if slug is None:
+            return
+    key = _cache_key(slug)
+    # Delete again after commit, so a concurrent request can't re-cache the
+    # payload it built from the old rows in between.
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
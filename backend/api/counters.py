@@ -0,0 +1,124 @@
+"""
+Denormalized counters, changed only with F() increments so concurrent
+writers never lose updates:
+
+  Company.open_jobs_count   the company's ACTIVE jobs
+  Skill.job_count           ACTIVE jobs with the skill
+  Skill.portfolio_count     portfolios with the skill
+
+They are adjusted from the job signals (api.signals), the skill_ids sync
+(api.skills) and the expire_jobs sweeper (api.lifecycle). Writes that
+bypass all of these (raw SQL, QuerySet.update() on status) make them
+drift; the reconcile_counters command recomputes them.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+
+
+def skill_deltas(before, after):
+    deltas = Counter(after)
+    deltas.subtract(before)
+    return deltas
+
+
+def _adjust(model, field, deltas):
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta and pk is not None:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        rows = model.objects.filter(pk__in=pks)
+        if delta < 0:
+            rows = rows.filter(**{f"{field}__gte": -delta})
+        rows.update(**{field: F(field) + delta})
+
+
+def adjust_open_jobs(deltas):
+    """Applies {company_id: +n/-n} to Company.open_jobs_count."""
+    from .models import Company
+
+    _adjust(Company, "open_jobs_count", deltas)
+
+
+def adjust_skill_counts(model, deltas):
+    """Applies {skill_id: +n/-n} to the Skill counter of model (Job or Portfolio)."""
+    from .autocomplete import skill_usage_changed
+    from .models import Skill
+
+    deltas = {skill_id: delta for skill_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    _adjust(Skill, f"{model._meta.model_name}_count", deltas)
+    transaction.on_commit(lambda: skill_usage_changed(deltas))
+
+
+def jobs_changed(changes):
+    """
+    Applies job transitions [(before, after)], each state being a
+    (status, company_id, skill_ids) tuple or None (not existing).
+    """
+    from .models import Job
+
+    companies = Counter()
+    skills = Counter()
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is not None and state[0] == Job.STATUS_ACTIVE:
+                companies[state[1]] += sign
+                for skill_id in state[2]:
+                    skills[skill_id] += sign
+    adjust_open_jobs(companies)
+    adjust_skill_counts(Job, skills)
+
+
+def skill_ids_changed(model, changes):
+    """Applies skill_ids rewrites [(pk, before, after)] of Job or Portfolio rows."""
+    from .models import Job
+
+    if model is Job:
+        active = set(
+            Job.objects.filter(pk__in=[pk for pk, _, _ in changes], status=Job.STATUS_ACTIVE)
+            .values_list("pk", flat=True)
+        )
+        changes = [change for change in changes if change[0] in active]
+    deltas = Counter()
+    for _, before, after in changes:
+        deltas.update(skill_deltas(before, after))
+    adjust_skill_counts(model, deltas)
+
+
+def reconcile_counters():
+    """Recomputes every counter from the source rows; returns the number of rows fixed."""
+    from .autocomplete import skills_changed
+    from .models import Company, Job, Portfolio, Skill
+
+    open_jobs = dict(
+        Job.objects.filter(status=Job.STATUS_ACTIVE)
+        .values("company_id")
+        .annotate(n=Count("id"))
+        .values_list("company_id", "n")
+    )
+    companies = [
+        Company(pk=pk, open_jobs_count=open_jobs.get(pk, 0))
+        for pk, current in Company.objects.values_list("pk", "open_jobs_count").iterator()
+        if current != open_jobs.get(pk, 0)
+    ]
+    Company.objects.bulk_update(companies, ["open_jobs_count"], batch_size=1000)
+
+    job_counts = Counter()
+    for skill_ids in Job.objects.filter(status=Job.STATUS_ACTIVE).values_list("skill_ids", flat=True).iterator():
+        job_counts.update(skill_ids)
+    portfolio_counts = Counter()
+    for skill_ids in Portfolio.objects.values_list("skill_ids", flat=True).iterator():
+        portfolio_counts.update(skill_ids)
+    skills = [
+        Skill(pk=pk, job_count=job_counts[pk], portfolio_count=portfolio_counts[pk])
+        for pk, jobs, portfolios in Skill.objects.values_list("pk", "job_count", "portfolio_count").iterator()
+        if (jobs, portfolios) != (job_counts[pk], portfolio_counts[pk])
+    ]
+    Skill.objects.bulk_update(skills, ["job_count", "portfolio_count"], batch_size=1000)
+    if skills:
+        transaction.on_commit(skills_changed)
+    return len(companies) + len(skills)
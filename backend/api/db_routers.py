@@ -0,0 +1,40 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set per request by ReplicaRoutingMiddleware. Outside a request (management
+# commands, shells, background workers) everything stays on the primary.
+_reads_from_replica = ContextVar("reads_from_replica", default=False)
+
+
+def use_replica_for_reads(enabled):
+    """Returns a token for resetting the previous value with reset_replica_routing()."""
+    return _reads_from_replica.set(enabled)
+
+
+def reset_replica_routing(token):
+    _reads_from_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a random configured replica while the current request has
+    been marked replica-safe, and everything else to the primary ("default").
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _reads_from_replica.get():
+            return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
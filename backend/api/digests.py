@@ -0,0 +1,151 @@
+"""
+Job alert email digests.
+
+Requests never send mail: matching jobs are recorded as JobAlert rows (see
+api.percolator) and the send_digests command, run periodically from cron,
+turns each user's pending alerts into one digest email. Users are handled
+EMAIL_DIGEST_BATCH_SIZE at a time, with one query for the batch's alerts
+and one SMTP connection kept open for all of its messages. Sending is
+paced by the shared token bucket table of api.throttling
+(EMAIL_DIGEST_RATE, per host), and a message that fails with a temporary
+error is retried on a fresh connection up to EMAIL_DIGEST_RETRIES times.
+Alerts are marked notified once their digest was accepted (or permanently
+rejected) by the relay, so a digest that failed temporarily is sent again
+on the next run.
+
+For local development, point EMAIL_HOST/EMAIL_PORT at
+`python manage.py smtp_debug_server` (api.smtp_debug).
+"""
+import logging
+import smtplib
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .throttling import get_buckets, parse_rate
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY = "email-digest"
+
+SENT, REJECTED, FAILED = "sent", "rejected", "failed"
+
+
+def pending_user_ids():
+    from .models import JobAlert
+
+    return list(
+        JobAlert.objects.filter(notified_at__isnull=True)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+
+
+def render_digest(user, alerts):
+    """The digest email for a user's pending alerts (newest first)."""
+    shown = alerts[:settings.EMAIL_DIGEST_MAX_JOBS]
+    context = {
+        "user": user,
+        "alerts": shown,
+        "more": len(alerts) - len(shown),
+        "site_url": settings.SITE_URL,
+    }
+    message = EmailMultiAlternatives(
+        subject=f"{len(alerts)} new job{'s' if len(alerts) != 1 else ''} matching your saved searches",
+        body=render_to_string("api/email/job_alert_digest.txt", context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    message.attach_alternative(render_to_string("api/email/job_alert_digest.html", context), "text/html")
+    return message
+
+
+def wait_for_send_slot():
+    limit, period = parse_rate(settings.EMAIL_DIGEST_RATE)
+    while True:
+        allowed, _, _, retry_after = get_buckets().take(RATE_KEY, limit, period)
+        if allowed:
+            return
+        time.sleep(retry_after)
+
+
+def is_permanent(exc):
+    # 5xx replies (unknown mailbox, policy rejection) won't succeed on retry.
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+def send_with_retries(connection, message):
+    """
+    Sends one message: SENT, REJECTED (permanent error, don't retry later)
+    or FAILED (gave up on a temporary error).
+    """
+    for attempt in range(settings.EMAIL_DIGEST_RETRIES + 1):
+        wait_for_send_slot()
+        try:
+            connection.open()  # no-op while the batch's connection is up
+            connection.send_messages([message])
+            return SENT
+        except (smtplib.SMTPException, OSError) as exc:
+            if is_permanent(exc):
+                logger.warning("Digest to %s rejected: %s", message.to, exc)
+                return REJECTED
+            if attempt == settings.EMAIL_DIGEST_RETRIES:
+                logger.warning("Digest to %s failed after %d attempts: %s", message.to, attempt + 1, exc)
+                return FAILED
+            # The connection may be unusable after an error; start over.
+            connection.close()
+            time.sleep(settings.EMAIL_DIGEST_RETRY_BACKOFF * (2 ** attempt))
+
+
+def send_batch(user_ids, connection, now):
+    """Sends the digests of a batch of users; returns (sent, failed)."""
+    from .models import JobAlert
+
+    alerts = (
+        JobAlert.objects.filter(user_id__in=user_ids, notified_at__isnull=True)
+        .select_related("user", "saved_search", "job__company")
+        .order_by("user_id", "-created_at")
+    )
+    by_user = defaultdict(list)
+    for alert in alerts:
+        by_user[alert.user_id].append(alert)
+
+    sent, failed, done = 0, 0, []
+    for user_alerts in by_user.values():
+        user = user_alerts[0].user
+        ids = [alert.id for alert in user_alerts]
+        if not user.email or not user.is_active:
+            done.extend(ids)  # nobody to tell; don't pick these up again
+            continue
+        result = send_with_retries(connection, render_digest(user, user_alerts))
+        if result != FAILED:
+            done.extend(ids)
+        if result == SENT:
+            sent += 1
+        else:
+            failed += 1
+    JobAlert.objects.filter(id__in=done).update(notified_at=now)
+    return sent, failed
+
+
+def send_alert_digests(batch_size=None):
+    """Sends every user with pending job alerts their digest. Returns (sent, failed)."""
+    batch_size = batch_size or settings.EMAIL_DIGEST_BATCH_SIZE
+    user_ids = pending_user_ids()
+    sent = failed = 0
+    for start in range(0, len(user_ids), batch_size):
+        connection = get_connection(fail_silently=False)
+        try:
+            batch_sent, batch_failed = send_batch(user_ids[start:start + batch_size], connection, timezone.now())
+        finally:
+            connection.close()
+        sent += batch_sent
+        failed += batch_failed
+    return sent, failed
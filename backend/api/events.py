@@ -0,0 +1,216 @@
+"""
+Job view and apply-click events (POST /api/events/) for posting analytics.
+
+Requests never write to the database. Each worker buffers events in memory
+and appends them, EVENT_BUFFER_SIZE at a time or at least every
+EVENT_FLUSH_SECONDS, to its own log file in EVENT_LOG_DIR with a single
+write() call. Log files are named by time segment (EVENT_LOG_SEGMENT_SECONDS)
+and process, so a file is complete once its segment is over; the
+compact_events command, run periodically, renames the files of finished
+segments to unique closed names, loads those into JobEvent with batched
+inserts and removes exactly the files it read. A worker appending late to
+a finished segment starts a fresh file under the old name, which the next
+run picks up. The name of each loaded file is recorded in the same
+transaction as its rows, so a file is never loaded twice. Events still
+buffered when a worker is killed are lost, which analytics can afford.
+
+Log lines are tab-separated: timestamp, kind, job ID, visitor hash and the
+user ID of a signed-in visitor (empty otherwise).
+"""
+import atexit
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("view", "apply")
+LOG_NAME = re.compile(r"^events-(\d+)-(\d+)\.log$")
+# A log file renamed by rotate_logs(), waiting to be loaded
+CLOSED_NAME = re.compile(r"^events-(\d+)-(\d+)\.log\.[0-9a-f]+$")
+
+
+def visitor_hash(request):
+    """Anonymous per-day visitor key: client IP and user agent, salted with the secret key and date."""
+    raw = "|".join((
+        request.META.get("REMOTE_ADDR", ""),
+        request.META.get("HTTP_USER_AGENT", ""),
+        time.strftime("%Y-%m-%d", time.gmtime()),
+    ))
+    return hashlib.blake2b(raw.encode(), key=settings.SECRET_KEY.encode()[:64], digest_size=8).hexdigest()
+
+
+class EventBuffer:
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self.pid = os.getpid()
+        self.lines = []
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        threading.Thread(target=self._flush_periodically, daemon=True).start()
+
+    def record(self, events, visitor, user_id=None, now=None):
+        """Buffers [(kind, job_id)] events."""
+        now = time.time() if now is None else now
+        user = user_id or ""
+        lines = [f"{now:.3f}\t{kind}\t{job_id}\t{visitor}\t{user}\n" for kind, job_id in events]
+        with self.lock:
+            self.lines.extend(lines)
+            if len(self.lines) >= settings.EVENT_BUFFER_SIZE:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        self.flushed_at = time.monotonic()
+        if not self.lines:
+            return
+        segment = int(time.time() // settings.EVENT_LOG_SEGMENT_SECONDS)
+        path = os.path.join(self.directory, f"events-{segment}-{self.pid}.log")
+        data = "".join(self.lines).encode()
+        self.lines = []
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+        except OSError:
+            logger.exception("Could not write job events to %s", path)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.EVENT_FLUSH_SECONDS)
+            if time.monotonic() - self.flushed_at >= settings.EVENT_FLUSH_SECONDS:
+                self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """This process's event buffer (re-created after fork or a directory change)."""
+    global _buffer
+    current = _buffer
+    directory = str(settings.EVENT_LOG_DIR)
+    if current is not None and current.pid == os.getpid() and current.directory == directory:
+        return current
+
+    with _buffer_lock:
+        if _buffer is None or _buffer.pid != os.getpid() or _buffer.directory != directory:
+            if _buffer is not None and _buffer.pid == os.getpid():
+                _buffer.flush()
+            _buffer = EventBuffer(directory)
+            atexit.register(_buffer.flush)
+        return _buffer
+
+
+def flush_buffer():
+    """Writes out this process's buffered events, if it has a buffer."""
+    current = _buffer
+    if current is not None and current.pid == os.getpid():
+        current.flush()
+
+
+def parse_log(path):
+    """[(occurred_at, kind, job_id, visitor, user_id)] of a log file; malformed lines are skipped."""
+    events = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 5 or parts[1] not in KINDS:
+                continue
+            try:
+                occurred_at = datetime.fromtimestamp(float(parts[0]), tz=dt_timezone.utc)
+                job_id = int(parts[2])
+                user_id = int(parts[4]) if parts[4] else None
+            except ValueError:
+                continue
+            events.append((occurred_at, parts[1], job_id, parts[3], user_id))
+    return events
+
+
+def rotate_logs(directory, now=None):
+    """
+    Renames the log files of finished segments to unique closed names and
+    returns every closed file name (including ones left by an interrupted
+    run), oldest first. The active segment is never touched.
+    """
+    now = time.time() if now is None else now
+    current = int(now // settings.EVENT_LOG_SEGMENT_SECONDS)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    closed = []
+    for name in names:
+        match = LOG_NAME.match(name)
+        if match and int(match.group(1)) < current:
+            closed_name = f"{name}.{uuid.uuid4().hex}"
+            try:
+                os.rename(os.path.join(directory, name), os.path.join(directory, closed_name))
+            except FileNotFoundError:  # rotated by a concurrent run
+                continue
+            closed.append((int(match.group(1)), closed_name))
+            continue
+        match = CLOSED_NAME.match(name)
+        if match:
+            closed.append((int(match.group(1)), name))
+    return [name for _, name in sorted(closed)]
+
+
+def load_log(path, name, batch_size):
+    from .models import ArchivedJob, Job, JobEvent, LoadedEventLog
+
+    events = parse_log(path)
+    job_ids = {event[2] for event in events}
+    companies = dict(ArchivedJob.objects.filter(id__in=job_ids).values_list("id", "company_id"))
+    companies.update(Job.objects.filter(id__in=job_ids).values_list("id", "company_id"))
+
+    rows = [
+        JobEvent(
+            job_id=job_id,
+            company_id=companies[job_id],
+            kind=kind,
+            visitor=visitor,
+            user_id=user_id,
+            occurred_at=occurred_at,
+        )
+        for occurred_at, kind, job_id, visitor, user_id in events
+        if job_id in companies  # unknown or deleted jobs
+    ]
+    with transaction.atomic():
+        if not LoadedEventLog.objects.filter(name=name).exists():
+            JobEvent.objects.bulk_create(rows, batch_size=batch_size)
+            LoadedEventLog.objects.create(name=name)
+        else:
+            rows = []
+    return rows
+
+
+def compact_event_logs(now=None, batch_size=1000):
+    """
+    Loads every log file of a finished segment in EVENT_LOG_DIR into
+    JobEvent and removes it. Returns the number of events loaded.
+    """
+    directory = str(settings.EVENT_LOG_DIR)
+    flush_buffer()
+    loaded = 0
+    for name in rotate_logs(directory, now):
+        path = os.path.join(directory, name)
+        loaded += len(load_log(path, name, batch_size))
+        os.remove(path)
+    return loaded
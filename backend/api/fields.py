@@ -0,0 +1,84 @@
+"""
+Custom model fields.
+
+SkillIdsField stores a sorted list of Skill IDs as JSON (jsonb on
+PostgreSQL, where migration 0009 adds a GIN jsonb_path_ops index) and adds
+two lookups that the filters use instead of joins through taggit:
+
+    Job.objects.filter(skill_ids__all=[1, 2])   # has every skill
+    Job.objects.filter(skill_ids__any=[1, 2])   # has at least one
+"""
+import json
+
+from django.db import NotSupportedError, models
+from django.db.models import Lookup
+
+
+class SkillIdsField(models.JSONField):
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("default", list)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+
+class SkillIdsLookup(Lookup):
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        return sorted({int(value) for value in self.rhs})
+
+    def as_sql(self, compiler, connection):
+        lhs, params = self.process_lhs(compiler, connection)
+        ids = self.rhs
+        if not ids:
+            return self.empty_sql, []
+
+        vendor = connection.vendor
+        if vendor == "postgresql":
+            sql, extra = self.as_postgresql_sql(lhs, ids)
+        elif vendor == "sqlite":
+            sql, extra = self.as_sqlite_sql(lhs, ids)
+        elif vendor == "mysql":
+            sql, extra = self.as_mysql_sql(lhs, ids)
+        else:
+            raise NotSupportedError(f"skill_ids__{self.lookup_name} is not supported on {vendor}.")
+        return sql, [*params, *extra]
+
+
+@SkillIdsField.register_lookup
+class HasAllSkills(SkillIdsLookup):
+    lookup_name = "all"
+    empty_sql = "1 = 1"
+
+    def as_postgresql_sql(self, lhs, ids):
+        return f"{lhs} @> %s::jsonb", [json.dumps(ids)]
+
+    def as_sqlite_sql(self, lhs, ids):
+        placeholders = ", ".join(["%s"] * len(ids))
+        # IDs are unique within a row, so matching all of them means matching len(ids).
+        return (
+            f"(SELECT COUNT(*) FROM json_each({lhs}) WHERE json_each.value IN ({placeholders})) = %s",
+            [*ids, len(ids)],
+        )
+
+    def as_mysql_sql(self, lhs, ids):
+        return f"JSON_CONTAINS({lhs}, %s)", [json.dumps(ids)]
+
+
+@SkillIdsField.register_lookup
+class HasAnySkill(SkillIdsLookup):
+    lookup_name = "any"
+    empty_sql = "1 = 0"
+
+    def as_postgresql_sql(self, lhs, ids):
+        # One @> per ID so each can use the GIN index (bitmap OR).
+        return "(" + " OR ".join([f"{lhs} @> %s::jsonb"] * len(ids)) + ")", [json.dumps([i]) for i in ids]
+
+    def as_sqlite_sql(self, lhs, ids):
+        placeholders = ", ".join(["%s"] * len(ids))
+        return f"EXISTS (SELECT 1 FROM json_each({lhs}) WHERE json_each.value IN ({placeholders}))", ids
+
+    def as_mysql_sql(self, lhs, ids):
+        return f"JSON_OVERLAPS({lhs}, %s)", [json.dumps(ids)]
@@ -1,14 +1,164 @@
 # api/filters.py
+import math
+
 import django_filters
+from django import forms
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
 from taggit.models import Tag
+from .locations import EARTH_RADIUS_KM, bounding_box, country_code, offset_ranges, parse_offset, parse_point
 from .models import Job, Company, Portfolio
+from .skills import category_skill_ids, lookup_skill_ids, normalize_skill_name
+
+
+class SkillNamesField(forms.Field):
+    """Repeated (?s=a&s=b) and/or comma-separated (?s=a,b) skill names."""
+    widget = forms.SelectMultiple
+
+    def to_python(self, value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [name for item in value for name in item.split(",") if name.strip()]
+
+
+class SkillFilter(django_filters.Filter):
+    """
+    Filters on the canonical skill_ids column: rows with any (or, with
+    match="all", every) of the named skills, synonyms included.
+    """
+    field_class = SkillNamesField
+
+    def __init__(self, *args, match="any", **kwargs):
+        kwargs.setdefault("field_name", "skill_ids")
+        super().__init__(*args, **kwargs)
+        self.match = match
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        keys = {normalize_skill_name(name) for name in value}
+        ids = lookup_skill_ids(keys)
+        if not ids or (self.match == "all" and len(ids) < len(keys)):
+            return qs.none()
+        return qs.filter(**{f"{self.field_name}__{self.match}": list(ids.values())})
+
+
+class SkillCategoryFilter(django_filters.CharFilter):
+    """Rows with any skill in the category (by slug) or its subcategories."""
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return qs.filter(**{f"{self.field_name}__any": category_skill_ids(value)})
+
+
+class PointField(forms.CharField):
+    """A place known to the gazetteer or "latitude,longitude", as (lat, lon)."""
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        point = parse_point(value)
+        if point is None:
+            raise forms.ValidationError('Unknown location; use a city or "latitude,longitude".')
+        return point
+
+
+class UTCOffsetField(forms.CharField):
+    """An IANA timezone or UTC offset ("+05:30"), as minutes east of UTC."""
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if not value:
+            return None
+        offset = parse_offset(value)
+        if offset is None:
+            raise forms.ValidationError('Unknown timezone; use a name like "Europe/Berlin" or an offset like "-05:00".')
+        return offset
+
+
+def distance_km(lat, lon):
+    """Great-circle (haversine) distance of the row's latitude/longitude from a point."""
+    half_dlat = (Radians(F("latitude")) - math.radians(lat)) / 2
+    half_dlon = (Radians(F("longitude")) - math.radians(lon)) / 2
+    a = Power(Sin(half_dlat), 2) + math.cos(math.radians(lat)) * Cos(Radians(F("latitude"))) * Power(Sin(half_dlon), 2)
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+class NearFilter(django_filters.Filter):
+    """
+    Jobs within ?radius_km= of a point. The bounding box is answered from
+    the (latitude, longitude) index; the exact distance is only computed
+    for the rows inside it and is returned as `distance_km`.
+    """
+    field_class = PointField
+
+    def __init__(self, *args, radius_param="radius_km", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.radius_param = radius_param
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        lat, lon = value
+        radius = float(self.parent.form.cleaned_data.get(self.radius_param) or settings.JOB_NEAR_DEFAULT_RADIUS_KM)
+        min_lat, max_lat, lon_ranges = bounding_box(lat, lon, radius)
+        qs = qs.filter(latitude__range=(min_lat, max_lat))
+        if lon_ranges is None:
+            qs = qs.filter(longitude__isnull=False)
+        else:
+            box = Q()
+            for low, high in lon_ranges:
+                box |= Q(longitude__range=(low, high))
+            qs = qs.filter(box)
+        return qs.annotate(distance_km=distance_km(lat, lon)).filter(distance_km__lte=radius)
+
+
+class TimezoneOverlapFilter(django_filters.Filter):
+    """
+    Jobs whose timezone shares at least ?min_overlap_hours= (default 4) of
+    an 8-hour working day with the given timezone.
+    """
+    field_class = UTCOffsetField
+
+    def __init__(self, *args, overlap_param="min_overlap_hours", **kwargs):
+        kwargs.setdefault("field_name", "utc_offset_minutes")
+        super().__init__(*args, **kwargs)
+        self.overlap_param = overlap_param
+
+    def filter(self, qs, value):
+        if value is None:
+            return qs
+        hours = self.parent.form.cleaned_data.get(self.overlap_param)
+        ranges = offset_ranges(value, 4 if hours is None else float(hours))
+        if not ranges:
+            return qs.none()
+        overlap = Q()
+        for low, high in ranges:
+            overlap |= Q(**{f"{self.field_name}__range": (low, high)})
+        return qs.filter(overlap)
+
 
 class JobFilter(django_filters.FilterSet):
-    tech_tags = django_filters.ModelMultipleChoiceFilter(
-        field_name="tech_tags__name",
-        to_field_name="name",
-        queryset=Tag.objects.all(),
+    tech_tags = SkillFilter()
+    tech_tags_all = SkillFilter(match="all")
+    skill_category = SkillCategoryFilter(field_name="skill_ids")
+
+    near = NearFilter()
+    radius_km = django_filters.NumberFilter(
+        method="use_with_other_filter", min_value=1, max_value=settings.JOB_NEAR_MAX_RADIUS_KM
     )
+    region = django_filters.CharFilter(method="filter_region")
+    country = django_filters.CharFilter(method="filter_country")
+    work_timezone = TimezoneOverlapFilter()
+    min_overlap_hours = django_filters.NumberFilter(method="use_with_other_filter", min_value=0, max_value=8)
+    # Jobs whose salary range overlaps [salary_min, salary_max]
+    salary_min = django_filters.NumberFilter(method="filter_salary_min", min_value=0)
+    salary_max = django_filters.NumberFilter(method="filter_salary_max", min_value=0)
 
     class Meta:
         model = Job
@@ -21,6 +171,25 @@ class JobFilter(django_filters.FilterSet):
             "is_remote_friendly": ["exact"],
         }
 
+    def use_with_other_filter(self, queryset, name, value):
+        # Read by the filter it modifies (e.g. radius_km by near).
+        return queryset
+
+    def filter_region(self, queryset, name, value):
+        # Regions are stored as upper-case codes ("TX", "ON", "ENG").
+        return queryset.filter(region=value.strip().upper())
+
+    def filter_country(self, queryset, name, value):
+        code = country_code(value)
+        return queryset.filter(country=code) if code else queryset.none()
+
+    # A job with one bound only is treated as paying exactly that.
+    def filter_salary_min(self, queryset, name, value):
+        return queryset.filter(Q(max_salary__gte=value) | Q(max_salary__isnull=True, min_salary__gte=value))
+
+    def filter_salary_max(self, queryset, name, value):
+        return queryset.filter(Q(min_salary__lte=value) | Q(min_salary__isnull=True, max_salary__lte=value))
+
 
 class CompanyFilter(django_filters.FilterSet):
     industry = django_filters.ModelMultipleChoiceFilter(
@@ -33,15 +202,14 @@ class CompanyFilter(django_filters.FilterSet):
         model = Company
         fields = {
             "name": ["icontains"],
+            "open_jobs_count": ["gte", "lte"],
         }
 
 
 class PortfolioFilter(django_filters.FilterSet):
-    skills = django_filters.ModelMultipleChoiceFilter(
-        field_name="skills__name",
-        to_field_name="name",
-        queryset=Tag.objects.all(),
-    )
+    skills = SkillFilter()
+    skills_all = SkillFilter(match="all")
+    skill_category = SkillCategoryFilter(field_name="skill_ids")
 
     class Meta:
         model = Portfolio
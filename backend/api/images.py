@@ -0,0 +1,105 @@
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+DERIVATIVE_DIR = "company_logos/derived/"
+
+# Formats generated for every thumbnail size: (extension, Pillow format, save options)
+DERIVATIVE_FORMATS = [
+    ("png", "PNG", {"optimize": True}),
+    ("webp", "WEBP", {"quality": 80, "method": 6}),
+]
+
+# Single background worker so logo processing never runs on the request thread.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="logo-derivatives")
+
+
+def _render(image, size, fmt, options):
+    thumb = ImageOps.pad(image, (size, size), color=(0, 0, 0, 0))
+    buffer = io.BytesIO()
+    thumb.save(buffer, format=fmt, **options)
+    return buffer.getvalue()
+
+
+def _store(data, size, ext):
+    """
+    Stores a derivative under a name derived from its content, so the file
+    can be served with an immutable cache header and never needs busting.
+    """
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    name = f"{DERIVATIVE_DIR}{digest}-{size}.{ext}"
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+def build_logo_derivatives(company):
+    """
+    Generates the fixed-size thumbnails and WebP variants for a company logo
+    and records them on the company. Returns the stored derivative map.
+    """
+    from .models import Company
+
+    if not company.logo:
+        derivatives = {}
+    else:
+        with company.logo.open("rb") as f:
+            image = Image.open(f)
+            image.load()
+        image = ImageOps.exif_transpose(image).convert("RGBA")
+
+        sizes = {}
+        for size in settings.LOGO_THUMBNAIL_SIZES:
+            sizes[str(size)] = {
+                ext: _store(_render(image, size, fmt, options), size, ext)
+                for ext, fmt, options in DERIVATIVE_FORMATS
+            }
+        derivatives = {"source": company.logo.name, "sizes": sizes}
+
+    # update() rather than save() so this does not re-trigger post_save.
+    Company.objects.filter(pk=company.pk).update(logo_derivatives=derivatives)
+    company.logo_derivatives = derivatives
+    return derivatives
+
+
+def logo_derivatives_stale(company):
+    source = (company.logo_derivatives or {}).get("source")
+    if company.logo:
+        return source != company.logo.name
+    return bool(company.logo_derivatives)
+
+
+def _build_in_background(company_id):
+    from .models import Company
+
+    close_old_connections()
+    try:
+        company = Company.objects.filter(pk=company_id).first()
+        if company is not None and logo_derivatives_stale(company):
+            build_logo_derivatives(company)
+    finally:
+        close_old_connections()
+
+
+def schedule_logo_derivatives(company):
+    """
+    Queues derivative generation for a company whose logo changed.
+    Runs inline when LOGO_DERIVATIVES_ASYNC is off (tests, management commands).
+    """
+    if not settings.LOGO_DERIVATIVES_ASYNC:
+        build_logo_derivatives(company)
+        return
+    _executor.submit(_build_in_background, company.pk)
+
+
+def derivative_url(request, name):
+    from django.urls import reverse
+
+    url = reverse("logo-derivative", kwargs={"name": name.rsplit("/", 1)[-1]})
+    return request.build_absolute_uri(url) if request is not None else url
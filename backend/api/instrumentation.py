@@ -0,0 +1,125 @@
+"""
+Per-request timing: SQL, serialization and rendering.
+
+RequestTimingMiddleware opens a RequestMetrics for sampled requests and
+stores it in a context variable. The pieces below add to it while it is set
+and cost a single ContextVar lookup when it is not:
+
+* query_timer is installed on every DB connection (see ApiConfig.ready) and
+  counts queries and their wall time;
+* TimedRepresentationMixin times the outermost to_representation() of a
+  serializer, minus any DB time spent in lazy queries inside it;
+* TimedJSONRenderer / TimedBrowsableAPIRenderer time DRF rendering.
+"""
+import time
+from contextvars import ContextVar
+
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = (
+        "started", "queries", "db_time", "serialize_time", "render_time", "statements", "_serialize_depth",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        # Set to a list to also capture each SQL statement with its duration.
+        self.statements = None
+        self._serialize_depth = 0
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def start_request_metrics():
+    """
+    Starts collecting for the current request, or joins the collection an
+    outer middleware already started (the returned token is then None).
+    """
+    metrics = _current.get()
+    if metrics is not None:
+        return metrics, None
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request_metrics(token):
+    if token is not None:
+        _current.reset(token)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def query_timer(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.queries += 1
+        metrics.db_time += elapsed
+        if metrics.statements is not None:
+            metrics.statements.append({
+                "sql": sql,
+                "params": None if many else repr(params),
+                "many": many,
+                "ms": round(elapsed * 1000, 3),
+            })
+
+
+def install_query_timer(sender, connection, **kwargs):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+class TimedRepresentationMixin:
+    """Serializer mixin recording serialization time on the current request."""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics._serialize_depth:
+            return super().to_representation(instance)
+
+        metrics._serialize_depth += 1
+        started = time.perf_counter()
+        db_before = metrics.db_time
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics._serialize_depth -= 1
+            metrics.serialize_time += (time.perf_counter() - started) - (metrics.db_time - db_before)
+
+
+class TimedRendererMixin:
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.render_time += time.perf_counter() - started
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
@@ -0,0 +1,107 @@
+"""
+Job lifecycle: expiring postings and archiving old ones.
+
+Public listings only read live jobs (Job.objects.live(), backed by a partial
+index on active rows), and jobs that have been expired or closed for
+JOB_ARCHIVE_AFTER_DAYS are moved to ArchivedJob, so the jobs table holds
+roughly the current postings however long the history grows. Run the
+expire_jobs command periodically (e.g. hourly from cron).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .counters import jobs_changed
+from .models import ArchivedJob, Job
+from .salaries import salary_histograms_changed
+from .transactions import write_transaction
+
+
+def expire_due_jobs(now=None, batch_size=None):
+    """Marks active jobs past their expiry date as expired. Returns the count."""
+    now = now or timezone.now()
+    batch_size = batch_size or settings.JOB_ARCHIVE_BATCH_SIZE
+    due = Job.objects.filter(status=Job.STATUS_ACTIVE, expires_at__lte=now)
+
+    def expire_batch(ids):
+        rows = list(
+            Job.objects.select_for_update()
+            .filter(id__in=ids, status=Job.STATUS_ACTIVE)
+            .values_list("id", "company_id", "skill_ids")
+        )
+        Job.objects.filter(id__in=[row[0] for row in rows]).update(status=Job.STATUS_EXPIRED)
+        jobs_changed([
+            ((Job.STATUS_ACTIVE, company_id, skill_ids), (Job.STATUS_EXPIRED, company_id, skill_ids))
+            for _, company_id, skill_ids in rows
+        ])
+        if rows:
+            salary_histograms_changed()
+        return len(rows)
+
+    expired = 0
+    while True:
+        ids = list(due.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return expired
+        expired += write_transaction(expire_batch, ids)
+
+
+def archive_jobs(now=None, batch_size=None):
+    """
+    Moves jobs expired or closed before the archive cutoff to ArchivedJob,
+    one batch per transaction. Returns the number archived.
+    """
+    from .serializers import JobSerializer
+
+    now = now or timezone.now()
+    batch_size = batch_size or settings.JOB_ARCHIVE_BATCH_SIZE
+    cutoff = now - timedelta(days=settings.JOB_ARCHIVE_AFTER_DAYS)
+    # Closed jobs have no meaningful expiry; their last update is when they closed.
+    old = (
+        Job.objects.filter(status=Job.STATUS_EXPIRED, expires_at__lte=cutoff)
+        | Job.objects.filter(status=Job.STATUS_CLOSED, updated_at__lte=cutoff)
+    )
+
+    def archive_batch(ids):
+        jobs = list(
+            Job.objects.filter(id__in=ids)
+            .select_related("company")
+            .prefetch_related("tech_tags", "company__industry")
+        )
+        ArchivedJob.objects.bulk_create([
+            ArchivedJob(
+                id=job.id,
+                company_id=job.company_id,
+                title=job.title,
+                status=job.status,
+                data=JobSerializer(job).data,
+                created_at=job.created_at,
+                expires_at=job.expires_at,
+            )
+            for job in jobs
+        ], ignore_conflicts=True)
+        Job.objects.filter(id__in=[job.id for job in jobs]).delete()
+        return len(jobs)
+
+    archived = 0
+    while True:
+        ids = list(old.order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return archived
+        archived += write_transaction(archive_batch, ids)
+
+
+def archived_jobs_data(ids):
+    """{id: API representation} of the archived jobs among ids."""
+    return {
+        pk: {**data, "status": status, "archived_at": archived_at}
+        for pk, data, status, archived_at in ArchivedJob.objects.filter(pk__in=ids).values_list(
+            "id", "data", "status", "archived_at"
+        )
+    }
+
+
+def archived_job_data(pk):
+    """The API representation of an archived job, or None."""
+    return archived_jobs_data([pk]).get(pk)
@@ -0,0 +1,223 @@
+"""
+Structured job locations.
+
+Job.location stays free text as entered. On save it is resolved against the
+offline gazetteer in api/data/gazetteer.csv ("Austin, TX", "Berlin",
+"Portland, Oregon", "Toronto, Canada") and the match is copied into the
+job's latitude, longitude, region, country, timezone and
+utc_offset_minutes columns. Remote or unrecognised locations leave them
+empty. A bare city name picks the most populous city of that name.
+
+JobFilter uses the columns for radius searches (a bounding box served by
+the latitude/longitude index, then the exact great-circle distance) and
+for timezone overlap: assuming a WORKDAY_HOURS day starting at the same
+local time everywhere, two places share
+WORKDAY_HOURS - |difference of UTC offsets| working hours. Offsets are
+standard time, so results don't shift twice a year.
+"""
+import csv
+import functools
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+GAZETTEER_PATH = Path(__file__).resolve().parent / "data" / "gazetteer.csv"
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+WORKDAY_HOURS = 8
+MINUTES_PER_DAY = 24 * 60
+
+# Job columns filled from the gazetteer
+FIELDS = ("latitude", "longitude", "region", "country", "timezone", "utc_offset_minutes")
+
+REMOTE_WORDS = {"remote", "anywhere", "worldwide", "global", "distributed"}
+
+COUNTRY_NAMES = {
+    "united states": "US", "usa": "US", "us": "US", "america": "US",
+    "canada": "CA", "mexico": "MX", "brazil": "BR", "argentina": "AR", "colombia": "CO",
+    "united kingdom": "GB", "uk": "GB", "great britain": "GB", "england": "GB", "scotland": "GB",
+    "ireland": "IE", "france": "FR", "germany": "DE", "deutschland": "DE", "netherlands": "NL",
+    "belgium": "BE", "switzerland": "CH", "austria": "AT", "denmark": "DK", "sweden": "SE",
+    "norway": "NO", "finland": "FI", "spain": "ES", "portugal": "PT", "italy": "IT",
+    "poland": "PL", "czechia": "CZ", "czech republic": "CZ", "estonia": "EE", "ukraine": "UA",
+    "israel": "IL", "united arab emirates": "AE", "uae": "AE", "south africa": "ZA",
+    "nigeria": "NG", "kenya": "KE", "india": "IN", "singapore": "SG", "hong kong": "HK",
+    "japan": "JP", "south korea": "KR", "korea": "KR", "china": "CN", "philippines": "PH",
+    "australia": "AU", "new zealand": "NZ",
+}
+
+OFFSET = re.compile(r"^(?:utc|gmt)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$")
+
+
+class Place(NamedTuple):
+    city: str
+    region: str
+    region_name: str
+    country: str
+    latitude: float
+    longitude: float
+    timezone: str
+    population: int
+
+
+def normalize(text):
+    """Lowercase ASCII with single spaces: "  São  Paulo" -> "sao paulo"."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().replace(".", " ").split())
+
+
+@functools.lru_cache(maxsize=None)
+def gazetteer(path=GAZETTEER_PATH):
+    """{normalized city name: [Place]}, most populous first."""
+    places = defaultdict(list)
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            place = Place(
+                city=row["city"],
+                region=row["region"],
+                region_name=row["region_name"],
+                country=row["country"],
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]),
+                timezone=row["timezone"],
+                population=int(row["population"]),
+            )
+            places[normalize(place.city)].append(place)
+    for candidates in places.values():
+        candidates.sort(key=lambda place: -place.population)
+    return dict(places)
+
+
+def country_code(value):
+    """ISO 3166 alpha-2 code of a code or country name, or None."""
+    key = normalize(value or "")
+    if key in COUNTRY_NAMES:
+        return COUNTRY_NAMES[key]
+    return key.upper() if len(key) == 2 and key.isalpha() else None
+
+
+def _qualifies(place, qualifier):
+    key = normalize(qualifier)
+    return key in (normalize(place.region), normalize(place.region_name)) or country_code(key) == place.country
+
+
+def resolve(text):
+    """The gazetteer Place for a free-text location, or None (remote, unknown)."""
+    if not text:
+        return None
+    text = re.sub(r"\(.*?\)", " ", text)  # "Berlin (hybrid)"
+    parts = [part for part in (normalize(part) for part in re.split(r"[,;/|]", text)) if part]
+    if not parts or parts[0] in REMOTE_WORDS:
+        return None
+    candidates = gazetteer().get(parts[0], [])
+    for qualifier in parts[1:]:
+        candidates = [place for place in candidates if _qualifies(place, qualifier)]
+    return candidates[0] if candidates else None
+
+
+@functools.lru_cache(maxsize=None)
+def standard_offset_minutes(tz_name):
+    """
+    UTC offset of an IANA timezone outside daylight saving time (the smaller
+    of its January and July offsets), or None if the name is unknown.
+    """
+    try:
+        zone = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    year = datetime.now().year
+    offsets = [datetime(year, month, 1, tzinfo=zone).utcoffset() for month in (1, 7)]
+    return int(min(offsets).total_seconds() // 60)
+
+
+def parse_offset(value):
+    """
+    UTC offset in minutes from an IANA name ("Europe/Berlin") or an offset
+    ("+01:00", "UTC-5", "-0330"); None if it's neither.
+    """
+    value = (value or "").strip()
+    match = OFFSET.match(value.lower())
+    if match:
+        sign, hours, minutes = match.groups()
+        total = int(hours) * 60 + int(minutes or 0)
+        if total > 14 * 60:
+            return None
+        return -total if sign == "-" else total
+    if "/" in value or value.upper() == "UTC":
+        return standard_offset_minutes(value)
+    return None
+
+
+def parse_point(value):
+    """(latitude, longitude) from "lat,lon" or a gazetteer location, or None."""
+    parts = (value or "").split(",")
+    if len(parts) == 2:
+        try:
+            lat, lon = float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        else:
+            if -90 <= lat <= 90 and -180 <= lon <= 180:
+                return lat, lon
+            return None
+    place = resolve(value)
+    return (place.latitude, place.longitude) if place else None
+
+
+def location_fields(text):
+    """Job column values for a free-text location."""
+    place = resolve(text)
+    if place is None:
+        return dict.fromkeys(FIELDS)
+    return {
+        "latitude": place.latitude,
+        "longitude": place.longitude,
+        "region": place.region,
+        "country": place.country,
+        "timezone": place.timezone,
+        "utc_offset_minutes": standard_offset_minutes(place.timezone),
+    }
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    (min_lat, max_lat, [(min_lon, max_lon)]) around a point; two longitude
+    ranges where the box crosses the antimeridian, none near the poles.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+    if min_lat <= -90 or max_lat >= 90:
+        return min_lat, max_lat, None
+    dlon = dlat / math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if dlon >= 180:
+        return min_lat, max_lat, None
+    west, east = lon - dlon, lon + dlon
+    if west < -180:
+        return min_lat, max_lat, [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return min_lat, max_lat, [(west, 180.0), (-180.0, east - 360)]
+    return min_lat, max_lat, [(west, east)]
+
+
+def offset_ranges(offset, min_overlap_hours):
+    """
+    [(low, high)] ranges of UTC offsets (minutes) sharing at least
+    min_overlap_hours of a WORKDAY_HOURS day with `offset`, wrapping around
+    the date line.
+    """
+    slack = (WORKDAY_HOURS - min_overlap_hours) * 60
+    if slack < 0:
+        return []
+    ranges = [(offset - slack, offset + slack)]
+    if offset + slack > MINUTES_PER_DAY / 2:
+        ranges.append((-MINUTES_PER_DAY, offset + slack - MINUTES_PER_DAY))
+    if offset - slack < -MINUTES_PER_DAY / 2:
+        ranges.append((offset - slack + MINUTES_PER_DAY, MINUTES_PER_DAY))
+    return ranges
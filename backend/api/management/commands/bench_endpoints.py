@@ -0,0 +1,164 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.models import Company, Job, Portfolio
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every read endpoint and filter combination against the current "
+        "database (see seed_synthetic) and save p50/p95 latency, queries per request "
+        "and rows per second as JSON. Pass --compare to flag regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--output", default="bench_results.json")
+        parser.add_argument("--compare", help="previous results file to compare against")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="relative p95 slowdown or query-count increase reported as a regression",
+        )
+        parser.add_argument("--only", help="run only cases whose name contains this string")
+
+    def cases(self):
+        job = Job.objects.order_by("?").values_list("id", flat=True).first()
+        company = Company.objects.order_by("?").values_list("id", flat=True).first()
+        portfolio = Portfolio.objects.order_by("?").values_list("id", flat=True).first()
+        if not (job and company and portfolio):
+            raise CommandError("No data to benchmark; run `manage.py seed_synthetic` first.")
+        middle_page = max(Job.objects.count() // 20, 1)
+
+        return [
+            ("jobs.list", "/api/jobs/"),
+            ("jobs.list.page_size_100", "/api/jobs/?page_size=100"),
+            ("jobs.list.deep_page", f"/api/jobs/?page={middle_page}"),
+            ("jobs.list.work_mode", "/api/jobs/?work_mode=REMOTE"),
+            ("jobs.list.job_type+remote_level", "/api/jobs/?job_type=FT&remote_level=FULL_REMOTE"),
+            ("jobs.list.async_level", "/api/jobs/?async_level=FULL_ASYNC"),
+            ("jobs.list.tech_tags", "/api/jobs/?tech_tags=python"),
+            ("jobs.list.tech_tags_multi", "/api/jobs/?tech_tags=python&tech_tags=react"),
+            ("jobs.list.tech_tags+work_mode", "/api/jobs/?tech_tags=python&work_mode=REMOTE"),
+            ("jobs.list.company", f"/api/jobs/?company={company}"),
+            ("jobs.list.search", "/api/jobs/?search=engineer"),
+            ("jobs.list.order_salary", "/api/jobs/?ordering=-min_salary"),
+            ("jobs.retrieve", f"/api/jobs/{job}/"),
+            ("jobs.async_list", "/api/read/jobs/"),
+            ("jobs.async_retrieve", f"/api/read/jobs/{job}/"),
+            ("companies.list", "/api/companies/"),
+            ("companies.list.industry", "/api/companies/?industry=tech"),
+            ("companies.list.search", "/api/companies/?search=company"),
+            ("companies.retrieve", f"/api/companies/{company}/"),
+            ("portfolios.list", "/api/portfolios/"),
+            ("portfolios.list.skills", "/api/portfolios/?skills=python"),
+            ("portfolios.list.years+available",
+             "/api/portfolios/?years_experience__gte=5&available_for_hire=true"),
+            ("portfolios.retrieve", f"/api/portfolios/{portfolio}/"),
+            ("projects.list", "/api/projects/"),
+            ("projects.nested", f"/api/portfolios/{portfolio}/projects/"),
+        ]
+
+    def measure(self, client, url, iterations, warmup):
+        for _ in range(warmup):
+            client.get(url)
+
+        latencies, queries, rows = [], [], 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+            queries.append(len(ctx.captured_queries))
+            data = response.json()
+            rows += len(data["results"]) if isinstance(data, dict) and "results" in data else 1
+
+        return {
+            "url": url,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "queries_per_request": max(queries),
+            "rows_per_s": round(rows / sum(latencies), 1),
+        }
+
+    def git_revision(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def handle(self, *args, **options):
+        # Every request comes from one client address; don't measure the limiter.
+        with override_settings(RATE_LIMIT_ENABLED=False):
+            self.run(options)
+
+    def run(self, options):
+        client = Client()
+        results = {}
+        for name, url in self.cases():
+            if options["only"] and options["only"] not in name:
+                continue
+            results[name] = r = self.measure(client, url, options["iterations"], options["warmup"])
+            self.stdout.write(
+                f"{name:<40} p50={r['p50_ms']:>8}ms p95={r['p95_ms']:>8}ms "
+                f"queries={r['queries_per_request']:>3} rows/s={r['rows_per_s']}"
+            )
+
+        report = {
+            "revision": self.git_revision(),
+            "database": connection.vendor,
+            "counts": {
+                "jobs": Job.objects.count(),
+                "companies": Company.objects.count(),
+                "portfolios": Portfolio.objects.count(),
+            },
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Saved results to {options['output']}"))
+
+        if options["compare"]:
+            self.compare(options["compare"], results, options["threshold"])
+
+    def compare(self, path, results, threshold):
+        with open(path) as f:
+            previous = json.load(f)["results"]
+
+        regressions = []
+        for name, current in results.items():
+            before = previous.get(name)
+            if before is None:
+                continue
+            if current["p95_ms"] > before["p95_ms"] * (1 + threshold):
+                regressions.append(f"{name}: p95 {before['p95_ms']}ms -> {current['p95_ms']}ms")
+            if current["queries_per_request"] > before["queries_per_request"]:
+                regressions.append(
+                    f"{name}: queries {before['queries_per_request']} -> {current['queries_per_request']}"
+                )
+
+        for line in regressions:
+            self.stdout.write(self.style.WARNING(line))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}"))
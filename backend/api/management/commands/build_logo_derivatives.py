@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from api.images import build_logo_derivatives, logo_derivatives_stale
+from api.models import Company
+
+
+class Command(BaseCommand):
+    help = "Generate missing or outdated company logo thumbnails and WebP variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Rebuild derivatives for every company, not only stale ones.",
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        for company in Company.objects.exclude(logo="").exclude(logo__isnull=True).iterator():
+            if options["all"] or logo_derivatives_stale(company):
+                build_logo_derivatives(company)
+                built += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Built logo derivatives for {built} companies."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.storage import resume_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove content-addressed files that no StoredBlob references, such as "
+        "uploads whose transaction rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age-hours",
+            type=float,
+            default=24,
+            help="only files not modified for this long",
+        )
+
+    def handle(self, *args, **options):
+        removed = resume_storage().remove_unreferenced(options["min_age_hours"] * 3600)
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unreferenced files."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.events import compact_event_logs
+
+
+class Command(BaseCommand):
+    help = "Load completed job view/apply event logs into the database and remove them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        loaded = compact_event_logs(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Loaded {loaded} events."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.lifecycle import archive_jobs, expire_due_jobs
+
+
+class Command(BaseCommand):
+    help = "Expire jobs past their expiry date and move long-expired or closed jobs to the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Only mark due jobs as expired.",
+        )
+
+    def handle(self, *args, **options):
+        expired = expire_due_jobs(batch_size=options["batch_size"])
+        self.stdout.write(f"Expired {expired} jobs.")
+        if not options["no_archive"]:
+            archived = archive_jobs(batch_size=options["batch_size"])
+            self.stdout.write(f"Archived {archived} jobs.")
+        self.stdout.write(self.style.SUCCESS("Done."))
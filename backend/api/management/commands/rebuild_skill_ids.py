@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Job, Portfolio
+from api.skills import rebuild_skill_ids
+
+
+class Command(BaseCommand):
+    help = "Recompute the canonical skill_ids of jobs and portfolios from their tags."
+
+    def handle(self, *args, **options):
+        for model in (Job, Portfolio):
+            updated = rebuild_skill_ids(model)
+            self.stdout.write(self.style.SUCCESS(f"Updated skill IDs of {updated} {model._meta.verbose_name_plural}."))
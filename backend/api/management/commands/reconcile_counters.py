@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized job and skill counters and repair any drift."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(f"Fixed {fixed} counters."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.analytics import roll_up_events
+
+
+class Command(BaseCommand):
+    help = "Fold new job view/apply events into the daily and per-skill analytics rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        processed = roll_up_events(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {processed} events."))
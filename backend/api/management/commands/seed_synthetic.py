@@ -0,0 +1,207 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from taggit.models import Tag, TaggedItem
+
+from api.counters import jobs_changed
+from api.models import Company, Job, Portfolio, Project, User
+from api.skills import rebuild_skill_ids
+
+# Common tags first: sampling uses a Zipf-like weight by rank, so a handful of
+# tags ("python", "javascript", ...) appear on most rows and the long tail of
+# generated tags on few, which is what real job boards look like.
+TECH_TAGS = [
+    "python", "javascript", "typescript", "react", "django", "aws", "sql",
+    "docker", "kubernetes", "go", "node", "postgresql", "vue", "rust", "java",
+    "terraform", "graphql", "redis", "kotlin", "swift", "ruby", "rails",
+    "elixir", "scala", "c++", "c#", "dotnet", "php", "laravel", "flutter",
+    "machine-learning", "data-science", "devops", "frontend", "backend",
+    "security", "accessibility", "testing", "ci-cd", "linux",
+]
+INDUSTRIES = [
+    "tech", "finance", "healthcare", "education", "remote-first", "e-commerce",
+    "nonprofit", "government", "media", "gaming", "logistics", "energy",
+]
+TITLES = [
+    "Software Engineer", "Backend Developer", "Frontend Developer",
+    "Full-Stack Engineer", "Data Engineer", "DevOps Engineer", "QA Engineer",
+    "Site Reliability Engineer", "Technical Writer", "Data Analyst",
+]
+LOREM = (
+    "We are a distributed team that values written communication, clear "
+    "expectations and focused work. You will ship features, review code and "
+    "document decisions asynchronously. "
+)
+
+
+class Command(BaseCommand):
+    help = "Bulk-create synthetic companies, jobs, tags, portfolios and projects for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", type=int, default=1000)
+        parser.add_argument("--jobs", type=int, default=10000)
+        parser.add_argument("--portfolios", type=int, default=2000)
+        parser.add_argument("--projects-per-portfolio", type=int, default=3)
+        parser.add_argument("--extra-tags", type=int, default=500, help="long-tail tags beyond the common ones")
+        parser.add_argument("--tags-per-job", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = f"syn{self.rng.randrange(16 ** 6):06x}"
+
+        tags = self.create_tags(options["extra_tags"])
+        self.tag_ids = [tag.id for tag in tags]
+        self.tag_weights = [1 / (rank + 1) for rank in range(len(tags))]
+
+        company_ids = self.create_companies(options["companies"])
+        self.create_jobs(options["jobs"], company_ids, options["tags_per_job"])
+        self.create_portfolios(options["portfolios"], options["projects_per_portfolio"])
+
+    # ---- helpers ----
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def sample_tags(self, k, pool=None, weights=None):
+        pool = pool or self.tag_ids
+        weights = weights or self.tag_weights
+        return set(self.rng.choices(pool, weights=weights, k=k))
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def tag_rows(self, model, object_ids, k, pool=None, weights=None):
+        content_type = ContentType.objects.get_for_model(model)
+        return [
+            TaggedItem(tag_id=tag_id, content_type=content_type, object_id=object_id)
+            for object_id in object_ids
+            for tag_id in self.sample_tags(self.rng.randint(1, k), pool, weights)
+        ]
+
+    # ---- generators ----
+
+    def create_tags(self, extra):
+        names = TECH_TAGS + INDUSTRIES + [f"skill-{i}" for i in range(extra)]
+        existing = set(Tag.objects.filter(name__in=names).values_list("name", flat=True))
+        Tag.objects.bulk_create(
+            [Tag(name=name, slug=name.replace("+", "p").replace("#", "sharp")) for name in names if name not in existing],
+            batch_size=self.batch_size,
+            ignore_conflicts=True,
+        )
+        by_name = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+        self.industry_ids = [by_name[name].id for name in INDUSTRIES]
+        return [by_name[name] for name in TECH_TAGS + names[len(TECH_TAGS) + len(INDUSTRIES):]]
+
+    def create_companies(self, total):
+        ids = []
+        for start, size in self.batches(total):
+            with transaction.atomic():
+                companies = Company.objects.bulk_create([
+                    Company(
+                        name=f"{self.prefix} Company {n}",
+                        slug=f"{self.prefix}-company-{n}",
+                        website=f"https://{self.prefix}-{n}.example.com",
+                        description=LOREM,
+                    )
+                    for n in range(start, start + size)
+                ])
+                batch_ids = [c.id for c in companies]
+                TaggedItem.objects.bulk_create(
+                    self.tag_rows(Company, batch_ids, 2, self.industry_ids, [1] * len(self.industry_ids))
+                )
+            ids.extend(batch_ids)
+        self.log(f"Created {len(ids)} companies.")
+        return ids
+
+    def make_job(self, company_ids):
+        rng = self.rng
+        work_mode = rng.choices(["REMOTE", "HYBRID", "ONSITE"], weights=[6, 3, 1])[0]
+        min_salary = Decimal(rng.randrange(40, 200) * 1000)
+        job = Job(
+            title=rng.choice(TITLES),
+            company_id=rng.choice(company_ids),
+            apply_url="https://example.com/apply",
+            remote_level=rng.choice(Job.REMOTE_POLICY_CHOICES)[0],
+            async_level=rng.choice(Job.ASYNC_LEVEL_CHOICES)[0],
+            location=rng.choice(["Atlanta, GA", "Remote", "Berlin", "Toronto", "Austin, TX", None]),
+            job_type=rng.choices(["FT", "PT", "CT", "IN", "TP"], weights=[10, 2, 4, 1, 1])[0],
+            work_mode=work_mode,
+            description=LOREM * rng.randint(2, 8),
+            responsibilities=LOREM,
+            requirements=LOREM,
+            min_salary=min_salary,
+            max_salary=min_salary + Decimal(rng.randrange(0, 80) * 1000),
+            benefits=LOREM,
+            interview_process=LOREM,
+            is_remote_friendly=work_mode != "ONSITE" and rng.random() < 0.7,
+        )
+        job.fill_location()
+        return job
+
+    def create_jobs(self, total, company_ids, tags_per_job):
+        created = 0
+        for _, size in self.batches(total):
+            with transaction.atomic():
+                jobs = Job.objects.bulk_create([self.make_job(company_ids) for _ in range(size)])
+                job_ids = [j.id for j in jobs]
+                # bulk_create() sends no signals: count the new jobs into
+                # Company.open_jobs_count here (rebuild_skill_ids below
+                # updates the skill counters).
+                jobs_changed([(None, (job.status, job.company_id, [])) for job in jobs])
+                TaggedItem.objects.bulk_create(
+                    self.tag_rows(Job, job_ids, tags_per_job),
+                    batch_size=self.batch_size,
+                )
+                rebuild_skill_ids(Job, job_ids, self.batch_size)
+            created += size
+            self.log(f"Created {created}/{total} jobs.")
+
+    def create_portfolios(self, total, projects_per_portfolio):
+        password = make_password(None)
+        for start, size in self.batches(total):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(username=f"{self.prefix}-seeker-{n}", password=password, role="JOB_SEEKER")
+                    for n in range(start, start + size)
+                ])
+                portfolios = Portfolio.objects.bulk_create([
+                    Portfolio(
+                        user=user,
+                        bio=LOREM,
+                        years_experience=self.rng.randint(0, 25),
+                        available_for_hire=self.rng.random() < 0.8,
+                        open_to_remote=self.rng.random() < 0.9,
+                        open_to_contract=self.rng.random() < 0.4,
+                    )
+                    for user in users
+                ])
+                portfolio_ids = [p.id for p in portfolios]
+                TaggedItem.objects.bulk_create(
+                    self.tag_rows(Portfolio, portfolio_ids, 8),
+                    batch_size=self.batch_size,
+                )
+                rebuild_skill_ids(Portfolio, portfolio_ids, self.batch_size)
+                projects = Project.objects.bulk_create([
+                    Project(
+                        portfolio=portfolio,
+                        title=f"Project {i}",
+                        description=LOREM,
+                        github_url="https://github.com/example/project",
+                        is_featured=i == 0,
+                    )
+                    for portfolio in portfolios
+                    for i in range(self.rng.randint(0, projects_per_portfolio))
+                ])
+                TaggedItem.objects.bulk_create(
+                    self.tag_rows(Project, [p.id for p in projects], 4),
+                    batch_size=self.batch_size,
+                )
+            self.log(f"Created {start + size}/{total} portfolios.")
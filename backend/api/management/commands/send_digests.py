@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.digests import send_alert_digests
+
+
+class Command(BaseCommand):
+    help = "Email every user with pending job alerts one digest of the new matching jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="users per SMTP connection")
+
+    def handle(self, *args, **options):
+        sent, failed = send_alert_digests(batch_size=options["batch_size"])
+        self.stdout.write(f"Sent {sent} digests, {failed} failed.")
+        self.stdout.write(self.style.SUCCESS("Done."))
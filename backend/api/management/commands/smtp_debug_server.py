@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.smtp_debug import DebugSMTPServer
+
+
+class Command(BaseCommand):
+    help = "Run a local SMTP server that prints every message it receives instead of delivering it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+
+    def handle(self, *args, **options):
+        def show(message):
+            sender, recipients, email = message
+            self.stdout.write(f"---------- From {sender} to {', '.join(recipients)}")
+            self.stdout.write(email.as_string())
+
+        server = DebugSMTPServer((options["host"], options["port"]), on_message=show)
+        self.stdout.write(self.style.SUCCESS(f"SMTP debug server listening on {options['host']}:{server.port}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,206 @@
+"""
+Process-shared request metrics in Prometheus text format.
+
+Every Gunicorn worker maps the same file (METRICS_MMAP_PATH) and updates
+fixed-size slots in place under an fcntl lock, so the scrape endpoint of any
+worker sees the totals of all of them without a metrics server.
+
+File layout: a 16-byte header (magic, used slot count, capacity) followed by
+`capacity` slots of KEY_BYTES of UTF-8 key plus SLOT_VALUES doubles. Keys
+look like "h|jobs-list" (latency histogram: one count per bucket, +Inf, sum,
+count), "s|jobs-list|GET|200" (request counter) and "q|jobs-list" (query sum).
+"""
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ASKMET01"
+HEADER = struct.Struct("<8sII")
+KEY_BYTES = 96
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+SLOT_VALUES = len(LATENCY_BUCKETS) + 3  # buckets, +Inf, sum, count
+SLOT_SIZE = KEY_BYTES + 8 * SLOT_VALUES
+DOUBLE = struct.Struct("<d")
+
+
+class SharedMetricsFile:
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self.pid = os.getpid()
+        self.index = {}
+        self.scanned = 0
+        self.full_warned = False
+        self.thread_lock = threading.Lock()
+
+        size = HEADER.size + capacity * SLOT_SIZE
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+            self.map = mmap.mmap(self.fd, size)
+            magic, _, stored_capacity = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC:
+                HEADER.pack_into(self.map, 0, MAGIC, 0, capacity)
+            else:
+                self.capacity = min(stored_capacity, capacity)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    def _used(self):
+        return HEADER.unpack_from(self.map, 0)[1]
+
+    def _scan(self):
+        used = self._used()
+        for slot in range(self.scanned, used):
+            offset = HEADER.size + slot * SLOT_SIZE
+            key = self.map[offset:offset + KEY_BYTES].rstrip(b"\0").decode()
+            self.index[key] = offset + KEY_BYTES
+        self.scanned = used
+
+    def _slot(self, key):
+        """Value offset for key, allocating a slot if needed. Caller holds the lock."""
+        offset = self.index.get(key)
+        if offset is not None:
+            return offset
+        self._scan()
+        offset = self.index.get(key)
+        if offset is not None:
+            return offset
+
+        used = self._used()
+        if used >= self.capacity:
+            if not self.full_warned:
+                logger.warning("Metrics file %s is full; dropping new series.", self.path)
+                self.full_warned = True
+            return None
+
+        start = HEADER.size + used * SLOT_SIZE
+        encoded = key.encode()[:KEY_BYTES]
+        self.map[start:start + KEY_BYTES] = encoded.ljust(KEY_BYTES, b"\0")
+        HEADER.pack_into(self.map, 0, MAGIC, used + 1, self.capacity)
+        self.index[key] = start + KEY_BYTES
+        self.scanned = used + 1
+        return start + KEY_BYTES
+
+    def add(self, updates):
+        """Applies [(key, value_index, amount), ...] atomically across processes."""
+        with self.thread_lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX)
+            try:
+                for key, index, amount in updates:
+                    offset = self._slot(key)
+                    if offset is None:
+                        continue
+                    position = offset + index * 8
+                    DOUBLE.pack_into(self.map, position, DOUBLE.unpack_from(self.map, position)[0] + amount)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+    def read_all(self):
+        with self.thread_lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_SH)
+            try:
+                self._scan()
+                return {
+                    key: struct.unpack_from(f"<{SLOT_VALUES}d", self.map, offset)
+                    for key, offset in self.index.items()
+                }
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+
+_file = None
+_file_lock = threading.Lock()
+
+
+def get_metrics_file():
+    """The metrics file for this process (re-opened after fork or a path change)."""
+    global _file
+    current = _file
+    path = str(settings.METRICS_MMAP_PATH)
+    if current is not None and current.pid == os.getpid() and current.path == path:
+        return current
+
+    with _file_lock:
+        if _file is None or _file.pid != os.getpid() or _file.path != path:
+            _file = SharedMetricsFile(path, settings.METRICS_MAX_SERIES)
+        return _file
+
+
+# Request methods recorded as themselves; any other (client-chosen) verb is
+# recorded as "other", so it can't use up METRICS_MAX_SERIES.
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def observe_request(route, method, status, duration, queries):
+    method = method if method in HTTP_METHODS else "other"
+    bucket = next((i for i, le in enumerate(LATENCY_BUCKETS) if duration <= le), len(LATENCY_BUCKETS))
+    histogram = f"h|{route}"
+    get_metrics_file().add([
+        (histogram, bucket, 1),
+        (histogram, SLOT_VALUES - 2, duration),
+        (histogram, SLOT_VALUES - 1, 1),
+        (f"s|{route}|{method}|{status}", 0, 1),
+        (f"q|{route}", 0, queries),
+    ])
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _number(value):
+    return repr(int(value)) if value == int(value) else repr(value)
+
+
+def render_prometheus():
+    series = sorted(get_metrics_file().read_all().items())
+    lines = [
+        "# HELP api_request_duration_seconds Request latency by route name.",
+        "# TYPE api_request_duration_seconds histogram",
+    ]
+    for key, values in series:
+        kind, _, rest = key.partition("|")
+        if kind != "h":
+            continue
+        cumulative = 0
+        for le, count in zip(LATENCY_BUCKETS + ("+Inf",), values[:len(LATENCY_BUCKETS) + 1]):
+            cumulative += count
+            lines.append(f"api_request_duration_seconds_bucket{{{_labels(route=rest, le=le)}}} {_number(cumulative)}")
+        lines.append(f"api_request_duration_seconds_sum{{{_labels(route=rest)}}} {_number(values[-2])}")
+        lines.append(f"api_request_duration_seconds_count{{{_labels(route=rest)}}} {_number(values[-1])}")
+
+    lines += [
+        "# HELP api_requests_total Requests by route name, method and status code.",
+        "# TYPE api_requests_total counter",
+    ]
+    for key, values in series:
+        kind, _, rest = key.partition("|")
+        if kind == "s":
+            route, method, status = rest.rsplit("|", 2)
+            lines.append(f"api_requests_total{{{_labels(route=route, method=method, status=status)}}} {_number(values[0])}")
+
+    lines += [
+        "# HELP api_request_queries_total Database queries issued by route name.",
+        "# TYPE api_request_queries_total counter",
+    ]
+    for key, values in series:
+        kind, _, rest = key.partition("|")
+        if kind == "q":
+            lines.append(f"api_request_queries_total{{{_labels(route=rest)}}} {_number(values[0])}")
+
+    return "\n".join(lines) + "\n"
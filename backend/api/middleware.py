@@ -0,0 +1,340 @@
+import hashlib
+import json
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+from .authentication import token_user_id
+from .db_routers import reset_replica_routing, use_replica_for_reads
+from .instrumentation import finish_request_metrics, start_request_metrics
+from .metrics import observe_request
+from .permissions import is_staff_user
+from .profiling import PROFILE_MODES, make_profiler
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("api.timing")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes ORM reads of safe-method requests to the read replicas.
+
+    After a client performs a write, its requests stick to the primary for
+    DATABASE_REPLICA_STICKY_SECONDS so it always reads its own writes even
+    when the replicas lag. Clients are identified by the user ID of their
+    access token, so the pin survives a token refresh, or by IP when
+    anonymous; the pin lives in the default cache, which settings.CACHES
+    shares between workers (file-based, or Redis with REDIS_URL).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def pin_key(self, request):
+        user_id = token_user_id(request)
+        if user_id is not None:
+            identity = f"user:{user_id}"
+        else:
+            identity = "ip:" + request.META.get("REMOTE_ADDR", "")
+        return "db-primary-pin:" + hashlib.sha1(identity.encode()).hexdigest()
+
+    def should_pin(self, request, response):
+        return request.method not in SAFE_METHODS and response.status_code < 400
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = self.pin_key(request)
+        replica_ok = request.method in SAFE_METHODS and not cache.get(key)
+        token = use_replica_for_reads(replica_ok)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica_routing(token)
+
+        if self.should_pin(request, response):
+            cache.set(key, True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = self.pin_key(request)
+        replica_ok = request.method in SAFE_METHODS and not await cache.aget(key)
+        token = use_replica_for_reads(replica_ok)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_replica_routing(token)
+
+        if self.should_pin(request, response):
+            await cache.aset(key, True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+        return response
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Reports the client's rate limit (set by the throttles in api.throttling)
+    as RateLimit-* response headers.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def add_headers(self, request, response):
+        limit = getattr(request, "rate_limit", None)
+        if limit is not None:
+            response["RateLimit-Limit"] = str(limit["limit"])
+            response["RateLimit-Remaining"] = str(limit["remaining"])
+            response["RateLimit-Reset"] = str(limit["reset"])
+            response["RateLimit-Policy"] = limit["policy"]
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+
+class RequestTimingMiddleware:
+    """
+    Measures SQL (query count and time), serialization and rendering for a
+    sample of requests (REQUEST_TIMING_SAMPLE_RATE) and reports them as a
+    Server-Timing header plus one JSON log line on the "api.timing" logger.
+
+    Requests whose query count exceeds the budget for their route name
+    (REQUEST_QUERY_BUDGETS, falling back to REQUEST_QUERY_BUDGET_DEFAULT)
+    are logged at WARNING level with "over_budget": true.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = settings.REQUEST_TIMING_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics, token = start_request_metrics()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics, token = start_request_metrics()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+        self.report(request, response, metrics)
+        return response
+
+    def report(self, request, response, metrics):
+        total = metrics.total_time
+        match = getattr(request, "resolver_match", None)
+        route = match.url_name if match else None
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+            f"serialize;dur={metrics.serialize_time * 1000:.2f}",
+            f"render;dur={metrics.render_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+        budget = settings.REQUEST_QUERY_BUDGETS.get(route, settings.REQUEST_QUERY_BUDGET_DEFAULT)
+        over_budget = budget is not None and metrics.queries > budget
+
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_time * 1000, 2),
+            "serialize_ms": round(metrics.serialize_time * 1000, 2),
+            "render_ms": round(metrics.render_time * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "query_budget": budget,
+            "over_budget": over_budget,
+        }
+        timing_logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(line))
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status code and query count of every request by route
+    name into the process-shared metrics file (see api.metrics).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics, token = start_request_metrics()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+        self.record(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics, token = start_request_metrics()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request_metrics(token)
+        self.record(request, response, metrics)
+        return response
+
+    def record(self, request, response, metrics):
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "unmatched"
+        try:
+            observe_request(route, request.method, response.status_code, metrics.total_time, metrics.queries)
+        except OSError:
+            logger.exception("Could not record request metrics.")
+
+
+class RequestProfilingMiddleware:
+    """
+    Profiles a single request when a staff user asks for it with an
+    `X-Profile: sample|cprofile` header or a `?_profile=sample|cprofile`
+    query parameter (any other value means "sample").
+
+    The profile, together with every SQL statement and its duration, is
+    stored as a RequestProfile; the response carries X-Profile-Id and
+    X-Profile-Url pointing at the download. Requests from anyone else are
+    served normally and never pay the profiling cost. Sampling follows the
+    request thread, so async views are served unprofiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def requested_mode(self, request):
+        value = request.META.get("HTTP_X_PROFILE") or request.GET.get("_profile")
+        if not value or not settings.REQUEST_PROFILING_ENABLED:
+            return None
+        return value if value in PROFILE_MODES else "sample"
+
+    def staff_user(self, request):
+        user = getattr(request, "user", None)
+        if is_staff_user(user):
+            return user
+
+        # API clients authenticate with JWT inside DRF; check the token here
+        # so only staff requests are ever profiled.
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+        from .authentication import ClaimsJWTAuthentication
+
+        try:
+            result = ClaimsJWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, InvalidToken, TokenError):
+            return None
+        return result[0] if result and is_staff_user(result[0]) else None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        mode = self.requested_mode(request)
+        user = self.staff_user(request) if mode else None
+        if user is None:
+            return self.get_response(request)
+
+        profiler, extension = make_profiler(mode, settings.REQUEST_PROFILING_INTERVAL)
+        metrics, token = start_request_metrics()
+        metrics.statements = []
+        started = metrics.total_time
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.stop()
+            statements, metrics.statements = metrics.statements, None
+            finish_request_metrics(token)
+
+        duration = metrics.total_time - started
+        self.store(request, response, user, mode, profiler.output(), extension, statements, duration)
+        return response
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def store(self, request, response, user, mode, data, extension, statements, duration):
+        from django.core.files.base import ContentFile
+        from django.urls import reverse
+
+        from .models import RequestProfile
+
+        match = getattr(request, "resolver_match", None)
+        profile = RequestProfile(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            route=match.view_name if match else "",
+            status_code=response.status_code,
+            duration_ms=round(duration * 1000, 2),
+            query_count=len(statements),
+            db_ms=round(sum(s["ms"] for s in statements), 2),
+            mode=mode,
+            sql=statements[:settings.REQUEST_PROFILING_MAX_STATEMENTS],
+        )
+        profile.profile_file.save(f"{profile.id}.{extension}", ContentFile(data), save=False)
+        profile.save()
+
+        response["X-Profile-Id"] = str(profile.id)
+        response["X-Profile-Url"] = request.build_absolute_uri(
+            reverse("profiles-download", kwargs={"pk": profile.id})
+        )
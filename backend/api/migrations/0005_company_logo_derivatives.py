@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_add_portfolio_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='logo_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 6.0 on 2026-10-19 19:05
+
+import re
+from collections import defaultdict
+
+import api.fields
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+from api.skills import DEFAULT_TAXONOMY
+
+
+def normalize(name):
+    return re.sub(r"\s+", " ", name).strip().lower()
+
+
+def load_taxonomy(apps, schema_editor):
+    SkillCategory = apps.get_model("api", "SkillCategory")
+    Skill = apps.get_model("api", "Skill")
+    SkillSynonym = apps.get_model("api", "SkillSynonym")
+
+    categories = {}
+    for name, (parent, skills) in DEFAULT_TAXONOMY.items():
+        categories[name] = SkillCategory.objects.create(
+            name=name, slug=slugify(name), parent=categories.get(parent)
+        )
+        for skill_name, synonyms in skills.items():
+            skill = Skill.objects.create(name=skill_name, category=categories[name])
+            SkillSynonym.objects.bulk_create(
+                SkillSynonym(name=key, skill=skill) for key in {normalize(skill_name), *map(normalize, synonyms)}
+            )
+
+
+def backfill_skill_ids(apps, schema_editor):
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    Skill = apps.get_model("api", "Skill")
+    SkillSynonym = apps.get_model("api", "SkillSynonym")
+    known = dict(SkillSynonym.objects.values_list("name", "skill_id"))
+
+    for model_name in ("job", "portfolio"):
+        model = apps.get_model("api", model_name)
+        content_type = ContentType.objects.filter(app_label="api", model=model_name).first()
+        if content_type is None:
+            continue
+
+        skill_ids = defaultdict(set)
+        for object_id, tag_name in TaggedItem.objects.filter(content_type=content_type).values_list(
+            "object_id", "tag__name"
+        ):
+            key = normalize(tag_name)
+            if key not in known:
+                skill, _ = Skill.objects.get_or_create(name=tag_name.strip())
+                SkillSynonym.objects.create(name=key, skill=skill)
+                known[key] = skill.id
+            skill_ids[object_id].add(known[key])
+
+        objects = [model(pk=pk, skill_ids=sorted(ids)) for pk, ids in skill_ids.items()]
+        model.objects.bulk_update(objects, ["skill_ids"], batch_size=1000)
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for table in ("api_job", "api_portfolio"):
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_skill_ids_gin ON {table} USING gin (skill_ids jsonb_path_ops)"
+            )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for table in ("api_job", "api_portfolio"):
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_skill_ids_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_user_token_version'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='skill_ids',
+            field=api.fields.SkillIdsField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='skill_ids',
+            field=api.fields.SkillIdsField(blank=True, default=list, editable=False),
+        ),
+        migrations.CreateModel(
+            name='SkillCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='api.skillcategory')),
+            ],
+            options={
+                'verbose_name_plural': 'skill categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='skills', to='api.skillcategory')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SkillSynonym',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='synonyms', to='api.skill')),
+            ],
+        ),
+        migrations.RunPython(load_taxonomy, migrations.RunPython.noop),
+        migrations.RunPython(backfill_skill_ids, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_skill_taxonomy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='usage_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-19 21:05
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def count_open_jobs_and_skill_usage(apps, schema_editor):
+    Company = apps.get_model("api", "Company")
+    Job = apps.get_model("api", "Job")
+    Portfolio = apps.get_model("api", "Portfolio")
+    Skill = apps.get_model("api", "Skill")
+
+    active = Job.objects.filter(status="ACTIVE")
+    open_jobs = Counter(active.values_list("company_id", flat=True).iterator())
+    Company.objects.bulk_update(
+        [Company(id=company_id, open_jobs_count=count) for company_id, count in open_jobs.items()],
+        ["open_jobs_count"],
+        batch_size=1000,
+    )
+
+    job_counts = Counter()
+    for skill_ids in active.values_list("skill_ids", flat=True).iterator():
+        job_counts.update(skill_ids)
+    portfolio_counts = Counter()
+    for skill_ids in Portfolio.objects.values_list("skill_ids", flat=True).iterator():
+        portfolio_counts.update(skill_ids)
+    Skill.objects.bulk_update(
+        [
+            Skill(id=skill_id, job_count=job_counts[skill_id], portfolio_count=portfolio_counts[skill_id])
+            for skill_id in set(job_counts) | set(portfolio_counts)
+        ],
+        ["job_count", "portfolio_count"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_job_lifecycle'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='skill',
+            old_name='usage_count',
+            new_name='job_count',
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='portfolio_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='open_jobs_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_open_jobs_and_skill_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-19 21:40
+
+import api.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('query', models.JSONField(default=dict, help_text='JobFilter parameters')),
+                ('is_active', models.BooleanField(default=True)),
+                ('skill_ids', api.fields.SkillIdsField(blank=True, default=list, editable=False)),
+                ('skill_match', models.CharField(choices=[('any', 'Any'), ('all', 'All')], default='any', editable=False, max_length=3)),
+                ('work_mode', models.CharField(blank=True, choices=[('REMOTE', 'Remote'), ('ONSITE', 'On-Site'), ('HYBRID', 'Hybrid')], editable=False, max_length=10, null=True)),
+                ('job_type', models.CharField(blank=True, choices=[('FT', 'Full-Time'), ('PT', 'Part-Time'), ('CT', 'Contract'), ('IN', 'Internship'), ('TP', 'Temporary')], editable=False, max_length=2, null=True)),
+                ('remote_level', models.CharField(blank=True, choices=[('FULL_REMOTE', 'Fully Remote'), ('HYBRID_OPTIONAL', 'Hybrid Optional'), ('HYBRID_REQUIRED', 'Hybrid Required'), ('ONSITE', 'On-site Required')], editable=False, max_length=20, null=True)),
+                ('async_level', models.CharField(blank=True, choices=[('FULL_ASYNC', 'Fully Asynchronous'), ('MOSTLY_ASYNC', 'Mostly Asynchronous'), ('SOME_SYNC', 'Some Synchronous Work'), ('TRADITIONAL', 'Traditional Schedule')], editable=False, max_length=20, null=True)),
+                ('is_remote_friendly', models.BooleanField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.company')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saved_searches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='api.job')),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='api.savedsearch')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_alerts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='job_alert_user_idx')],
+                'constraints': [models.UniqueConstraint(fields=('saved_search', 'job'), name='job_alert_unique_match')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-19 22:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_saved_searches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadedEventLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('loaded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('view', 'View'), ('apply', 'Apply click')], max_length=5)),
+                ('visitor', models.CharField(blank=True, help_text='Salted per-day hash of IP and user agent', max_length=16)),
+                ('occurred_at', models.DateTimeField()),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job_events', to='api.company')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['job_id', 'occurred_at'], name='job_event_job_idx'),
+                    models.Index(fields=['company', 'occurred_at'], name='job_event_company_idx'),
+                ],
+            },
+        ),
+    ]
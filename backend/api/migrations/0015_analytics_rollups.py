@@ -0,0 +1,56 @@
+# Generated by Django 6.0 on 2026-10-19 22:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_job_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobevent',
+            name='user_id',
+            field=models.BigIntegerField(blank=True, help_text='Signed-in visitor, if any', null=True),
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_event_id', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('apply_clicks', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job_daily_stats', to='api.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'day'], name='job_daily_stats_company_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job_id', 'day'), name='job_daily_stats_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='JobSkillStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.BigIntegerField()),
+                ('applicants', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job_skill_stats', to='api.company')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.skill')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company'], name='job_skill_stats_company_idx')],
+                'constraints': [models.UniqueConstraint(fields=('job_id', 'skill'), name='job_skill_stats_unique')],
+            },
+        ),
+    ]
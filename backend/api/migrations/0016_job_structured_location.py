@@ -0,0 +1,65 @@
+# Generated by Django 6.0 on 2026-10-19 23:10
+
+from django.db import migrations, models
+
+from api.locations import FIELDS, location_fields
+
+
+def resolve_job_locations(apps, schema_editor):
+    Job = apps.get_model("api", "Job")
+
+    jobs = []
+    for job in Job.objects.exclude(location__isnull=True).exclude(location="").only("id", "location").iterator():
+        for field, value in location_fields(job.location).items():
+            setattr(job, field, value)
+        jobs.append(job)
+    Job.objects.bulk_update(jobs, list(FIELDS), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='region',
+            field=models.CharField(blank=True, editable=False, max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='country',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=2, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='timezone',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='utc_offset_minutes',
+            field=models.SmallIntegerField(blank=True, db_index=True, editable=False, help_text='Standard-time UTC offset of `timezone`', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['latitude', 'longitude'], name='job_lat_lon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['region', 'country'], name='job_region_idx'),
+        ),
+        migrations.RunPython(resolve_job_locations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-19 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_job_structured_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['min_salary', 'max_salary'], name='job_live_salary_idx'),
+        ),
+    ]
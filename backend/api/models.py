@@ -1,11 +1,21 @@
+import uuid
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 from taggit.managers import TaggableManager
 from urllib.parse import urlparse
 
+from .fields import SkillIdsField
+from .locations import location_fields
+from .storage import resume_storage
+
 def validate_https_url(value):
     parsed = urlparse(value)
     if parsed.scheme not in ["http", "https"]:
@@ -51,7 +61,7 @@ class User(AbstractUser):
     github_access_token = models.CharField(max_length=255, blank=True, null=True)  # Encrypted in production
     portfolio_website = models.URLField(blank=True, null=True)
     linkedin_profile = models.URLField(blank=True, null=True)
-    resume_file = models.FileField(upload_to='resumes/', blank=True, null=True)
+    resume_file = models.FileField(upload_to='resumes/', storage=resume_storage, blank=True, null=True)
 
     # Skills and preferences for job seekers
     preferred_work_mode = models.CharField(
@@ -62,9 +72,25 @@ class User(AbstractUser):
         null=True,
     )
 
+    # Bumped whenever a claim carried in this user's JWTs changes (role,
+    # company, entitlements); older tokens are then rejected.
+    token_version = models.PositiveIntegerField(default=1, editable=False)
+
     def __str__(self):
         return self.username
 
+    @cached_property
+    def company_account(self):
+        """
+        The company this account posts jobs for (the first one it owns).
+        """
+        return self.companies.order_by("created_at", "id").first()
+
+    @cached_property
+    def company_account_id(self):
+        company = self.company_account
+        return company.id if company else None
+
     # ---- dj-stripe integration helpers ----
 
     @property
@@ -81,7 +107,12 @@ class User(AbstractUser):
         """
         Checks if this user has an active unlimited job posting subscription.
         dj-stripe updates subscription statuses automatically via webhook.
+        Users authenticated from JWT claims answer from the token instead.
         """
+        claim = self.__dict__.get("subscription_claim")
+        if claim is not None:
+            return claim
+
         from djstripe.models import Customer
         try:
             customer = Customer.objects.get(subscriber=self)
@@ -92,6 +123,59 @@ class User(AbstractUser):
         return bool(sub)
 
 
+class SkillCategory(models.Model):
+    """
+    Node in the skill category tree, e.g. Engineering > Web > Frontend.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True)
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        related_name="children",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name_plural = "skill categories"
+
+    def __str__(self):
+        return self.name
+
+
+class Skill(models.Model):
+    """
+    Canonical skill. Tag names are resolved to skills through SkillSynonym
+    (see api.skills), so "JS", "javascript" and "JavaScript" are one skill.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    category = models.ForeignKey(
+        SkillCategory,
+        on_delete=models.SET_NULL,
+        related_name="skills",
+        null=True,
+        blank=True,
+    )
+    # Active jobs / portfolios with this skill (maintained by api.counters)
+    job_count = models.PositiveIntegerField(default=0, editable=False)
+    portfolio_count = models.PositiveIntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return self.name
+
+
+class SkillSynonym(models.Model):
+    """
+    Normalized spelling of a skill; every skill has one for its own name.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="synonyms")
+
+    def __str__(self):
+        return f"{self.name} -> {self.skill}"
+
+
 class Portfolio(models.Model):
     """
     Portfolio model for job seekers to showcase their skills and projects.
@@ -107,6 +191,8 @@ class Portfolio(models.Model):
 
     # Skills - using django-taggit for flexible tagging
     skills = TaggableManager(blank=True, help_text="Technical skills, frameworks, tools")
+    # Canonical Skill IDs of `skills`, kept in sync by api.signals
+    skill_ids = SkillIdsField()
 
     # Featured projects
     featured_project_1 = models.JSONField(blank=True, null=True, help_text="Featured project data")
@@ -173,6 +259,52 @@ class StripeEvent(models.Model):
     def __str__(self):
         return self.event_id
 
+class StoredBlob(models.Model):
+    """
+    Reference count for a file kept by ContentAddressedStorage.
+    Identical uploads share one file; it is deleted with its last reference.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+class RequestProfile(models.Model):
+    """
+    A profile of one request, captured on demand by a staff user
+    (see api.middleware.RequestProfilingMiddleware).
+    """
+    MODE_CHOICES = [
+        ("sample", "Sampling (folded stacks)"),
+        ("cprofile", "cProfile (pstats)"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="request_profiles",
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    route = models.CharField(max_length=255, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(default=0)
+    db_ms = models.FloatField(default=0)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default="sample")
+    profile_file = models.FileField(upload_to="profiles/")
+    sql = models.JSONField(default=list, help_text="Statements with their durations in ms")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
 class Company(models.Model):
 
     owner = models.ForeignKey(
@@ -199,9 +331,16 @@ class Company(models.Model):
         validators=[validate_logo_file_size, validate_logo_extension],
     )
 
+    # Thumbnail/WebP variants of `logo`, filled in by api.images after upload:
+    # {"source": <logo name>, "sizes": {"64": {"png": <name>, "webp": <name>}}}
+    logo_derivatives = models.JSONField(blank=True, default=dict, editable=False)
+
     # Example tags: "tech", "finance", "remote-first", etc.
     industry = TaggableManager(blank=True)
 
+    # ACTIVE jobs of this company (maintained by api.counters)
+    open_jobs_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
@@ -212,7 +351,29 @@ class Company(models.Model):
     def __str__(self):
         return self.name
 
+def default_job_expiry():
+    return timezone.now() + timedelta(days=settings.JOB_DEFAULT_TTL_DAYS)
+
+
+class JobQuerySet(models.QuerySet):
+
+    def live(self):
+        """Jobs shown in public listings: active and not past their expiry."""
+        return self.filter(status=Job.STATUS_ACTIVE).filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+        )
+
+
 class Job(models.Model):
+    STATUS_ACTIVE = "ACTIVE"
+    STATUS_EXPIRED = "EXPIRED"
+    STATUS_CLOSED = "CLOSED"
+    STATUS_CHOICES = [
+        (STATUS_ACTIVE, "Active"),
+        (STATUS_EXPIRED, "Expired"),
+        (STATUS_CLOSED, "Closed"),
+    ]
+
     JOB_TYPE_CHOICES = [
         ("FT", "Full-Time"),
         ("PT", "Part-Time"),
@@ -279,6 +440,20 @@ class Job(models.Model):
         db_index=True,
         help_text="Additional location details (building, floor, etc.)",
     )
+    # Resolved from `location` by api.locations on save; empty for remote
+    # or unrecognised locations.
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    region = models.CharField(max_length=10, null=True, blank=True, editable=False)
+    country = models.CharField(max_length=2, null=True, blank=True, db_index=True, editable=False)
+    timezone = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    utc_offset_minutes = models.SmallIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Standard-time UTC offset of `timezone`",
+    )
 
     job_type = models.CharField(
         max_length=2,
@@ -314,6 +489,8 @@ class Job(models.Model):
 
     # Tech-focused tags: "frontend", "backend", "devops", "data-science", etc.
     tech_tags = TaggableManager(blank=True)
+    # Canonical Skill IDs of `tech_tags`, kept in sync by api.signals
+    skill_ids = SkillIdsField()
 
     benefits = models.TextField(blank=True, null=True, help_text="Company benefits and perks")
     interview_process = models.TextField(blank=True, null=True, help_text="Description of interview process")
@@ -328,18 +505,249 @@ class Job(models.Model):
         related_name="jobs_posted",
     )
 
+    # Lifecycle: ACTIVE until expires_at (then EXPIRED, see the expire_jobs
+    # command) or until the company closes it. Old expired and closed jobs
+    # are moved to ArchivedJob.
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_ACTIVE)
+    expires_at = models.DateTimeField(default=default_job_expiry, null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Covers the public listing (live jobs, newest first) and keeps
+            # expired/closed rows out of the index.
+            models.Index(
+                fields=["-created_at"],
+                condition=Q(status="ACTIVE"),
+                name="job_live_created_idx",
+            ),
+            # Lets the expire_jobs sweeper find due jobs without a scan.
+            models.Index(
+                fields=["expires_at"],
+                condition=Q(status="ACTIVE"),
+                name="job_active_expiry_idx",
+            ),
+            # Bounding-box prefilter of radius searches (api.filters).
+            models.Index(fields=["latitude", "longitude"], name="job_lat_lon_idx"),
+            models.Index(fields=["region", "country"], name="job_region_idx"),
+            # Salary range overlap filters and histograms on live jobs.
+            models.Index(
+                fields=["min_salary", "max_salary"],
+                condition=Q(status="ACTIVE"),
+                name="job_live_salary_idx",
+            ),
+        ]
+
     def clean(self):
         if self.is_remote_friendly and self.work_mode == "ONSITE":
             raise ValidationError(
                 {"work_mode": "Remote-friendly jobs should be Remote or Hybrid."}
             )
 
+    def fill_location(self):
+        """Copies the gazetteer match of `location` into the structured location fields."""
+        for field, value in location_fields(self.location).items():
+            setattr(self, field, value)
+
     def save(self, *args, **kwargs):
         self.clean()
+        self.fill_location()
+        if self.status == self.STATUS_EXPIRED and self.expires_at and self.expires_at > timezone.now():
+            # Extending the expiry date reopens the posting.
+            self.status = self.STATUS_ACTIVE
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} at {self.company.name}"
+
+
+class ArchivedJob(models.Model):
+    """
+    An expired or closed job moved out of the jobs table by the
+    expire_jobs command. It keeps the job's ID, so /api/jobs/<id>/ still
+    resolves, and a snapshot of the job as the API last returned it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.SET_NULL,
+        related_name="archived_jobs",
+        null=True,
+        blank=True,
+    )
+    title = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=Job.STATUS_CHOICES)
+    data = models.JSONField(help_text="JobSerializer output at archival time")
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class SavedSearch(models.Model):
+    """
+    A job seeker's saved JobFilter query. `query` keeps the filter
+    parameters as entered; the columns below hold them resolved (skill names
+    to canonical IDs) so api.percolator can match new jobs against
+    every saved search without running any of them as a query.
+    """
+    SKILL_MATCH_ANY = "any"
+    SKILL_MATCH_ALL = "all"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="saved_searches",
+    )
+    name = models.CharField(max_length=100)
+    query = models.JSONField(default=dict, help_text="JobFilter parameters")
+    is_active = models.BooleanField(default=True)
+
+    skill_ids = SkillIdsField()
+    skill_match = models.CharField(
+        max_length=3,
+        choices=[(SKILL_MATCH_ANY, "Any"), (SKILL_MATCH_ALL, "All")],
+        default=SKILL_MATCH_ANY,
+        editable=False,
+    )
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, editable=False)
+    work_mode = models.CharField(max_length=10, choices=Job.WORK_MODE_CHOICES, null=True, blank=True, editable=False)
+    job_type = models.CharField(max_length=2, choices=Job.JOB_TYPE_CHOICES, null=True, blank=True, editable=False)
+    remote_level = models.CharField(
+        max_length=20, choices=Job.REMOTE_POLICY_CHOICES, null=True, blank=True, editable=False
+    )
+    async_level = models.CharField(
+        max_length=20, choices=Job.ASYNC_LEVEL_CHOICES, null=True, blank=True, editable=False
+    )
+    is_remote_friendly = models.BooleanField(null=True, blank=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.user})"
+
+
+class JobAlert(models.Model):
+    """A new job that matched a saved search; `notified_at` is set once the user was told."""
+    saved_search = models.ForeignKey(SavedSearch, on_delete=models.CASCADE, related_name="alerts")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="job_alerts")
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name="alerts")
+    created_at = models.DateTimeField(auto_now_add=True)
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["saved_search", "job"], name="job_alert_unique_match"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="job_alert_user_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} for {self.saved_search_id}"
+
+
+class JobEvent(models.Model):
+    """
+    A job detail view or apply-link click, loaded in bulk from the event logs
+    (api.events). Not a foreign key to Job: events outlive archived jobs.
+    """
+    KIND_VIEW = "view"
+    KIND_APPLY = "apply"
+
+    job_id = models.BigIntegerField()
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="job_events",
+        null=True,
+        blank=True,
+    )
+    kind = models.CharField(max_length=5, choices=[(KIND_VIEW, "View"), (KIND_APPLY, "Apply click")])
+    visitor = models.CharField(max_length=16, blank=True, help_text="Salted per-day hash of IP and user agent")
+    user_id = models.BigIntegerField(null=True, blank=True, help_text="Signed-in visitor, if any")
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["job_id", "occurred_at"], name="job_event_job_idx"),
+            models.Index(fields=["company", "occurred_at"], name="job_event_company_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.job_id} at {self.occurred_at}"
+
+
+class LoadedEventLog(models.Model):
+    """An event log file already loaded into JobEvent, so it is never loaded twice."""
+    name = models.CharField(max_length=100, unique=True)
+    loaded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class JobDailyStats(models.Model):
+    """Views and apply clicks of a job per day, rolled up from JobEvent (api.analytics)."""
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="job_daily_stats",
+        null=True,
+        blank=True,
+    )
+    job_id = models.BigIntegerField()
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    apply_clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["job_id", "day"], name="job_daily_stats_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["company", "day"], name="job_daily_stats_company_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} on {self.day}"
+
+
+class JobSkillStats(models.Model):
+    """Distinct applicants (apply clicks by signed-in users) of a job per portfolio skill."""
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="job_skill_stats",
+        null=True,
+        blank=True,
+    )
+    job_id = models.BigIntegerField()
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="+")
+    applicants = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["job_id", "skill"], name="job_skill_stats_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["company"], name="job_skill_stats_company_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}: {self.skill_id} x{self.applicants}"
+
+
+class RollupWatermark(models.Model):
+    """The last JobEvent ID included in the rollup tables."""
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_event_id}"
@@ -0,0 +1,197 @@
+"""
+Reverse matching of new jobs against saved searches (job alerts).
+
+Rather than running every SavedSearch as a query when a job is posted, each
+search is indexed under its most selective predicate: the rarest of its
+required skills, its company, or the rarest of its scalar filters, with
+rarity measured on the live jobs when the index is built. A new job looks
+up only the buckets for its own skills and field values, so it is checked
+against the few searches that could possibly match, and those are evaluated
+in Python. Searches without any predicate match every job.
+
+Like api.autocomplete, each process keeps its own index and rebuilds it
+(one query over the saved searches) when another process bumped the
+generation token in the default cache, checking at most every
+SAVED_SEARCH_INDEX_CHECK_SECONDS.
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+GENERATION_KEY = "saved-search-index-generation"
+MATCH_ALL = ("*", None)
+# Job columns a saved search can require, besides skills
+FIELDS = ("company_id", "job_type", "work_mode", "remote_level", "async_level", "is_remote_friendly")
+# JobFilter parameters a saved search may use (skill_category is not stable
+# over taxonomy edits, so it is not offered)
+QUERY_PARAMS = {
+    "tech_tags", "tech_tags_all", "company", "work_mode", "job_type",
+    "remote_level", "async_level", "is_remote_friendly",
+}
+
+
+def criteria_from_query(query):
+    """
+    Validates JobFilter parameters and resolves them to SavedSearch column
+    values. Raises ValidationError for unsupported or invalid parameters.
+    """
+    from .filters import JobFilter
+    from .models import Job, SavedSearch
+    from .skills import lookup_skill_ids, normalize_skill_name
+
+    if not isinstance(query, dict):
+        raise ValidationError("Expected an object of job filter parameters.")
+    unknown = set(query) - QUERY_PARAMS
+    if unknown:
+        raise ValidationError(f"Unsupported filters: {', '.join(sorted(unknown))}.")
+    if query.get("tech_tags") and query.get("tech_tags_all"):
+        raise ValidationError("Use either tech_tags or tech_tags_all, not both.")
+
+    form = JobFilter(data=query, queryset=Job.objects.none()).form
+    if not form.is_valid():
+        raise ValidationError(form.errors)
+    data = form.cleaned_data
+
+    names = data.get("tech_tags") or data.get("tech_tags_all") or []
+    keys = {normalize_skill_name(name) for name in names} - {""}
+    skill_ids = lookup_skill_ids(keys)
+    if len(skill_ids) < len(keys):
+        raise ValidationError(f"Unknown skills: {', '.join(sorted(keys - set(skill_ids)))}.")
+
+    return {
+        "skill_ids": sorted(set(skill_ids.values())),
+        "skill_match": SavedSearch.SKILL_MATCH_ALL if data.get("tech_tags_all") else SavedSearch.SKILL_MATCH_ANY,
+        "company": data.get("company"),
+        "work_mode": data.get("work_mode") or None,
+        "job_type": data.get("job_type") or None,
+        "remote_level": data.get("remote_level") or None,
+        "async_level": data.get("async_level") or None,
+        "is_remote_friendly": data.get("is_remote_friendly"),
+    }
+
+
+class SavedSearchIndex:
+
+    def __init__(self, searches, frequencies, generation=None):
+        """
+        searches: [(id, user_id, skill_ids, match_all, {field: value})],
+        frequencies: {(field, value): live jobs with that value}, where
+        field "skill_ids" counts jobs having the skill.
+        """
+        self.generation = generation
+        self.searches = {}
+        self.buckets = defaultdict(list)
+        for search_id, user_id, skill_ids, match_all, required in searches:
+            self.searches[search_id] = (user_id, frozenset(skill_ids), match_all, required)
+            for key in self._keys(skill_ids, match_all, required, frequencies):
+                self.buckets[key].append(search_id)
+
+    @staticmethod
+    def _keys(skill_ids, match_all, required, frequencies):
+        # Each option is (expected matching jobs, bucket keys); a job can only
+        # match if it falls in one of the chosen option's buckets.
+        options = [(frequencies.get((field, value), 0), [(field, value)]) for field, value in required.items()]
+        if skill_ids and match_all:
+            options += [(frequencies.get(("skill_ids", s), 0), [("skill_ids", s)]) for s in skill_ids]
+        elif skill_ids:
+            options.append((
+                sum(frequencies.get(("skill_ids", s), 0) for s in skill_ids),
+                [("skill_ids", s) for s in skill_ids],
+            ))
+        if not options:
+            return [MATCH_ALL]
+        return min(options, key=lambda option: option[0])[1]
+
+    def candidates(self, job):
+        keys = [("skill_ids", s) for s in job["skill_ids"]]
+        keys += [(field, job[field]) for field in FIELDS]
+        keys.append(MATCH_ALL)
+        return {search_id for key in keys for search_id in self.buckets.get(key, ())}
+
+    def match(self, job):
+        """[(search_id, user_id)] of the saved searches matching a job (a dict of FIELDS + skill_ids)."""
+        skill_ids = set(job["skill_ids"])
+        matches = []
+        for search_id in self.candidates(job):
+            user_id, wanted, match_all, required = self.searches[search_id]
+            if any(job[field] != value for field, value in required.items()):
+                continue
+            if wanted and not (wanted <= skill_ids if match_all else wanted & skill_ids):
+                continue
+            matches.append((search_id, user_id))
+        return matches
+
+
+_index = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def load_index(generation=None):
+    from .models import Job, SavedSearch, Skill
+
+    frequencies = {
+        ("skill_ids", skill_id): count
+        for skill_id, count in Skill.objects.filter(job_count__gt=0).values_list("id", "job_count")
+    }
+    live = Job.objects.live()
+    for field in FIELDS:
+        frequencies.update(
+            ((field, value), count)
+            for value, count in live.order_by().values_list(field).annotate(n=Count("id"))
+        )
+
+    columns = ["id", "user_id", "skill_ids", "skill_match", *FIELDS]
+    searches = []
+    for row in SavedSearch.objects.filter(is_active=True).values(*columns).iterator():
+        required = {field: row[field] for field in FIELDS if row[field] is not None}
+        searches.append((
+            row["id"], row["user_id"], row["skill_ids"], row["skill_match"] == SavedSearch.SKILL_MATCH_ALL, required,
+        ))
+    return SavedSearchIndex(searches, frequencies, generation)
+
+
+def get_index():
+    """This process's index, rebuilt when saved searches changed anywhere."""
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < settings.SAVED_SEARCH_INDEX_CHECK_SECONDS:
+        return _index
+
+    with _lock:
+        generation = cache.get(GENERATION_KEY)
+        if _index is None or generation != _index.generation:
+            _index = load_index(generation)
+        _checked_at = now
+        return _index
+
+
+def saved_searches_changed():
+    """Called after commit when saved searches were added, edited or removed."""
+    global _index
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+    with _lock:
+        _index = None
+
+
+def match_new_jobs(job_ids):
+    """Records a JobAlert for every saved search matching the given live jobs. Returns the count."""
+    from .models import Job, JobAlert
+
+    jobs = list(Job.objects.live().filter(pk__in=job_ids).values("id", "skill_ids", *FIELDS))
+    if not jobs:
+        return 0
+    index = get_index()
+    alerts = [
+        JobAlert(saved_search_id=search_id, user_id=user_id, job_id=job["id"])
+        for job in jobs
+        for search_id, user_id in index.match(job)
+    ]
+    JobAlert.objects.bulk_create(alerts, batch_size=1000, ignore_conflicts=True)
+    return len(alerts)
@@ -1,4 +1,17 @@
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+
+def is_staff_user(user):
+    return bool(user and user.is_authenticated and (user.is_staff or user.role == "ADMIN"))
+
+
+class IsStaffUser(BasePermission):
+    """Django staff or ADMIN role accounts."""
+
+    def has_permission(self, request, view):
+        return is_staff_user(request.user)
+
 
 def ensure_user_can_post_job(user):
     """
@@ -11,7 +24,7 @@ def ensure_user_can_post_job(user):
     if user.role != "COMPANY":
         raise PermissionDenied("Only company accounts may post jobs.")
 
-    if not hasattr(user, "company_account") or user.company_account is None:
+    if user.company_account_id is None:
         raise PermissionDenied("Create your company profile first.")
 
     # Unlimited if they have an active subscription (via dj-stripe)
@@ -0,0 +1,83 @@
+"""
+On-demand profiling of a single request (see RequestProfilingMiddleware).
+
+Two modes:
+
+* "sample" (default) - a background thread samples the request thread's
+  stack every REQUEST_PROFILING_INTERVAL seconds and produces "folded"
+  stacks (`frame;frame;frame count` per line), the input format of
+  flamegraph.pl, speedscope and inferno.
+* "cprofile" - deterministic cProfile; the file is a standard pstats dump
+  (snakeviz, `python -m pstats`, flameprof).
+"""
+import cProfile
+import marshal
+import os
+import sys
+import threading
+from collections import Counter
+
+PROFILE_MODES = ("sample", "cprofile")
+MAX_STACK_DEPTH = 512
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    for prefix in sys.path:
+        if prefix and filename.startswith(prefix):
+            filename = os.path.relpath(filename, prefix)
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def output(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common()).encode()
+
+
+class CProfiler:
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+
+    def start(self):
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+
+    def output(self):
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+def make_profiler(mode, interval):
+    if mode == "cprofile":
+        return CProfiler(), "prof"
+    return StackSampler(interval), "folded"
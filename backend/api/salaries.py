@@ -0,0 +1,70 @@
+"""
+Salary distribution of job search results: /api/jobs/salary-histogram/
+takes the same parameters as the job listing and counts the matching live
+jobs per salary bucket.
+
+Each job falls into the bucket of its range midpoint (or of whichever bound
+it has). The counts come from one grouped query per distinct filter set and
+are cached under a generation token that every job write replaces (see
+api.signals, api.bulk_jobs and api.lifecycle), so a cached histogram is
+never older than the last job change; SALARY_HISTOGRAM_CACHE_SECONDS bounds
+how long one survives changes made outside the ORM.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce, Floor
+
+GENERATION_KEY = "salary-histogram-generation"
+# Listing parameters that don't change which jobs match
+IGNORED_PARAMS = {"ordering", "page", "page_size", "bucket_size", "fields", "omit", "view"}
+
+
+def cache_key(query_params, bucket_size):
+    generation = cache.get(GENERATION_KEY) or ""
+    params = sorted(
+        (name, sorted(query_params.getlist(name)))
+        for name in query_params
+        if name not in IGNORED_PARAMS
+    )
+    digest = hashlib.sha1(repr((params, bucket_size)).encode()).hexdigest()
+    return f"salary-histogram:{generation}:{digest}"
+
+
+def salary_histogram(jobs, bucket_size):
+    """{"bucket_size", "total", "buckets": [{"min", "max", "count"}]} of a Job queryset."""
+    midpoint = Coalesce((F("min_salary") + F("max_salary")) / 2, "min_salary", "max_salary")
+    rows = (
+        jobs.filter(Q(min_salary__isnull=False) | Q(max_salary__isnull=False))
+        .annotate(bucket=Floor(midpoint / bucket_size))
+        .values("bucket")
+        .annotate(count=Count("id"))
+        .order_by("bucket")
+    )
+    buckets = [
+        {"min": int(row["bucket"]) * bucket_size, "max": (int(row["bucket"]) + 1) * bucket_size, "count": row["count"]}
+        for row in rows
+    ]
+    return {
+        "bucket_size": bucket_size,
+        "total": sum(bucket["count"] for bucket in buckets),
+        "buckets": buckets,
+    }
+
+
+def cached_salary_histogram(jobs, query_params, bucket_size):
+    key = cache_key(query_params, bucket_size)
+    data = cache.get(key)
+    if data is None:
+        data = salary_histogram(jobs, bucket_size)
+        cache.set(key, data, settings.SALARY_HISTOGRAM_CACHE_SECONDS)
+    return data
+
+
+def salary_histograms_changed():
+    """Retires every cached histogram once the current transaction commits."""
+    transaction.on_commit(lambda: cache.set(GENERATION_KEY, uuid.uuid4().hex, None))
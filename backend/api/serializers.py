@@ -1,6 +1,11 @@
+from django.utils import timezone
 from rest_framework import serializers
 from taggit.serializers import TaggitSerializer, TagListSerializerField
-from .models import User, Company, Job, Portfolio, Project
+from .models import User, Company, Job, JobAlert, Portfolio, Project, RequestProfile, SavedSearch, Skill
+from .images import derivative_url
+from .instrumentation import TimedRepresentationMixin
+from .percolator import criteria_from_query
+from .sparse_fields import SparseFieldsSerializerMixin
 from djoser.serializers import UserCreateSerializer as DjoserUserCreateSerializer
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework import serializers
@@ -26,13 +31,15 @@ class UserSerializer(DjoserUserSerializer):
     We extend it to include the user's role, but we keep it read-only.
     """
     role = serializers.CharField(read_only=True)
+    resume_file = serializers.FileField(required=False, allow_null=True, use_url=False)
 
     class Meta(DjoserUserSerializer.Meta):
         model = User
-        fields = ("id", "username", "email", "role")
+        fields = ("id", "username", "email", "role", "resume_file")
 
-class CompanySerializer(TaggitSerializer, serializers.ModelSerializer):
+class CompanySerializer(SparseFieldsSerializerMixin, TimedRepresentationMixin, TaggitSerializer, serializers.ModelSerializer):
     industry = TagListSerializerField(required=False)
+    logo_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Company
@@ -43,12 +50,31 @@ class CompanySerializer(TaggitSerializer, serializers.ModelSerializer):
             "website",
             "description",
             "logo",
+            "logo_variants",
             "industry",
+            "open_jobs_count",
             "created_at",
         ]
-        read_only_fields = ["slug", "created_at"]
+        read_only_fields = ["slug", "open_jobs_count", "created_at"]
+        summary_fields = ["id", "name", "slug", "logo_variants", "industry", "open_jobs_count"]
+        field_sources = {"logo_variants": ["logo", "logo_derivatives"]}
 
-class JobSerializer(TaggitSerializer, serializers.ModelSerializer):
+    def get_logo_variants(self, obj):
+        """
+        Small pre-rendered logos keyed by pixel size, e.g.
+        {"64": {"png": url, "webp": url}}. Empty until the background
+        worker has processed the current upload.
+        """
+        derivatives = obj.logo_derivatives or {}
+        if not obj.logo or derivatives.get("source") != obj.logo.name:
+            return {}
+        request = self.context.get("request")
+        return {
+            size: {ext: derivative_url(request, name) for ext, name in formats.items()}
+            for size, formats in derivatives.get("sizes", {}).items()
+        }
+
+class JobSerializer(SparseFieldsSerializerMixin, TimedRepresentationMixin, TaggitSerializer, serializers.ModelSerializer):
     company = CompanySerializer(read_only=True)
     tech_tags = TagListSerializerField(required=False)
 
@@ -62,6 +88,12 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer):
             "remote_level",
             "async_level",
             "location",
+            "latitude",
+            "longitude",
+            "region",
+            "country",
+            "timezone",
+            "utc_offset_minutes",
             "job_type",
             "work_mode",
             "description",
@@ -73,10 +105,27 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer):
             "benefits",
             "interview_process",
             "is_remote_friendly",
+            "status",
+            "expires_at",
             "created_at",
             "updated_at",
         ]
         read_only_fields = ["created_at", "updated_at"]
+        # Everything but the long texts, for list cards
+        summary_fields = [
+            f for f in fields
+            if f not in ("description", "responsibilities", "requirements", "benefits", "interview_process")
+        ]
+
+    def validate_status(self, value):
+        if value == Job.STATUS_EXPIRED:
+            raise serializers.ValidationError("Jobs expire on their own; set expires_at instead.")
+        return value
+
+    def validate_expires_at(self, value):
+        if value is not None and value <= timezone.now():
+            raise serializers.ValidationError("The expiry date must be in the future.")
+        return value
 
     def validate_tech_tags(self, value):
         value = [t.lower() for t in value]
@@ -102,7 +151,14 @@ class JobSerializer(TaggitSerializer, serializers.ModelSerializer):
         return attrs
 
 
-class ProjectSerializer(TaggitSerializer, serializers.ModelSerializer):
+class CompanyJobSerializer(JobSerializer):
+    """A job without its nested company, for payloads listing one company's jobs."""
+
+    class Meta(JobSerializer.Meta):
+        fields = [f for f in JobSerializer.Meta.fields if f != "company"]
+
+
+class ProjectSerializer(TimedRepresentationMixin, TaggitSerializer, serializers.ModelSerializer):
     tech_stack = TagListSerializerField(required=False)
 
     class Meta:
@@ -124,7 +180,7 @@ class ProjectSerializer(TaggitSerializer, serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at"]
 
 
-class PortfolioSerializer(TaggitSerializer, serializers.ModelSerializer):
+class PortfolioSerializer(SparseFieldsSerializerMixin, TimedRepresentationMixin, TaggitSerializer, serializers.ModelSerializer):
     skills = TagListSerializerField(required=False)
     projects = ProjectSerializer(many=True, read_only=True)
 
@@ -150,7 +206,75 @@ class PortfolioSerializer(TaggitSerializer, serializers.ModelSerializer):
             "projects",
         ]
         read_only_fields = ["id", "user", "created_at", "updated_at"]
+        summary_fields = [
+            "id",
+            "user",
+            "years_experience",
+            "skills",
+            "github_repos_count",
+            "github_stars_count",
+            "open_to_remote",
+            "open_to_contract",
+            "available_for_hire",
+            "updated_at",
+        ]
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    download_url = serializers.HyperlinkedIdentityField(view_name="profiles-download")
+
+    class Meta:
+        model = RequestProfile
+        fields = [
+            "id",
+            "user",
+            "method",
+            "path",
+            "route",
+            "status_code",
+            "duration_ms",
+            "query_count",
+            "db_ms",
+            "mode",
+            "download_url",
+            "sql",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class SkillSerializer(serializers.ModelSerializer):
+    category = serializers.SlugRelatedField(slug_field="slug", read_only=True)
+    synonyms = serializers.SlugRelatedField(slug_field="name", many=True, read_only=True)
+
+    class Meta:
+        model = Skill
+        fields = ["id", "name", "category", "synonyms", "job_count", "portfolio_count"]
+
+
+class SavedSearchSerializer(serializers.ModelSerializer):
+    """`query` takes JobFilter parameters, e.g. {"tech_tags": ["python"], "work_mode": "REMOTE"}."""
+
+    class Meta:
+        model = SavedSearch
+        fields = ["id", "name", "query", "is_active", "created_at"]
+        read_only_fields = ["id", "created_at"]
+
+    def validate(self, attrs):
+        if "query" in attrs:
+            attrs.update(criteria_from_query(attrs["query"]))
+        return attrs
+
+
+class JobAlertSerializer(serializers.ModelSerializer):
+    job = JobSerializer(read_only=True)
+    saved_search = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = JobAlert
+        fields = ["id", "saved_search", "job", "created_at", "notified_at"]
+        read_only_fields = fields
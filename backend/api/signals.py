@@ -0,0 +1,208 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import bump_token_version
+from .autocomplete import skills_changed
+from .company_profile import invalidate_company_profile
+from .counters import adjust_skill_counts, jobs_changed
+from .images import logo_derivatives_stale, schedule_logo_derivatives
+from .models import Company, Job, Portfolio, SavedSearch, Skill, SkillSynonym, User
+from .percolator import match_new_jobs, saved_searches_changed
+from .salaries import salary_histograms_changed
+from .skills import sync_skill_ids
+
+
+@receiver(post_save, sender=Company)
+def company_logo_changed(sender, instance, raw=False, **kwargs):
+    if raw or not logo_derivatives_stale(instance):
+        return
+    transaction.on_commit(lambda: schedule_logo_derivatives(instance))
+
+
+# ---- user state changes: resume reference counting, JWT invalidation ----
+
+# Fields mirrored into JWT claims (see api.authentication)
+CLAIM_FIELDS = ("username", "role", "is_staff", "is_active", "has_active_job_posting_plan")
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_user_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_state = None
+    # Runs before FileField.pre_save(), so an upload is still uncommitted here.
+    instance._resume_uploaded = bool(instance.resume_file) and not instance.resume_file._committed
+    if raw or instance.pk is None:
+        return
+    fields = ["resume_file", *CLAIM_FIELDS]
+    if update_fields is not None:
+        fields = [f for f in fields if f in update_fields]
+        if not fields:
+            return
+    instance._previous_state = User.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=User)
+def release_replaced_resume(sender, instance, **kwargs):
+    previous = (getattr(instance, "_previous_state", None) or {}).get("resume_file")
+    # Re-uploading an identical file yields the same name but still took a
+    # reference in ContentAddressedStorage._save(); release the old one.
+    if previous and (previous != instance.resume_file.name or getattr(instance, "_resume_uploaded", False)):
+        storage = instance.resume_file.storage
+        transaction.on_commit(lambda: storage.delete(previous))
+
+
+@receiver(post_save, sender=User)
+def invalidate_outdated_tokens(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_state", None) or {}
+    if any(previous[f] != getattr(instance, f) for f in CLAIM_FIELDS if f in previous):
+        bump_token_version(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def release_deleted_resume(sender, instance, **kwargs):
+    if instance.resume_file:
+        name = instance.resume_file.name
+        storage = instance.resume_file.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(pre_save, sender=Company)
+def remember_previous_owner(sender, instance, raw=False, **kwargs):
+    instance._previous_owner_id = None
+    if not raw and instance.pk is not None:
+        instance._previous_owner_id = (
+            Company.objects.filter(pk=instance.pk).values_list("owner_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_ownership_changed(sender, instance, created=True, **kwargs):
+    # The owners' company_id claims change when a company is created, removed
+    # or handed over to another account.
+    owners = {instance.owner_id}
+    if not created:
+        previous = getattr(instance, "_previous_owner_id", None)
+        owners = {previous, instance.owner_id} if previous != instance.owner_id else set()
+    for owner_id in owners - {None}:
+        bump_token_version(owner_id)
+
+
+@receiver(post_save, sender="djstripe.Subscription")
+def subscription_changed(sender, instance, **kwargs):
+    from djstripe.models import Customer
+
+    subscriber_id = (
+        Customer.objects.filter(pk=instance.customer_id).values_list("subscriber_id", flat=True).first()
+    )
+    if subscriber_id:
+        bump_token_version(subscriber_id)
+
+
+# ---- canonical skill IDs mirrored from taggit tags ----
+
+SKILL_TAG_FIELDS = {Job: "tech_tags", Portfolio: "skills"}
+
+
+@receiver(m2m_changed, sender="taggit.TaggedItem")
+def tags_changed(sender, instance, action, reverse=False, **kwargs):
+    tags_field = SKILL_TAG_FIELDS.get(type(instance))
+    if reverse or tags_field is None or action not in ("post_add", "post_remove", "post_clear"):
+        return
+    sync_skill_ids(instance, tags_field)
+
+
+# ---- denormalized counters (api.counters) ----
+
+def job_state(job):
+    return job.status, job.company_id, job.skill_ids
+
+
+@receiver(pre_save, sender=Job)
+def remember_previous_job_state(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if not raw and instance.pk is not None:
+        instance._previous_state = (
+            Job.objects.filter(pk=instance.pk).values_list("status", "company_id", "skill_ids").first()
+        )
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        before = None if created else getattr(instance, "_previous_state", None)
+        jobs_changed([(before, job_state(instance))])
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    jobs_changed([(job_state(instance), None)])
+
+
+@receiver(post_delete, sender=Portfolio)
+def portfolio_deleted(sender, instance, **kwargs):
+    adjust_skill_counts(Portfolio, {skill_id: -1 for skill_id in instance.skill_ids})
+
+
+# ---- cached company profiles (api.company_profile) ----
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_profile_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_company_profile(slug=instance.slug)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def job_profile_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_company_profile(instance.company_id)
+    previous_company_id = (getattr(instance, "_previous_state", None) or (None, None))[1]
+    if previous_company_id not in (None, instance.company_id):
+        invalidate_company_profile(previous_company_id)
+
+
+@receiver(m2m_changed, sender="taggit.TaggedItem")
+def profile_tags_changed(sender, instance, action, reverse=False, **kwargs):
+    if reverse or action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if isinstance(instance, Company):
+        invalidate_company_profile(slug=instance.slug)
+    elif isinstance(instance, Job):
+        invalidate_company_profile(instance.company_id)
+
+
+# ---- salary histograms (api.salaries) ----
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def salary_histogram_job_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        salary_histograms_changed()
+
+
+# ---- saved searches and job alerts (api.percolator) ----
+
+@receiver(post_save, sender=Job)
+def job_posted(sender, instance, created, raw=False, **kwargs):
+    # After commit, so the tags the job was created with are included.
+    if created and not raw:
+        transaction.on_commit(lambda: match_new_jobs([instance.pk]))
+
+
+@receiver(post_save, sender=SavedSearch)
+@receiver(post_delete, sender=SavedSearch)
+def saved_search_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(saved_searches_changed)
+
+
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=SkillSynonym)
+@receiver(post_delete, sender=SkillSynonym)
+def skill_taxonomy_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(skills_changed)
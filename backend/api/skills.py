@@ -0,0 +1,193 @@
+"""
+Skill taxonomy: resolves free-form tag names to canonical Skill IDs.
+
+Jobs and portfolios keep their taggit tags (the API still reads and writes
+tag lists), and a signal mirrors them into the `skill_ids` column as
+canonical IDs. Filters resolve the requested names the same way and match
+the column with the skill_ids__any / skill_ids__all lookups, so "JS",
+"javascript" and "JavaScript" find the same rows without joining through
+taggit's generic TaggedItem table. Unknown tag names become new skills.
+"""
+import re
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
+from .counters import skill_ids_changed
+
+# category -> (parent, {canonical name: [synonyms]})
+DEFAULT_TAXONOMY = {
+    "Engineering": (None, {}),
+    "Languages": ("Engineering", {
+        "Python": ["py", "python3"],
+        "JavaScript": ["js", "ecmascript", "es6"],
+        "TypeScript": ["ts"],
+        "Go": ["golang"],
+        "Rust": [],
+        "Java": [],
+        "Kotlin": [],
+        "Swift": [],
+        "Ruby": [],
+        "PHP": [],
+        "Elixir": [],
+        "Scala": [],
+        "C++": ["cpp"],
+        "C#": ["csharp", "c sharp"],
+        "SQL": [],
+    }),
+    "Web": ("Engineering", {}),
+    "Frontend": ("Web", {
+        "React": ["reactjs", "react.js"],
+        "Vue.js": ["vue", "vuejs"],
+        "Angular": ["angularjs"],
+        "Svelte": [],
+        "Next.js": ["nextjs"],
+        "HTML": ["html5"],
+        "CSS": ["css3"],
+        "Tailwind CSS": ["tailwind", "tailwindcss"],
+        "Accessibility": ["a11y"],
+    }),
+    "Backend": ("Web", {
+        "Node.js": ["node", "nodejs"],
+        "Django": [],
+        "Flask": [],
+        "FastAPI": [],
+        "Ruby on Rails": ["rails", "ror"],
+        "Laravel": [],
+        ".NET": ["dotnet", "asp.net"],
+        "Spring": ["spring boot"],
+        "GraphQL": [],
+        "REST": ["rest api", "restful"],
+    }),
+    "Data": ("Engineering", {
+        "PostgreSQL": ["postgres", "psql"],
+        "MySQL": [],
+        "MongoDB": ["mongo"],
+        "Redis": [],
+        "Elasticsearch": [],
+        "Apache Spark": ["spark"],
+        "Pandas": [],
+        "Machine Learning": ["ml", "machine-learning"],
+        "Data Science": ["data-science"],
+    }),
+    "DevOps & Cloud": ("Engineering", {
+        "Docker": [],
+        "Kubernetes": ["k8s"],
+        "AWS": ["amazon web services"],
+        "Google Cloud": ["gcp"],
+        "Azure": [],
+        "Terraform": [],
+        "CI/CD": ["ci-cd", "cicd"],
+        "Linux": [],
+        "DevOps": [],
+    }),
+    "Mobile": ("Engineering", {
+        "React Native": ["react-native"],
+        "Flutter": [],
+        "iOS": [],
+        "Android": [],
+    }),
+}
+
+
+def normalize_skill_name(name):
+    """'  React   Native ' -> 'react native'"""
+    return re.sub(r"\s+", " ", name).strip().lower()
+
+
+def lookup_skill_ids(names):
+    """Maps each normalized name to its Skill ID; unknown names are left out."""
+    from .models import SkillSynonym
+
+    keys = {normalize_skill_name(name) for name in names} - {""}
+    if not keys:
+        return {}
+    return dict(SkillSynonym.objects.filter(name__in=keys).values_list("name", "skill_id"))
+
+
+def resolve_skill_ids(names):
+    """Sorted canonical Skill IDs for tag names, creating skills for new names."""
+    from .models import Skill, SkillSynonym
+
+    known = lookup_skill_ids(names)
+    for name in names:
+        key = normalize_skill_name(name)
+        if not key or key in known:
+            continue
+        try:
+            with transaction.atomic():
+                skill = Skill.objects.create(name=name.strip())
+                SkillSynonym.objects.create(name=key, skill=skill)
+        except IntegrityError:
+            # Created concurrently, or a skill with that exact name exists.
+            skill_id = lookup_skill_ids([key]).get(key)
+            if skill_id is None:
+                skill_id = Skill.objects.get(name=name.strip()).id
+                SkillSynonym.objects.get_or_create(name=key, defaults={"skill_id": skill_id})
+            known[key] = skill_id
+        else:
+            known[key] = skill.id
+    return sorted(set(known.values()))
+
+
+def category_skill_ids(slug):
+    """IDs of the skills in a category and all of its subcategories."""
+    from .models import Skill, SkillCategory
+
+    category_ids = list(SkillCategory.objects.filter(slug=slug).values_list("id", flat=True))
+    frontier = category_ids
+    while frontier:
+        frontier = list(SkillCategory.objects.filter(parent_id__in=frontier).values_list("id", flat=True))
+        category_ids.extend(frontier)
+    return list(Skill.objects.filter(category_id__in=category_ids).values_list("id", flat=True))
+
+
+def sync_skill_ids(instance, tags_field):
+    """Recomputes instance.skill_ids from its tags without touching other columns."""
+    model = type(instance)
+    names = [tag.name for tag in getattr(instance, tags_field).all()]
+    skill_ids = resolve_skill_ids(names)
+    current = model.objects.filter(pk=instance.pk).values_list("skill_ids", flat=True).first() or []
+    instance.skill_ids = skill_ids
+    if skill_ids != current:
+        model.objects.filter(pk=instance.pk).update(skill_ids=skill_ids)
+        skill_ids_changed(model, [(instance.pk, current, skill_ids)])
+    return skill_ids
+
+
+def rebuild_skill_ids(model, object_ids=None, batch_size=1000):
+    """
+    Bulk-recomputes skill_ids for rows of model (Job or Portfolio) from their
+    tags, e.g. after tags were written with TaggedItem.bulk_create(), which
+    sends no signals. Returns the number of rows updated.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from taggit.models import TaggedItem
+
+    items = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(model))
+    rows = model.objects.all()
+    if object_ids is not None:
+        items = items.filter(object_id__in=object_ids)
+        rows = rows.filter(pk__in=object_ids)
+
+    names = defaultdict(list)
+    for object_id, tag_name in items.values_list("object_id", "tag__name").iterator():
+        names[object_id].append(tag_name)
+    distinct = {name for tag_names in names.values() for name in tag_names if normalize_skill_name(name)}
+    known = lookup_skill_ids(distinct)
+    for name in distinct:
+        if normalize_skill_name(name) not in known:
+            known[normalize_skill_name(name)] = resolve_skill_ids([name])[0]
+
+    changes = []
+    for pk, current in rows.values_list("pk", "skill_ids").iterator():
+        skill_ids = sorted({
+            known[normalize_skill_name(name)] for name in names.get(pk, ()) if normalize_skill_name(name)
+        })
+        if skill_ids != current:
+            changes.append((pk, current, skill_ids))
+    model.objects.bulk_update(
+        [model(pk=pk, skill_ids=skill_ids) for pk, _, skill_ids in changes], ["skill_ids"], batch_size=batch_size
+    )
+    skill_ids_changed(model, changes)
+    return len(changes)
@@ -0,0 +1,91 @@
+"""
+A minimal SMTP server that accepts every message and keeps it in memory,
+standing in for the mail relay during development and tests:
+
+    python manage.py smtp_debug_server --port 1025
+
+It speaks just enough SMTP for smtplib / Django's SMTP backend (EHLO/HELO,
+MAIL, RCPT, DATA, RSET, NOOP, QUIT) and performs no delivery, TLS or AUTH.
+"""
+import socketserver
+import threading
+from email import message_from_bytes, policy
+
+
+class DebugSMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, code, text):
+        self.wfile.write(f"{code} {text}\r\n".encode())
+
+    def handle(self):
+        self.reply(220, "smtp-debug ready")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode("latin-1").rstrip("\r\n").partition(" ")
+            command = command.upper()
+            if command in ("EHLO", "HELO"):
+                self.reply(250, "smtp-debug")
+            elif command == "MAIL":
+                sender, recipients = argument.partition(":")[2].strip(), []
+                self.reply(250, "OK")
+            elif command == "RCPT":
+                recipients.append(argument.partition(":")[2].strip())
+                self.reply(250, "OK")
+            elif command == "DATA":
+                self.reply(354, "End data with <CR><LF>.<CR><LF>")
+                self.server.deliver(sender, recipients, self.read_data())
+                sender, recipients = None, []
+                self.reply(250, "OK: queued")
+            elif command == "RSET":
+                sender, recipients = None, []
+                self.reply(250, "OK")
+            elif command == "NOOP":
+                self.reply(250, "OK")
+            elif command == "QUIT":
+                self.reply(221, "Bye")
+                return
+            else:
+                self.reply(502, "Command not implemented")
+
+    def read_data(self):
+        lines = []
+        for line in self.rfile:
+            if line in (b".\r\n", b".\n"):
+                break
+            lines.append(line[1:] if line.startswith(b".") else line)
+        return b"".join(lines)
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Collects messages in `messages` as (sender, recipients, EmailMessage);
+    `on_message` is called with the same tuple if set.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 1025), on_message=None):
+        super().__init__(address, DebugSMTPHandler)
+        self.messages = []
+        self.on_message = on_message
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def deliver(self, sender, recipients, data):
+        message = (sender, recipients, message_from_bytes(data, policy=policy.default))
+        with self.lock:
+            self.messages.append(message)
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def start(self):
+        """Serves from a daemon thread; call shutdown() to stop."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,102 @@
+"""
+Sparse fieldsets for list and detail reads:
+
+    /api/jobs/?fields=id,title,company      only these fields
+    /api/jobs/?omit=description,benefits    everything else
+    /api/jobs/?view=summary                 the serializer's Meta.summary_fields
+
+The selection shapes the query as well as the payload: model columns of
+unselected fields are deferred, so large text columns are never read, and
+the joins and prefetches a viewset lists per field (`field_joins`) are only
+added when that field is selected.
+"""
+from rest_framework.exceptions import ValidationError
+
+# Actions whose responses honour ?fields=, ?omit= and ?view=
+SPARSE_ACTIONS = ("list", "retrieve", "batch")
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsSerializerMixin:
+    """Accepts `fields=[names]` to serialize only those of Meta.fields."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """
+    ViewSet mixin for serializers with SparseFieldsSerializerMixin.
+
+    field_joins maps a serializer field to the (select_related,
+    prefetch_related) paths it needs; Meta.field_sources on the serializer
+    maps a field to the model columns it reads when they differ from its
+    name (e.g. a SerializerMethodField).
+    """
+    field_joins = {}
+
+    def selected_fields(self):
+        """The serializer fields chosen by the request, or None for all of them."""
+        if self.action not in SPARSE_ACTIONS:
+            return None
+        if hasattr(self, "_selected_fields"):
+            return self._selected_fields
+
+        meta = self.get_serializer_class().Meta
+        available = list(meta.fields)
+        params = self.request.query_params
+        fields = None
+        if params.get("view"):
+            if params["view"] != "summary":
+                raise ValidationError({"view": 'The only view is "summary".'})
+            fields = [name for name in meta.summary_fields if name in available]
+        if params.get("fields"):
+            fields = split_names(params["fields"])
+        if params.get("omit"):
+            omit = split_names(params["omit"])
+            fields = [name for name in fields or available if name not in omit]
+            unknown = set(omit) - set(available)
+            if unknown:
+                raise ValidationError({"omit": f"Unknown fields: {', '.join(sorted(unknown))}."})
+        if fields is not None:
+            unknown = set(fields) - set(available)
+            if unknown:
+                raise ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}."})
+            fields = [name for name in available if name in fields]
+        self._selected_fields = fields
+        return fields
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.selected_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def shape_queryset(self, queryset):
+        """Adds the joins of the selected fields and defers the columns of the others."""
+        if self.action not in SPARSE_ACTIONS:
+            return queryset
+        fields = self.selected_fields()
+        selected = set(self.get_serializer_class().Meta.fields if fields is None else fields)
+        for name, (select, prefetch) in self.field_joins.items():
+            if name in selected:
+                queryset = queryset.select_related(*select).prefetch_related(*prefetch)
+        if fields is None:
+            return queryset
+
+        meta = self.get_serializer_class().Meta
+        sources = getattr(meta, "field_sources", {})
+        needed = {column for name in selected for column in sources.get(name, [name])}
+        columns = {
+            field.name
+            for field in queryset.model._meta.concrete_fields
+            if not field.is_relation and not field.primary_key
+        }
+        deferred = {name for name in meta.fields if name in columns} - needed
+        return queryset.defer(*deferred) if deferred else queryset
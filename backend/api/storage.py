@@ -0,0 +1,154 @@
+import hashlib
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import FileResponse, HttpResponse
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File storage that names every file after the SHA-256 of its contents.
+
+    Uploads are streamed chunk by chunk into a temporary file while being
+    hashed, then moved to <prefix>/<aa>/<bb>/<digest><ext>. Identical uploads
+    share one file on disk; StoredBlob keeps a reference count per file so it
+    is only removed once nothing points at it.
+
+    A file is only placed or removed while its StoredBlob row is locked by
+    the reference count update, so a save and the release of the last
+    reference to the same content can't interleave. A save whose transaction
+    rolls back leaves an unreferenced file; remove_unreferenced() (the
+    clean_blob_storage command) reclaims those.
+    """
+
+    def __init__(self, prefix="cas", **kwargs):
+        self.prefix = prefix
+        super().__init__(**kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        # Final names are chosen by content in _save(), never by collision.
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredBlob
+
+        os.makedirs(self.path(self.prefix), exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.path(self.prefix), suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            hexdigest = digest.hexdigest()
+            ext = os.path.splitext(name)[1].lower()
+            final_name = f"{self.prefix}/{hexdigest[:2]}/{hexdigest[2:4]}/{hexdigest}{ext}"
+            full_path = self.path(final_name)
+
+            with transaction.atomic():
+                self._add_reference(final_name, hexdigest, os.path.getsize(tmp_path))
+                if not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(tmp_path, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return final_name
+
+    def _add_reference(self, name, sha256, size):
+        """Takes one reference to `name`, locking its row until the transaction ends."""
+        from .models import StoredBlob
+
+        if StoredBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1):
+            return
+        try:
+            with transaction.atomic():
+                StoredBlob.objects.create(name=name, sha256=sha256, size=size, ref_count=1)
+        except IntegrityError:  # created concurrently
+            StoredBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1)
+
+    def delete(self, name):
+        """
+        Drops one reference to `name`; the file is removed with the last one.
+        """
+        from .models import StoredBlob
+
+        if not name:
+            return
+        with transaction.atomic():
+            StoredBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F("ref_count") - 1)
+            deleted, _ = StoredBlob.objects.filter(name=name, ref_count=0).delete()
+            if deleted:
+                super().delete(name)
+
+    def remove_unreferenced(self, min_age):
+        """
+        Removes files without a StoredBlob row, and abandoned temporary
+        uploads, not modified for min_age seconds. Returns how many.
+        """
+        from .models import StoredBlob
+
+        cutoff = time.time() - min_age
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.path(self.prefix)):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if os.path.getmtime(path) > cutoff:
+                    continue
+                if filename.endswith(".part"):
+                    os.remove(path)
+                    removed += 1
+                    continue
+                name = os.path.relpath(path, self.location).replace(os.sep, "/")
+                try:
+                    # A placeholder row holds off a concurrent _save() of the
+                    # same content until the file is gone.
+                    with transaction.atomic():
+                        blob = StoredBlob.objects.create(name=name, sha256=os.path.splitext(filename)[0])
+                        os.remove(path)
+                        blob.delete()
+                except IntegrityError:  # still referenced
+                    continue
+                removed += 1
+        return removed
+
+
+def resume_storage():
+    return ContentAddressedStorage(prefix="resumes")
+
+
+def sendfile_response(storage, name, filename=None):
+    """
+    Hands the actual file transfer to the front web server when configured
+    (nginx X-Accel-Redirect or Apache/lighttpd X-Sendfile), so range requests
+    and large bodies never occupy a Python worker. Falls back to streaming
+    through Django for local development.
+    """
+    backend = settings.SENDFILE_BACKEND
+    filename = filename or os.path.basename(name)
+
+    if backend == "nginx":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = settings.SENDFILE_URL_PREFIX.rstrip("/") + "/" + name
+        del response["Content-Type"]  # let the web server pick it from the extension
+    elif backend == "xsendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = storage.path(name)
+        del response["Content-Type"]
+    else:
+        response = FileResponse(storage.open(name, "rb"))
+
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,9 +1,19 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework import status
-from unittest.mock import patch
+from unittest.mock import PropertyMock, patch
+from PIL import Image
 
-from api.models import User, Company, Job, Portfolio, Project
+from api.models import User, Company, Job, Portfolio, Project, RequestProfile, StoredBlob
 
 
 def authenticate(client, username, password):
@@ -20,6 +30,7 @@ class BaseAPITest(TestCase):
 
     def setUp(self):
         self.client = APIClient()
+        cache.clear()
 
         # Users
         self.user_company = User.objects.create_user(
@@ -325,3 +336,1463 @@ class PortfolioAPITests(BaseAPITest):
         response = self.client.get("/api/portfolios/?open_to_remote=true")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data["results"]), 1)
+
+
+class LogoDerivativeTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().tearDown()
+
+    def upload_logo(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (800, 400), "red").save(buffer, format="PNG")
+        self.company.logo = SimpleUploadedFile("logo.png", buffer.getvalue(), content_type="image/png")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.save()
+
+    def test_upload_generates_thumbnails(self):
+        self.upload_logo()
+        self.company.refresh_from_db()
+
+        sizes = self.company.logo_derivatives["sizes"]
+        self.assertEqual(set(sizes), {"64", "256"})
+        self.assertTrue(sizes["64"]["webp"].endswith("-64.webp"))
+
+    def test_serializer_exposes_variants_with_cache_headers(self):
+        self.upload_logo()
+
+        response = self.client.get(f"/api/companies/{self.company.id}/")
+        self.assertEqual(response.status_code, 200)
+        url = response.data["logo_variants"]["64"]["webp"]
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+
+
+class ResumeStorageTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().tearDown()
+
+    def upload_resume(self, user, content):
+        user.resume_file = SimpleUploadedFile("resume.pdf", content, content_type="application/pdf")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_identical_resumes_share_one_file(self):
+        self.upload_resume(self.user_regular, b"%PDF same resume")
+        self.upload_resume(self.user_company, b"%PDF same resume")
+
+        self.assertEqual(self.user_regular.resume_file.name, self.user_company.resume_file.name)
+        blob = StoredBlob.objects.get(name=self.user_regular.resume_file.name)
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_reuploading_identical_resume_keeps_one_reference(self):
+        self.upload_resume(self.user_regular, b"%PDF same resume")
+        self.upload_resume(self.user_regular, b"%PDF same resume")
+        name = self.user_regular.resume_file.name
+        self.assertEqual(StoredBlob.objects.get(name=name).ref_count, 1)
+
+        storage = self.user_regular.resume_file.storage
+        self.upload_resume(self.user_regular, b"%PDF other resume")
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+        self.assertFalse(storage.exists(name))
+
+    def test_replacing_last_reference_deletes_file(self):
+        self.upload_resume(self.user_regular, b"%PDF first")
+        old_name = self.user_regular.resume_file.name
+        storage = self.user_regular.resume_file.storage
+
+        self.upload_resume(self.user_regular, b"%PDF second")
+
+        self.assertFalse(StoredBlob.objects.filter(name=old_name).exists())
+        self.assertFalse(storage.exists(old_name))
+
+    def test_files_of_rolled_back_saves_are_reclaimed(self):
+        from django.db import transaction
+
+        self.upload_resume(self.user_company, b"%PDF kept")
+        kept = self.user_company.resume_file.name
+        storage = self.user_company.resume_file.storage
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.user_regular.resume_file = SimpleUploadedFile("resume.pdf", b"%PDF abandoned")
+            self.user_regular.save()
+            orphan = self.user_regular.resume_file.name
+            raise RuntimeError
+        self.assertFalse(StoredBlob.objects.filter(name=orphan).exists())
+        self.assertTrue(storage.exists(orphan))
+
+        self.assertEqual(storage.remove_unreferenced(min_age=0), 1)
+        self.assertFalse(storage.exists(orphan))
+        self.assertTrue(storage.exists(kept))
+        self.assertEqual(StoredBlob.objects.get(name=kept).ref_count, 1)
+
+    @override_settings(SENDFILE_BACKEND="nginx", SENDFILE_URL_PREFIX="/protected/")
+    def test_download_delegates_to_web_server(self):
+        self.upload_resume(self.user_regular, b"%PDF resume")
+        authenticate(self.client, "regular", "testpass")
+
+        response = self.client.get(f"/api/users/{self.user_regular.id}/resume/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["X-Accel-Redirect"], f"/protected/{self.user_regular.resume_file.name}"
+        )
+
+
+class AsyncReadAPITests(BaseAPITest):
+
+    def test_async_job_list_matches_viewset(self):
+        sync = self.client.get("/api/jobs/").json()
+        response = self.client.get("/api/read/jobs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync)
+
+    def test_async_job_list_filters(self):
+        response = self.client.get("/api/read/jobs/?work_mode=ONSITE")
+        self.assertEqual(response.json()["count"], 0)
+
+        response = self.client.get("/api/read/jobs/?search=software")
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_async_list_rejects_invalid_filters(self):
+        sync = self.client.get("/api/jobs/?work_mode=UNDERWATER")
+        response = self.client.get("/api/read/jobs/?work_mode=UNDERWATER")
+        self.assertEqual(sync.status_code, 400)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), sync.json())
+
+    @override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={"anon": "1/min", "user": "5/min"})
+    def test_async_throttle_uses_the_user_bucket(self):
+        with tempfile.TemporaryDirectory() as tmpdir, self.settings(RATE_LIMIT_MMAP_PATH=f"{tmpdir}/ratelimit.bin"):
+            authenticate(self.client, "regular", "testpass")
+            response = self.client.get("/api/read/jobs/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get("/api/read/jobs/").status_code, 200)
+
+    def test_async_company_detail(self):
+        response = self.client.get(f"/api/read/companies/{self.company.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "TestCo")
+
+        response = self.client.get("/api/read/companies/999999/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_async_read_rejects_writes(self):
+        response = self.client.post("/api/read/jobs/", {})
+        self.assertEqual(response.status_code, 405)
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], DATABASE_REPLICA_STICKY_SECONDS=30)
+class ReplicaRoutingTests(TransactionTestCase):
+    # No wrapping transaction: the replica connection must see committed rows.
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.client = APIClient()
+        self.user_company = User.objects.create_user(
+            username="companyuser",
+            password="testpass",
+            role="COMPANY",
+        )
+        self.company = Company.objects.create(name="TestCo", owner=self.user_company)
+        Job.objects.create(
+            title="Software Engineer",
+            description="Dev work",
+            company=self.company,
+            apply_url="https://example.com/apply",
+        )
+
+    def test_safe_requests_read_from_replica(self):
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get("/api/jobs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(replica.captured_queries), 0)
+
+    def test_writes_pin_client_to_primary(self):
+        authenticate(self.client, "companyuser", "testpass")
+        response = self.client.post("/api/companies/", {"name": "Pinned Co", "description": "Desc"})
+        self.assertEqual(response.status_code, 201)
+
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get("/api/companies/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(replica.captured_queries), 0)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_pin_survives_token_refresh(self):
+        tokens = self.client.post(
+            "/auth/jwt/create/", {"username": "companyuser", "password": "testpass"}
+        ).data
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.post("/api/companies/", {"name": "Pinned Co", "description": "Desc"})
+        self.assertEqual(response.status_code, 201)
+
+        refreshed = self.client.post("/auth/jwt/refresh/", {"refresh": tokens["refresh"]}).data
+        self.assertNotEqual(refreshed["access"], tokens["access"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed['access']}")
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.get("/api/companies/")
+        self.assertEqual(len(replica.captured_queries), 0)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_reads_outside_requests_use_primary(self):
+        from api.db_routers import PrimaryReplicaRouter
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Job), "default")
+
+
+@override_settings(SQLITE_WRITE_RETRIES=3, SQLITE_WRITE_RETRY_BACKOFF=0)
+class WriteTransactionTests(TransactionTestCase):
+
+    def test_retries_when_database_is_locked(self):
+        from django.db import OperationalError
+        from api.transactions import write_transaction
+
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError("database is locked")
+            return "written"
+
+        self.assertEqual(write_transaction(flaky), "written")
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        from django.db import OperationalError
+        from api.transactions import write_transaction
+
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise OperationalError("no such table: api_job")
+
+        with self.assertRaises(OperationalError):
+            write_transaction(broken)
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(SQLITE_WRITE_RETRY_BACKOFF=0)
+    def test_retried_job_post_spends_its_credit(self):
+        from django.db import OperationalError
+        from api.serializers import JobSerializer
+
+        user = User.objects.create_user(username="poster", password="testpass", role="COMPANY")
+        company = Company.objects.create(name="RetryCo", description="d", owner=user, industry=["tech"])
+        user.company_account = company
+        user.has_active_job_posting_plan = True
+        user.save()
+
+        original = JobSerializer.create
+        calls = []
+
+        def locked_once(serializer, validated_data):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return original(serializer, validated_data)
+
+        client = APIClient()
+        authenticate(client, "poster", "testpass")
+        payload = {
+            "title": "Backend Engineer", "description": "Eng job",
+            "apply_url": "https://example.com/apply", "job_type": "FT", "work_mode": "REMOTE",
+            "remote_level": "FULL_REMOTE", "async_level": "FULL_ASYNC",
+        }
+        with patch.object(JobSerializer, "create", locked_once):
+            response = client.post("/api/jobs/", payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(calls), 2)
+        user.refresh_from_db()
+        self.assertFalse(user.has_active_job_posting_plan)
+
+        # The spent credit can't be reused by the same (now stale) token.
+        response = client.post("/api/jobs/", payload)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Job.objects.filter(company=company).count(), 1)
+
+
+class SyntheticBenchmarkTests(TestCase):
+
+    def test_seed_and_benchmark(self):
+        import json
+        import os
+        from django.core.management import call_command
+
+        call_command(
+            "seed_synthetic", companies=3, jobs=20, portfolios=4,
+            extra_tags=5, batch_size=7, stdout=io.StringIO(),
+        )
+        self.assertEqual(Job.objects.count(), 20)
+        self.assertEqual(Portfolio.objects.count(), 4)
+        self.assertTrue(Job.objects.filter(tech_tags__isnull=False).exists())
+
+        output = os.path.join(tempfile.mkdtemp(), "bench.json")
+        call_command("bench_endpoints", iterations=1, warmup=0, output=output, stdout=io.StringIO())
+        with open(output) as f:
+            report = json.load(f)
+        self.assertIn("p95_ms", report["results"]["jobs.list.tech_tags"])
+        self.assertGreater(report["results"]["jobs.list"]["queries_per_request"], 0)
+
+    @override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS={"anon": "1/min", "user": "1/min"})
+    def test_benchmark_is_not_rate_limited(self):
+        import os
+        from django.core.management import call_command
+
+        call_command("seed_synthetic", companies=2, jobs=5, portfolios=2, extra_tags=5, stdout=io.StringIO())
+        with tempfile.TemporaryDirectory() as tmpdir, self.settings(RATE_LIMIT_MMAP_PATH=f"{tmpdir}/ratelimit.bin"):
+            output = os.path.join(tmpdir, "bench.json")
+            call_command("bench_endpoints", iterations=2, warmup=1, output=output, stdout=io.StringIO())
+            self.assertTrue(os.path.exists(output))
+
+    def test_seeded_counters_match_live_jobs(self):
+        from django.core.management import call_command
+        from django.db.models import Count
+        from api.counters import reconcile_counters
+
+        call_command(
+            "seed_synthetic", companies=3, jobs=20, portfolios=2,
+            extra_tags=5, batch_size=7, stdout=io.StringIO(),
+        )
+        live = dict(
+            Job.objects.live().values("company_id").annotate(n=Count("id")).values_list("company_id", "n")
+        )
+        for company in Company.objects.all():
+            self.assertEqual(company.open_jobs_count, live.get(company.id, 0))
+        self.assertEqual(reconcile_counters(), 0)
+
+
+class RequestTimingTests(BaseAPITest):
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/jobs/")
+        timing = response["Server-Timing"]
+        for metric in ("db;dur=", "serialize;dur=", "render;dur=", "total;dur="):
+            self.assertIn(metric, timing)
+        self.assertNotIn('"0 queries"', timing)
+
+    @override_settings(REQUEST_QUERY_BUDGETS={"jobs-list": 0})
+    def test_over_budget_requests_are_flagged(self):
+        with self.assertLogs("api.timing", level="WARNING") as logs:
+            self.client.get("/api/jobs/")
+        self.assertIn('"over_budget": true', logs.output[0])
+        self.assertIn('"route": "jobs-list"', logs.output[0])
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_instrumented(self):
+        response = self.client.get("/api/jobs/")
+        self.assertFalse(response.has_header("Server-Timing"))
+
+
+class MetricsTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.metrics_dir = tempfile.mkdtemp()
+        self.override = override_settings(METRICS_MMAP_PATH=f"{self.metrics_dir}/metrics.bin")
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        super().tearDown()
+
+    @override_settings(METRICS_BEARER_TOKEN="scrape-secret")
+    def test_scrape_reports_route_histograms_and_statuses(self):
+        self.client.get("/api/jobs/")
+        self.client.get("/api/jobs/999999/")
+        self.client.generic("BREW", "/api/companies/")
+
+        body = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret").content.decode()
+        self.assertIn('api_request_duration_seconds_count{route="jobs-list"} 1', body)
+        self.assertIn('api_request_duration_seconds_bucket{route="jobs-list",le="+Inf"} 1', body)
+        self.assertIn('api_requests_total{route="jobs-detail",method="GET",status="404"} 1', body)
+        self.assertIn('api_request_queries_total{route="jobs-list"}', body)
+        self.assertIn('api_requests_total{route="companies-list",method="other"', body)
+        self.assertNotIn("BREW", body)
+
+    def test_metrics_are_shared_across_processes(self):
+        import multiprocessing
+        from api.metrics import observe_request, render_prometheus
+
+        def child():
+            observe_request("portfolios-detail", "GET", 200, 0.02, 3)
+
+        observe_request("portfolios-detail", "GET", 200, 0.01, 3)
+        process = multiprocessing.get_context("fork").Process(target=child)
+        process.start()
+        process.join()
+
+        body = render_prometheus()
+        self.assertIn('api_requests_total{route="portfolios-detail",method="GET",status="200"} 2', body)
+        self.assertIn('api_request_queries_total{route="portfolios-detail"} 6', body)
+
+    def test_scrape_is_staff_only_without_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.client.force_login(self.user_regular)
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        staff = User.objects.create_user(username="ops", password="testpass", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+    @override_settings(METRICS_BEARER_TOKEN="scrape-secret")
+    def test_scrape_token_required_when_configured(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(response.status_code, 200)
+
+
+class RequestProfilingTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.staff = User.objects.create_user(username="staff", password="testpass", role="ADMIN")
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        super().tearDown()
+
+    def test_staff_can_profile_a_request(self):
+        authenticate(self.client, "staff", "testpass")
+        response = self.client.get("/api/jobs/", HTTP_X_PROFILE="sample")
+        self.assertEqual(response.status_code, 200)
+
+        profile = RequestProfile.objects.get(id=response["X-Profile-Id"])
+        self.assertEqual(profile.route, "jobs-list")
+        self.assertGreater(profile.query_count, 0)
+        self.assertIn("sql", profile.sql[0])
+
+        detail = self.client.get(f"/api/profiles/{profile.id}/")
+        self.assertEqual(detail.status_code, 200)
+        download = self.client.get(response["X-Profile-Url"])
+        self.assertEqual(download.status_code, 200)
+
+    def test_cprofile_mode_via_query_flag(self):
+        import marshal
+
+        authenticate(self.client, "staff", "testpass")
+        response = self.client.get("/api/portfolios/?_profile=cprofile")
+        profile = RequestProfile.objects.get(id=response["X-Profile-Id"])
+        self.assertEqual(profile.mode, "cprofile")
+        with profile.profile_file.open("rb") as f:
+            self.assertIsInstance(marshal.loads(f.read()), dict)
+
+    def test_non_staff_requests_are_not_profiled(self):
+        authenticate(self.client, "regular", "testpass")
+        response = self.client.get("/api/jobs/", HTTP_X_PROFILE="sample")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("X-Profile-Id"))
+        self.assertEqual(self.client.get("/api/profiles/").status_code, 403)
+
+
+class ClaimsAuthenticationTests(BaseAPITest):
+
+    def test_authenticated_request_skips_user_lookup(self):
+        authenticate(self.client, "companyuser", "testpass")
+        self.client.get("/api/jobs/")  # warm the token version cache
+
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get("/api/jobs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('FROM "api_user"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_claims_carry_company(self):
+        authenticate(self.client, "companyuser", "testpass")
+        response = self.client.patch(f"/api/jobs/{self.job.id}/", {"title": "Senior Engineer"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_invalidates_claims(self):
+        res = self.client.post("/auth/jwt/create/", {"username": "regular", "password": "testpass"})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {res.data['access']}")
+        self.user_regular.role = "COMPANY"
+        self.user_regular.save()
+
+        # The outdated token's JOB_SEEKER claim is not trusted
+        response = self.client.post("/api/portfolios/", {"bio": "Dev", "years_experience": 1})
+        self.assertEqual(response.status_code, 403)
+
+        refreshed = self.client.post("/auth/jwt/refresh/", {"refresh": res.data["refresh"]})
+        self.assertEqual(refreshed.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {refreshed.data['access']}")
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get("/api/jobs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('FROM "api_user"' in q["sql"] for q in ctx.captured_queries))
+
+    def test_token_version_cached_briefly_in_a_process_local_cache(self):
+        from api.authentication import token_version_cache_seconds
+
+        local = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with self.settings(CACHES=local, JWT_TOKEN_VERSION_CACHE_SECONDS=300, JWT_TOKEN_VERSION_LOCAL_CACHE_SECONDS=2):
+            self.assertEqual(token_version_cache_seconds(), 2)
+        shared = {"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": tempfile.gettempdir(),
+        }}
+        with self.settings(CACHES=shared, JWT_TOKEN_VERSION_CACHE_SECONDS=300):
+            self.assertEqual(token_version_cache_seconds(), 300)
+
+    def test_ownership_transfer_invalidates_both_owners(self):
+        new_owner = User.objects.create_user(username="newowner", password="testpass", role="COMPANY")
+        versions = {
+            user.pk: User.objects.get(pk=user.pk).token_version for user in (self.user_company, new_owner)
+        }
+
+        self.company.owner = new_owner
+        self.company.save()
+
+        for user_id, version in versions.items():
+            self.assertEqual(User.objects.get(pk=user_id).token_version, version + 1)
+
+        # Saving without a new owner leaves both tokens valid
+        self.company.description = "Still new owner"
+        self.company.save()
+        self.assertEqual(User.objects.get(pk=new_owner.pk).token_version, versions[new_owner.pk] + 1)
+
+
+class RateLimitTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.override = override_settings(
+            RATE_LIMIT_ENABLED=True,
+            RATE_LIMIT_MMAP_PATH=f"{self.tmpdir}/ratelimit.bin",
+            RATE_LIMITS={"anon": "3/min", "user": "5/min", "auth": "2/min"},
+        )
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        super().tearDown()
+
+    def test_anonymous_reads_are_limited_per_ip(self):
+        for remaining in (2, 1, 0):
+            response = self.client.get("/api/jobs/")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["RateLimit-Remaining"], str(remaining))
+
+        response = self.client.get("/api/read/jobs/")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "20")
+        self.assertEqual(response["RateLimit-Policy"], "3;w=60")
+
+        other_ip = self.client.get("/api/jobs/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other_ip.status_code, 200)
+
+    def test_spoofed_forwarded_for_shares_one_bucket(self):
+        for i in range(2):
+            response = self.client.post(
+                "/auth/jwt/create/",
+                {"username": "regular", "password": "wrong"},
+                HTTP_X_FORWARDED_FOR=f"203.0.113.{i}",
+            )
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post(
+            "/auth/jwt/create/",
+            {"username": "regular", "password": "wrong"},
+            HTTP_X_FORWARDED_FOR="203.0.113.99",
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_login_attempts_are_limited(self):
+        for _ in range(2):
+            response = self.client.post("/auth/jwt/create/", {"username": "regular", "password": "wrong"})
+            self.assertEqual(response.status_code, 401)
+        response = self.client.post("/auth/jwt/create/", {"username": "regular", "password": "testpass"})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    @override_settings(RATE_LIMITS={"anon": "1/min", "user": "5/min", "anon:companies-list": "2/min"})
+    def test_route_buckets_and_users(self):
+        self.assertEqual(self.client.get("/api/companies/").status_code, 200)
+        self.assertEqual(self.client.get("/api/companies/").status_code, 200)
+        self.assertEqual(self.client.get("/api/companies/").status_code, 429)
+        self.assertEqual(self.client.get("/api/jobs/").status_code, 200)
+
+        self.client.force_authenticate(self.user_regular)
+        response = self.client.get("/api/jobs/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["RateLimit-Limit"], "5")
+
+    def test_bucket_refills(self):
+        from api.throttling import SharedTokenBuckets
+
+        buckets = SharedTokenBuckets(f"{self.tmpdir}/buckets.bin", 64)
+        self.addCleanup(buckets.close)
+        self.assertEqual(buckets.take("k", 2, 60, now=1000)[:2], (True, 1))
+        self.assertEqual(buckets.take("k", 2, 60, now=1000)[:2], (True, 0))
+        allowed, _, _, retry_after = buckets.take("k", 2, 60, now=1000)
+        self.assertFalse(allowed)
+        self.assertEqual(retry_after, 30)
+        self.assertTrue(buckets.take("k", 2, 60, now=1030)[0])
+        self.assertTrue(buckets.take("other", 2, 60, now=1000)[0])
+
+
+class SkillTaxonomyTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.job.tech_tags.add("JS", "react")
+        self.other = Job.objects.create(title="Backend Developer", company=self.company, apply_url="https://example.com")
+        self.other.tech_tags.add("javascript", "Node")
+
+    def test_tags_are_mirrored_as_canonical_ids(self):
+        from api.models import Skill
+
+        javascript = Skill.objects.get(name="JavaScript")
+        self.job.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertIn(javascript.id, self.job.skill_ids)
+        self.assertIn(javascript.id, self.other.skill_ids)
+
+        self.job.tech_tags.remove("JS")
+        self.job.refresh_from_db()
+        self.assertNotIn(javascript.id, self.job.skill_ids)
+
+    def test_filter_matches_synonyms(self):
+        response = self.client.get("/api/jobs/?tech_tags=JavaScript")
+        self.assertEqual(response.data["count"], 2)
+
+        response = self.client.get("/api/jobs/?tech_tags=reactjs,nodejs")
+        self.assertEqual(response.data["count"], 2)
+
+        response = self.client.get("/api/jobs/?tech_tags_all=js&tech_tags_all=React")
+        self.assertEqual(response.data["count"], 1)
+
+        response = self.client.get("/api/jobs/?tech_tags=cobol")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_filter_uses_skill_column_not_taggit(self):
+        from api.filters import JobFilter
+
+        sql = str(JobFilter({"tech_tags": ["js"]}, queryset=Job.objects.all()).qs.query)
+        self.assertNotIn("taggit", sql)
+
+    def test_category_filter_includes_subcategories(self):
+        response = self.client.get("/api/jobs/?skill_category=frontend")
+        self.assertEqual(response.data["count"], 1)
+        response = self.client.get("/api/jobs/?skill_category=web")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_portfolio_skills_and_taxonomy_endpoint(self):
+        portfolio = Portfolio.objects.create(user=self.user_regular)
+        portfolio.skills.add("k8s", "Python")
+
+        response = self.client.get("/api/portfolios/?skills=kubernetes")
+        self.assertEqual(response.data["count"], 1)
+
+        response = self.client.get("/api/skills/?search=k8s")
+        self.assertEqual(response.data["results"][0]["name"], "Kubernetes")
+        self.assertEqual(response.data["results"][0]["category"], "devops-cloud")
+
+    def test_rebuild_after_bulk_tagging(self):
+        from django.contrib.contenttypes.models import ContentType
+        from taggit.models import Tag, TaggedItem
+        from api.skills import rebuild_skill_ids
+
+        tag = Tag.objects.create(name="golang", slug="golang")
+        TaggedItem.objects.create(tag=tag, content_type=ContentType.objects.get_for_model(Job), object_id=self.job.id)
+        self.assertEqual(rebuild_skill_ids(Job), 1)
+        self.assertEqual(self.client.get("/api/jobs/?tech_tags=go").data["count"], 1)
+
+
+class TagAutocompleteTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        from api import autocomplete
+        autocomplete._index = None
+
+    def test_prefix_matches_synonyms_ranked_by_usage(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.tech_tags.add("java")
+            other = Job.objects.create(title="Web Developer", company=self.company, apply_url="https://example.com")
+            other.tech_tags.add("js")
+            Portfolio.objects.create(user=self.user_regular).skills.add("JavaScript")
+
+        response = self.client.get("/api/tags/autocomplete/?q=jav")
+        self.assertEqual(response.status_code, 200)
+        names = [r["name"] for r in response.data["results"]]
+        self.assertEqual(names[:2], ["JavaScript", "Java"])
+        self.assertEqual(response.data["results"][0]["count"], 2)
+
+        response = self.client.get("/api/tags/autocomplete/?q=k8&limit=1")
+        self.assertEqual([r["name"] for r in response.data["results"]], ["Kubernetes"])
+
+    def test_search_does_not_query_database(self):
+        self.client.get("/api/tags/autocomplete/?q=py")  # build the index
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get("/api/tags/autocomplete/?q=pyth")
+        self.assertEqual(response.data["results"][0]["name"], "Python")
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_usage_changes_update_the_index(self):
+        self.client.get("/api/tags/autocomplete/?q=r")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.tech_tags.add("rust")
+        response = self.client.get("/api/tags/autocomplete/?q=r&limit=1")
+        self.assertEqual(response.data["results"], [{"id": response.data["results"][0]["id"], "name": "Rust", "count": 1}])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        response = self.client.get("/api/tags/autocomplete/?q=ru&limit=1")
+        self.assertEqual(response.data["results"][0]["count"], 0)
+
+
+class JobLifecycleTests(BaseAPITest):
+
+    def expire(self, job, days_ago):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        Job.objects.filter(pk=job.pk).update(expires_at=timezone.now() - timedelta(days=days_ago))
+
+    def test_new_jobs_get_a_default_expiry(self):
+        self.assertEqual(self.job.status, Job.STATUS_ACTIVE)
+        self.assertGreater((self.job.expires_at - self.job.created_at).days, 50)
+
+    def test_expired_jobs_leave_listings_but_keep_detail(self):
+        self.expire(self.job, 1)
+        self.assertEqual(self.client.get("/api/jobs/").data["count"], 0)
+        self.assertEqual(self.client.get("/api/read/jobs/").json()["count"], 0)
+        self.assertEqual(self.client.get(f"/api/jobs/{self.job.id}/").status_code, 200)
+
+    def test_sweeper_expires_then_archives(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from api.models import ArchivedJob
+
+        self.job.tech_tags.add("python")
+        self.expire(self.job, 1)
+        call_command("expire_jobs", stdout=StringIO())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.STATUS_EXPIRED)
+
+        self.expire(self.job, 45)
+        call_command("expire_jobs", "--batch-size", "1", stdout=StringIO())
+        self.assertFalse(Job.objects.filter(pk=self.job.pk).exists())
+        self.assertTrue(ArchivedJob.objects.filter(pk=self.job.pk, company=self.company).exists())
+
+        response = self.client.get(f"/api/jobs/{self.job.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["title"], "Software Engineer")
+        self.assertEqual(response.data["status"], "EXPIRED")
+        self.assertEqual(response.data["tech_tags"], ["python"])
+
+        response = self.client.get(f"/api/read/jobs/{self.job.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/jobs/999999/").status_code, 404)
+
+    def test_extending_expiry_reopens_job(self):
+        self.expire(self.job, 1)
+        Job.objects.filter(pk=self.job.pk).update(status=Job.STATUS_EXPIRED)
+        authenticate(self.client, "companyuser", "testpass")
+
+        response = self.client.patch(f"/api/jobs/{self.job.id}/", {"expires_at": "2999-01-01T00:00:00Z"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "ACTIVE")
+
+        response = self.client.patch(f"/api/jobs/{self.job.id}/", {"expires_at": "2000-01-01T00:00:00Z"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.patch(f"/api/jobs/{self.job.id}/", {"status": "CLOSED"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get("/api/jobs/").data["count"], 0)
+
+
+class DenormalizedCounterTests(BaseAPITest):
+
+    def counts(self):
+        from api.models import Skill
+
+        self.company.refresh_from_db()
+        python = Skill.objects.get(name="Python")
+        return self.company.open_jobs_count, python.job_count, python.portfolio_count
+
+    def test_job_and_tag_changes_adjust_counters(self):
+        self.job.tech_tags.add("python")
+        Portfolio.objects.create(user=self.user_regular).skills.add("py")
+        self.assertEqual(self.counts(), (1, 1, 1))
+
+        other = Job.objects.create(title="Data Engineer", company=self.company, apply_url="https://example.com")
+        other.tech_tags.add("python")
+        self.assertEqual(self.counts(), (2, 2, 1))
+
+        other.status = Job.STATUS_CLOSED
+        other.save()
+        self.assertEqual(self.counts(), (1, 1, 1))
+
+        self.job.tech_tags.remove("python")
+        self.job.delete()
+        Portfolio.objects.all().delete()
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_expiry_sweeper_decrements_counters(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from api.lifecycle import expire_due_jobs
+
+        self.job.tech_tags.add("python")
+        Job.objects.filter(pk=self.job.pk).update(expires_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(expire_due_jobs(), 1)
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from api.models import Company, Skill
+
+        self.job.tech_tags.add("python")
+        Company.objects.update(open_jobs_count=7)
+        Skill.objects.filter(name="Python").update(job_count=0, portfolio_count=3)
+
+        out = StringIO()
+        call_command("reconcile_counters", stdout=out)
+        self.assertIn("Fixed 2 counters", out.getvalue())
+        self.assertEqual(self.counts(), (1, 1, 0))
+
+    def test_companies_order_and_filter_by_open_jobs(self):
+        other_owner = User.objects.create_user(username="other", password="testpass", role="COMPANY")
+        Company.objects.create(name="QuietCo", owner=other_owner)
+
+        response = self.client.get("/api/companies/?ordering=-open_jobs_count")
+        self.assertEqual([c["name"] for c in response.data["results"]], ["TestCo", "QuietCo"])
+        self.assertEqual(response.data["results"][0]["open_jobs_count"], 1)
+
+        response = self.client.get("/api/companies/?open_jobs_count__gte=1")
+        self.assertEqual([c["name"] for c in response.data["results"]], ["TestCo"])
+
+
+class CompanyProfileTests(BaseAPITest):
+
+    def url(self, slug=None):
+        return f"/api/companies/by-slug/{slug or self.company.slug}/profile/"
+
+    def test_profile_lists_company_live_jobs_and_tags(self):
+        self.job.tech_tags.add("python", "django")
+        Job.objects.create(
+            title="Closed Role", company=self.company, apply_url="https://example.com", status=Job.STATUS_CLOSED
+        )
+
+        response = self.client.get(self.url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["company"]["name"], "TestCo")
+        self.assertEqual([j["title"] for j in response.data["jobs"]], ["Software Engineer"])
+        self.assertNotIn("company", response.data["jobs"][0])
+        self.assertEqual(response.data["tags"], ["django", "python"])
+        self.assertEqual(self.client.get(self.url("nope")).status_code, 404)
+
+    def test_profile_uses_fixed_queries_and_is_cached(self):
+        for i in range(3):
+            job = Job.objects.create(title=f"Role {i}", company=self.company, apply_url="https://example.com")
+            job.tech_tags.add("rust")
+
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            self.client.get(self.url())
+        self.assertLessEqual(len(ctx.captured_queries), 4)
+
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get(self.url())
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(len(response.data["jobs"]), 4)
+
+    def test_company_and_job_changes_invalidate_the_profile(self):
+        self.client.get(self.url())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = "Staff Engineer"
+            self.job.save()
+        self.assertEqual(self.client.get(self.url()).data["jobs"][0]["title"], "Staff Engineer")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.tech_tags.add("go")
+        self.assertEqual(self.client.get(self.url()).data["tags"], ["go"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.description = "Updated"
+            self.company.save()
+        self.assertEqual(self.client.get(self.url()).data["company"]["description"], "Updated")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        self.assertEqual(self.client.get(self.url()).data["jobs"], [])
+
+
+@patch("api.models.User.has_active_subscription", new_callable=PropertyMock, return_value=True)
+class BulkJobTests(BaseAPITest):
+
+    def item(self, title, **fields):
+        return {
+            "title": title,
+            "description": "Build things",
+            "apply_url": "https://example.com/apply",
+            "job_type": "FT",
+            "work_mode": "REMOTE",
+            "tech_tags": ["python", "aws"],
+            **fields,
+        }
+
+    def setUp(self):
+        super().setUp()
+        authenticate(self.client, "companyuser", "testpass")
+
+    def test_creates_and_updates_in_one_request(self, _):
+        from api.models import Skill
+
+        items = [self.item(f"Role {i}") for i in range(20)]
+        items.append({"id": self.job.id, "title": "Staff Engineer", "tech_tags": ["python"]})
+        with CaptureQueriesContext(connections["default"]) as small:
+            response = self.client.post("/api/jobs/bulk/", items[-2:], format="json")
+        self.assertEqual(response.status_code, 201)
+
+        with CaptureQueriesContext(connections["default"]) as large:
+            response = self.client.post("/api/jobs/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(response.data["created"]), 20)
+        self.assertEqual(response.data["updated"], [self.job.id])
+        self.assertLessEqual(len(large.captured_queries), len(small.captured_queries) + 2)
+
+        job = Job.objects.get(pk=response.data["created"][0])
+        self.assertEqual(job.company_id, self.company.id)
+        self.assertEqual(job.posted_by_id, self.user_company.id)
+        self.assertEqual(sorted(job.tech_tags.names()), ["aws", "python"])
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.title, "Staff Engineer")
+        self.assertEqual(list(self.job.tech_tags.names()), ["python"])
+
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.open_jobs_count, 22)
+        self.assertEqual(Skill.objects.get(name="Python").job_count, 22)
+        self.assertEqual(Skill.objects.get(name="AWS").job_count, 21)
+
+    def test_errors_are_reported_per_item_and_nothing_is_written(self, _):
+        other = Company.objects.create(name="OtherCo")
+        other_job = Job.objects.create(title="Theirs", company=other, apply_url="https://example.com")
+        items = [
+            self.item("Fine"),
+            self.item("Bad", work_mode="ONSITE", is_remote_friendly=True),
+            {"id": other_job.id, "title": "Mine now"},
+            {"id": 999999, "title": "Missing"},
+        ]
+        response = self.client.post("/api/jobs/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["errors"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("work_mode", errors[1])
+        self.assertIn("id", errors[2])
+        self.assertIn("id", errors[3])
+        self.assertFalse(Job.objects.filter(title="Fine").exists())
+
+    def test_requires_a_subscription(self, has_subscription):
+        has_subscription.return_value = False
+        response = self.client.post("/api/jobs/bulk/", [self.item("Role")], format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+class SavedSearchAlertTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        from api import percolator
+        percolator._index = None
+        authenticate(self.client, "regular", "testpass")
+
+    def save_search(self, query, name="Search"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/api/saved-searches/", {"name": name, "query": query}, format="json")
+
+    def post_job(self, tags, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(
+                title="New Role", company=self.company, apply_url="https://example.com", **fields
+            )
+            job.tech_tags.add(*tags)
+        return job
+
+    def test_new_jobs_match_saved_searches(self):
+        self.assertEqual(self.save_search({"tech_tags_all": ["python", "django"], "work_mode": "REMOTE"}).status_code, 201)
+        self.save_search({"tech_tags": ["rust", "go"]}, name="Systems")
+        self.save_search({"job_type": "CT"}, name="Contracts")
+        self.save_search({}, name="Everything")
+
+        python = self.post_job(["python", "django"])
+        python_only = self.post_job(["python"])
+        contract_go = self.post_job(["golang"], job_type="CT")
+
+        response = self.client.get("/api/job-alerts/")
+        matched = {(a["job"]["id"], a["saved_search"]) for a in response.data["results"]}
+        searches = {s["name"]: s["id"] for s in self.client.get("/api/saved-searches/").data["results"]}
+        self.assertEqual(matched, {
+            (python.id, searches["Search"]),
+            (python.id, searches["Everything"]),
+            (python_only.id, searches["Everything"]),
+            (contract_go.id, searches["Systems"]),
+            (contract_go.id, searches["Contracts"]),
+            (contract_go.id, searches["Everything"]),
+        })
+
+    def test_index_buckets_searches_by_most_selective_predicate(self):
+        from api.percolator import MATCH_ALL, SavedSearchIndex
+
+        frequencies = {("skill_ids", 1): 500, ("skill_ids", 2): 3, ("work_mode", "REMOTE"): 900, ("job_type", "CT"): 40}
+        index = SavedSearchIndex([
+            (1, 10, [1, 2], True, {"work_mode": "REMOTE"}),
+            (2, 10, [1, 2], False, {"job_type": "CT"}),
+            (3, 10, [], False, {}),
+        ], frequencies)
+        self.assertEqual(index.buckets[("skill_ids", 2)], [1])
+        self.assertEqual(index.buckets[("job_type", "CT")], [2])
+        self.assertEqual(index.buckets[MATCH_ALL], [3])
+
+        job = {"skill_ids": [1], "company_id": 5, "job_type": "FT", "work_mode": "REMOTE",
+               "remote_level": None, "async_level": None, "is_remote_friendly": False}
+        self.assertEqual(index.candidates(job), {3})
+
+    def test_invalid_queries_are_rejected(self):
+        self.assertEqual(self.save_search({"tech_tags": ["no-such-skill-xyz"]}).status_code, 400)
+        self.assertEqual(self.save_search({"work_mode": "MOON"}).status_code, 400)
+        self.assertEqual(self.save_search({"search": "python"}).status_code, 400)
+
+    def test_searches_are_private(self):
+        self.save_search({"tech_tags": ["python"]})
+        authenticate(self.client, "companyuser", "testpass")
+        self.assertEqual(self.client.get("/api/saved-searches/").data["count"], 0)
+
+
+class AlertDigestTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        from api.models import JobAlert, SavedSearch
+        from api.smtp_debug import DebugSMTPServer
+
+        self.server = DebugSMTPServer(("127.0.0.1", 0))
+        self.server.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        smtp = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.server.port,
+            EMAIL_USE_TLS=False,
+            EMAIL_DIGEST_RATE="1000/s",
+            EMAIL_DIGEST_RETRY_BACKOFF=0,
+        )
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+
+        self.user_regular.email = "seeker@example.com"
+        self.user_regular.save()
+        search = SavedSearch.objects.create(user=self.user_regular, name="Python jobs")
+        other = Job.objects.create(title="Data Engineer", company=self.company, apply_url="https://example.com")
+        for job in (self.job, other):
+            JobAlert.objects.create(saved_search=search, user=self.user_regular, job=job)
+
+    def test_digest_is_sent_once_over_smtp(self):
+        from api.digests import send_alert_digests
+        from api.models import JobAlert
+
+        self.assertEqual(send_alert_digests(), (1, 0))
+        self.assertEqual(len(self.server.messages), 1)
+        sender, recipients, message = self.server.messages[0]
+        self.assertEqual(recipients, ["<seeker@example.com>"])
+        self.assertEqual(message["Subject"], "2 new jobs matching your saved searches")
+        body = message.get_body(("plain",)).get_content()
+        self.assertIn("Software Engineer at TestCo (Python jobs)", body)
+        self.assertIn("Data Engineer", body)
+        self.assertFalse(JobAlert.objects.filter(notified_at__isnull=True).exists())
+
+        self.assertEqual(send_alert_digests(), (0, 0))
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_temporary_failures_are_retried(self):
+        import smtplib
+        from django.core.mail.backends.smtp import EmailBackend
+        from api.digests import send_alert_digests
+
+        real_send = EmailBackend.send_messages
+        calls = []
+
+        def flaky_send(backend, messages):
+            calls.append(1)
+            if len(calls) == 1:
+                raise smtplib.SMTPServerDisconnected("gone")
+            return real_send(backend, messages)
+
+        with patch.object(EmailBackend, "send_messages", flaky_send):
+            self.assertEqual(send_alert_digests(), (1, 0))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(self.server.messages), 1)
+
+    def test_failed_digests_stay_pending(self):
+        import smtplib
+        from django.core.mail.backends.smtp import EmailBackend
+        from api.digests import send_alert_digests
+        from api.models import JobAlert
+
+        with override_settings(EMAIL_DIGEST_RETRIES=1), patch.object(
+            EmailBackend, "send_messages", side_effect=smtplib.SMTPServerDisconnected("gone")
+        ):
+            self.assertEqual(send_alert_digests(), (0, 1))
+        self.assertEqual(JobAlert.objects.filter(notified_at__isnull=True).count(), 2)
+
+
+class JobEventTests(BaseAPITest):
+
+    def setUp(self):
+        super().setUp()
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        settings = override_settings(EVENT_LOG_DIR=self.log_dir, EVENT_BUFFER_SIZE=1000)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_events_are_buffered_then_compacted(self):
+        import time
+        from api.events import compact_event_logs, get_buffer
+        from api.models import JobEvent
+
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.post("/api/events/", {"job": self.job.id, "type": "view"}, format="json")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        response = self.client.post("/api/events/", {"events": [
+            {"job": self.job.id, "type": "view"},
+            {"job": self.job.id, "type": "apply"},
+            {"job": 999999, "type": "view"},
+        ]}, format="json")
+        self.assertEqual(response.data["accepted"], 3)
+
+        get_buffer().flush()
+        self.assertEqual(compact_event_logs(), 0)  # current segment still open
+        later = time.time() + 3600
+        self.assertEqual(compact_event_logs(now=later), 3)
+        self.assertEqual(
+            sorted(JobEvent.objects.filter(company=self.company).values_list("kind", flat=True)),
+            ["apply", "view", "view"],
+        )
+        self.assertEqual(os.listdir(self.log_dir), [])
+        self.assertEqual(compact_event_logs(now=later), 0)
+
+    def test_logs_are_loaded_only_once(self):
+        from api.events import load_log
+        from api.models import JobEvent
+
+        path = os.path.join(self.log_dir, "events-1-1.log")
+        with open(path, "w") as f:
+            f.write(f"1700000000.0\tview\t{self.job.id}\tabc\t\nnot a valid line\n")
+        self.assertEqual(len(load_log(path, "events-1-1.log", 100)), 1)
+        self.assertEqual(load_log(path, "events-1-1.log", 100), [])
+        self.assertEqual(JobEvent.objects.count(), 1)
+
+    def test_late_writes_to_a_compacted_segment_are_kept(self):
+        from api.events import compact_event_logs
+        from api.models import JobEvent
+
+        path = os.path.join(self.log_dir, "events-1-1.log")
+        active = os.path.join(self.log_dir, "events-2-1.log")
+        for name in (path, active):
+            with open(name, "w") as f:
+                f.write(f"1700000000.0\tview\t{self.job.id}\tabc\t\n")
+        segment_seconds = 60
+        with override_settings(EVENT_LOG_SEGMENT_SECONDS=segment_seconds):
+            self.assertEqual(compact_event_logs(now=2 * segment_seconds), 1)
+            self.assertEqual(os.listdir(self.log_dir), ["events-2-1.log"])
+
+            # A worker that picked the old segment before it ended appends after compaction
+            with open(path, "a") as f:
+                f.write(f"1700000000.0\tapply\t{self.job.id}\tabc\t\n")
+            self.assertEqual(compact_event_logs(now=2 * segment_seconds), 1)
+        self.assertEqual(sorted(JobEvent.objects.values_list("kind", flat=True)), ["apply", "view"])
+
+    def test_invalid_events_are_rejected(self):
+        self.assertEqual(self.client.post("/api/events/", {"job": "x", "type": "view"}, format="json").status_code, 400)
+        self.assertEqual(self.client.post("/api/events/", {"job": 1, "type": "like"}, format="json").status_code, 400)
+        self.assertEqual(self.client.post("/api/events/", {"events": []}, format="json").status_code, 400)
+
+
+class AnalyticsRollupTests(BaseAPITest):
+
+    def event(self, kind, days_ago=0, user=None, job=None):
+        from datetime import timedelta
+        from django.utils import timezone
+        from api.models import JobEvent
+
+        return JobEvent.objects.create(
+            job_id=(job or self.job).id,
+            company=self.company,
+            kind=kind,
+            user_id=user.id if user else None,
+            occurred_at=timezone.now() - timedelta(days=days_ago),
+        )
+
+    def test_rollups_are_incremental_and_feed_the_dashboards(self):
+        from api.analytics import roll_up_events
+        from api.models import JobDailyStats
+
+        portfolio = Portfolio.objects.create(user=self.user_regular)
+        portfolio.skills.add("python", "django")
+        for _ in range(3):
+            self.event("view")
+        self.event("view", days_ago=1)
+        self.event("apply", user=self.user_regular)
+        self.assertEqual(roll_up_events(batch_size=2), 5)
+
+        self.event("view")
+        self.event("apply", user=self.user_regular)  # same applicant again
+        self.assertEqual(roll_up_events(), 2)
+        self.assertEqual(roll_up_events(), 0)
+        self.assertEqual(JobDailyStats.objects.count(), 2)
+
+        authenticate(self.client, "companyuser", "testpass")
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get(f"/api/companies/{self.company.id}/analytics/?days=7")
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(ctx.captured_queries), 10)
+        self.assertEqual(response.data["jobs"], [
+            {"job_id": self.job.id, "views": 5, "apply_clicks": 2, "title": "Software Engineer"},
+        ])
+        self.assertEqual([d["views"] for d in response.data["daily"]], [1, 4])
+        self.assertEqual(
+            sorted(response.data["applicant_skills"], key=lambda s: s["skill"]),
+            [{"skill": "Django", "applicants": 1}, {"skill": "Python", "applicants": 1}],
+        )
+
+        response = self.client.get(f"/api/jobs/{self.job.id}/analytics/?days=1")
+        self.assertEqual([d["views"] for d in response.data["daily"]], [4])
+
+    def test_dashboards_are_private_to_the_company(self):
+        self.assertEqual(self.client.get(f"/api/companies/{self.company.id}/analytics/").status_code, 401)
+        authenticate(self.client, "regular", "testpass")
+        self.assertEqual(self.client.get(f"/api/companies/{self.company.id}/analytics/").status_code, 403)
+        self.assertEqual(self.client.get(f"/api/jobs/{self.job.id}/analytics/").status_code, 403)
+
+
+class JobLocationTests(BaseAPITest):
+
+    def make_job(self, title, location):
+        return Job.objects.create(
+            title=title,
+            description="Dev work",
+            company=self.company,
+            apply_url="https://example.com/apply",
+            location=location,
+            work_mode="HYBRID",
+        )
+
+    def titles(self, query):
+        response = self.client.get(f"/api/jobs/?{query}")
+        self.assertEqual(response.status_code, 200)
+        return sorted(job["title"] for job in response.data["results"])
+
+    def test_location_is_resolved_on_save(self):
+        job = self.make_job("Austin", "Austin, TX")
+        self.assertEqual((job.region, job.country, job.timezone), ("TX", "US", "America/Chicago"))
+        self.assertEqual(job.utc_offset_minutes, -360)
+        self.assertAlmostEqual(job.latitude, 30.2672)
+
+        job.location = "Remote"
+        job.save()
+        self.assertIsNone(job.latitude)
+        self.assertIsNone(job.country)
+
+        self.assertEqual(self.make_job("Portland", "Portland, Maine").region, "ME")
+        self.assertEqual(self.make_job("Berlin", "Berlin (hybrid)").country, "DE")
+
+    def test_radius_region_and_country_filters(self):
+        self.make_job("Atlanta", "Atlanta, GA")
+        self.make_job("Marietta", "Marietta, GA")
+        self.make_job("Savannah", "Savannah, GA")
+        self.make_job("Toronto", "Toronto, Canada")
+
+        self.assertEqual(self.titles("near=Atlanta&radius_km=50"), ["Atlanta", "Marietta"])
+        self.assertEqual(self.titles("near=33.75,-84.39&radius_km=400"), ["Atlanta", "Marietta", "Savannah"])
+        self.assertEqual(self.titles("region=ga"), ["Atlanta", "Marietta", "Savannah"])
+        self.assertEqual(self.titles("country=Canada"), ["Toronto"])
+        self.assertEqual(self.client.get("/api/jobs/?near=Atlantis").status_code, 400)
+        self.assertEqual(self.client.get("/api/jobs/?near=Atlanta&radius_km=100000").status_code, 400)
+
+    def test_timezone_overlap_filter(self):
+        self.make_job("New York", "New York, NY")
+        self.make_job("London", "London, UK")
+        self.make_job("Tokyo", "Tokyo")
+        self.make_job("Auckland", "Auckland")
+        self.make_job("Honolulu", "Honolulu, HI")
+
+        self.assertEqual(self.titles("work_timezone=America/Chicago&min_overlap_hours=6"), ["New York"])
+        self.assertEqual(self.titles("work_timezone=%2B01:00&min_overlap_hours=3"), ["London"])
+        # Offsets wrap around the date line: UTC+12 and UTC-10 are 2 hours apart.
+        self.assertEqual(self.titles("work_timezone=Pacific/Auckland&min_overlap_hours=6"), ["Auckland", "Honolulu"])
+        self.assertEqual(self.client.get("/api/jobs/?work_timezone=Mars/Olympus").status_code, 400)
+
+
+class SalaryRangeTests(BaseAPITest):
+
+    def make_job(self, title, min_salary=None, max_salary=None, **fields):
+        return Job.objects.create(
+            title=title,
+            description="Dev work",
+            company=self.company,
+            apply_url="https://example.com/apply",
+            min_salary=min_salary,
+            max_salary=max_salary,
+            **fields,
+        )
+
+    def test_salary_range_overlap_filter(self):
+        # self.job pays 100k-150k
+        self.make_job("Junior", 50000, 70000)
+        self.make_job("Staff", 180000, 220000)
+        self.make_job("Floor only", min_salary=90000)
+        self.make_job("Unknown")
+
+        def titles(query):
+            return sorted(job["title"] for job in self.client.get(f"/api/jobs/?{query}").data["results"])
+
+        self.assertEqual(titles("salary_min=140000&salary_max=190000"), ["Software Engineer", "Staff"])
+        self.assertEqual(titles("salary_min=80000&salary_max=95000"), ["Floor only"])
+        self.assertEqual(titles("salary_max=60000"), ["Junior"])
+
+    def test_histogram_counts_filtered_live_jobs_and_is_cached(self):
+        self.make_job("Junior", 50000, 70000)
+        self.make_job("Mid", 95000, 125000)
+        self.make_job("Onsite", 101000, work_mode="ONSITE")
+        self.make_job("Closed", 100000, 120000, status=Job.STATUS_CLOSED)
+
+        response = self.client.get("/api/jobs/salary-histogram/?bucket_size=20000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 4)
+        self.assertEqual(response.data["buckets"], [
+            {"min": 60000, "max": 80000, "count": 1},
+            {"min": 100000, "max": 120000, "count": 2},
+            {"min": 120000, "max": 140000, "count": 1},
+        ])
+
+        response = self.client.get("/api/jobs/salary-histogram/?bucket_size=20000&work_mode=REMOTE")
+        self.assertEqual(response.data["total"], 3)
+
+        with patch("api.salaries.salary_histogram") as compute:
+            response = self.client.get("/api/jobs/salary-histogram/?work_mode=REMOTE&bucket_size=20000&page=2")
+        compute.assert_not_called()
+        self.assertEqual(response.data["total"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.make_job("Senior", 150000, 170000)
+        response = self.client.get("/api/jobs/salary-histogram/?bucket_size=20000&work_mode=REMOTE")
+        self.assertEqual(response.data["total"], 4)
+
+
+class SparseFieldsetTests(BaseAPITest):
+
+    def test_fields_shape_payload_and_query(self):
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get("/api/jobs/?fields=id,title")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"], [{"id": self.job.id, "title": "Software Engineer"}])
+        job_queries = [q["sql"] for q in ctx.captured_queries if 'FROM "api_job"' in q["sql"]]
+        self.assertTrue(job_queries)
+        self.assertFalse(any('"description"' in sql or '"benefits"' in sql for sql in job_queries))
+        self.assertFalse(any("taggit" in q["sql"] for q in ctx.captured_queries))
+
+        response = self.client.get(f"/api/jobs/{self.job.id}/?omit=description,benefits")
+        self.assertNotIn("description", response.data)
+        self.assertEqual(response.data["requirements"], "Python")
+
+    def test_summary_view(self):
+        self.job.tech_tags.add("python")
+        Portfolio.objects.create(user=self.user_regular, bio="Long bio")
+
+        job = self.client.get("/api/jobs/?view=summary").data["results"][0]
+        self.assertEqual(job["company"]["name"], "TestCo")
+        self.assertEqual(job["tech_tags"], ["python"])
+        for name in ("description", "responsibilities", "requirements", "benefits", "interview_process"):
+            self.assertNotIn(name, job)
+
+        company = self.client.get("/api/companies/?view=summary").data["results"][0]
+        self.assertNotIn("description", company)
+        self.assertEqual(company["logo_variants"], {})
+
+        portfolio = self.client.get("/api/portfolios/?view=summary").data["results"][0]
+        self.assertNotIn("bio", portfolio)
+        self.assertNotIn("projects", portfolio)
+
+    def test_unknown_fields_are_rejected(self):
+        self.assertEqual(self.client.get("/api/jobs/?fields=id,salary").status_code, 400)
+        self.assertEqual(self.client.get("/api/companies/?omit=secret").status_code, 400)
+        self.assertEqual(self.client.get("/api/portfolios/?view=full").status_code, 400)
+
+
+class BatchRetrieveTests(BaseAPITest):
+
+    def test_jobs_come_back_in_request_order_with_missing_ids(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from api.lifecycle import archive_jobs
+
+        jobs = []
+        for i in range(3):
+            job = Job.objects.create(
+                title=f"Job {i}",
+                description="Dev work",
+                company=self.company,
+                apply_url="https://example.com/apply",
+            )
+            job.tech_tags.add("python")
+            jobs.append(job)
+        Job.objects.filter(pk=jobs[0].pk).update(
+            status=Job.STATUS_CLOSED,
+            updated_at=timezone.now() - timedelta(days=365),
+        )
+        self.assertEqual(archive_jobs(), 1)
+
+        ids = [jobs[2].id, 999999, jobs[0].id, self.job.id, jobs[1].id]
+        with CaptureQueriesContext(connections["default"]) as ctx:
+            response = self.client.get(f"/api/jobs/batch/?ids={','.join(map(str, ids))}&view=summary")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job["id"] for job in response.data["results"]], [jobs[2].id, jobs[0].id, self.job.id, jobs[1].id])
+        self.assertEqual(response.data["missing"], [999999])
+        self.assertEqual(response.data["results"][0]["tech_tags"], ["python"])
+        self.assertNotIn("description", response.data["results"][1])  # archived
+        self.assertLess(len(ctx.captured_queries), 8)
+
+    def test_companies_and_portfolios(self):
+        portfolio = Portfolio.objects.create(user=self.user_regular)
+        response = self.client.get(f"/api/companies/batch/?ids={self.company.id}&ids=424242")
+        self.assertEqual([c["name"] for c in response.data["results"]], ["TestCo"])
+        self.assertEqual(response.data["missing"], [424242])
+
+        response = self.client.get(f"/api/portfolios/batch/?ids={portfolio.id},{portfolio.id}")
+        self.assertEqual([p["id"] for p in response.data["results"]], [portfolio.id])
+
+    def test_invalid_batches_are_rejected(self):
+        self.assertEqual(self.client.get("/api/jobs/batch/").status_code, 400)
+        self.assertEqual(self.client.get("/api/jobs/batch/?ids=1,abc").status_code, 400)
+        with self.settings(BATCH_MAX_IDS=2):
+            self.assertEqual(self.client.get("/api/jobs/batch/?ids=1,2,3").status_code, 400)
@@ -0,0 +1,249 @@
+"""
+Token-bucket rate limiting for the API (DRF throttle classes).
+
+Buckets are configured in settings.RATE_LIMITS as "<count>/<period>"; a
+client may burst up to <count> requests and then gets one more every
+period/count seconds. Scopes:
+
+  anon   per client IP, every API request of an anonymous client
+  user   per user ID, every API request of an authenticated user
+  auth   per client IP, unsafe requests to the Djoser/JWT endpoints
+         (login, registration, password reset) on top of anon/user
+
+"<scope>:<route name>" entries (e.g. "anon:jobs-list") give a route its own
+bucket instead of sharing the scope-wide one.
+
+With RATE_LIMIT_BACKEND = "local" the buckets live in a memory-mapped
+table (RATE_LIMIT_MMAP_PATH) shared by all workers of a host, updated under
+a byte-range fcntl lock: no network round trip, a few microseconds per
+request. Limits are then per host. "cache" uses fixed-window counters in
+the default cache (atomic incr), which is shared across hosts when it is
+Redis/Memcached. That backend is not a token bucket: a client may send up
+to twice the limit around a window boundary.
+
+Client IPs come from DRF's get_ident(), which only reads X-Forwarded-For
+when REST_FRAMEWORK["NUM_PROXIES"] says how many trusted proxies set it.
+
+Each response carries RateLimit-Limit/-Remaining/-Reset/-Policy headers
+(api.middleware.RateLimitHeadersMiddleware); throttled requests get a 429
+with Retry-After.
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+MAGIC = b"ASKRATE1"
+HEADER = struct.Struct("<8sI")
+SLOT = struct.Struct("<Qd")  # key hash, theoretical arrival time
+PROBES = 4
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+AUTH_VIEW_MODULES = ("djoser.", "rest_framework_simplejwt.")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def parse_rate(rate):
+    """'120/min' -> (120, 60.0)"""
+    count, period = rate.split("/")
+    return int(count), float(PERIODS[period.strip()[0]])
+
+
+def key_hash(key):
+    # Python's hash() differs per process; the table is shared between them.
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+
+class SharedTokenBuckets:
+    """
+    Fixed-size open-addressed table of GCRA token buckets in a shared file.
+
+    A key probes PROBES consecutive slots; when all hold other live keys the
+    one that refills first is evicted, so the table never fills up.
+    """
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.pid = os.getpid()
+        self.thread_lock = threading.Lock()
+
+        size = HEADER.size + capacity * SLOT.size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+            self.map = mmap.mmap(self.fd, size)
+            magic, stored_capacity = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC:
+                HEADER.pack_into(self.map, 0, MAGIC, capacity)
+                stored_capacity = capacity
+            self.capacity = min(stored_capacity, capacity)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+    def take(self, key, limit, period, now=None):
+        """
+        Takes a token from key's bucket. Returns (allowed, remaining, reset,
+        retry_after); reset is the number of seconds until the bucket is full.
+        """
+        now = time.time() if now is None else now
+        interval = period / limit
+        burst = period  # limit * interval
+        digest = key_hash(key)
+        first = digest % (self.capacity - PROBES + 1)
+        start = HEADER.size + first * SLOT.size
+
+        with self.thread_lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, PROBES * SLOT.size, start)
+            try:
+                offset, tat = self._find(digest, start, now)
+                tat = max(tat, now)
+                allow_at = tat + interval - burst
+                if now < allow_at:
+                    return False, 0, tat - now, allow_at - now
+                tat += interval
+                SLOT.pack_into(self.map, offset, digest, tat)
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, PROBES * SLOT.size, start)
+
+        remaining = int((now - (tat - burst)) // interval)
+        return True, remaining, tat - now, 0
+
+    def _find(self, digest, start, now):
+        victim, victim_tat = start, math.inf
+        for offset in range(start, start + PROBES * SLOT.size, SLOT.size):
+            stored, tat = SLOT.unpack_from(self.map, offset)
+            if stored == digest:
+                return offset, tat
+            if stored == 0 or tat <= now:
+                return offset, now
+            if tat < victim_tat:
+                victim, victim_tat = offset, tat
+        return victim, now
+
+
+_buckets = None
+_buckets_lock = threading.Lock()
+
+
+def get_buckets():
+    """The bucket table for this process (re-opened after fork or a path change)."""
+    global _buckets
+    current = _buckets
+    path = str(settings.RATE_LIMIT_MMAP_PATH)
+    if current is not None and current.pid == os.getpid() and current.path == path:
+        return current
+
+    with _buckets_lock:
+        if _buckets is None or _buckets.pid != os.getpid() or _buckets.path != path:
+            _buckets = SharedTokenBuckets(path, settings.RATE_LIMIT_MAX_KEYS)
+        return _buckets
+
+
+def take_from_cache(key, limit, period, now=None):
+    """
+    Fixed-window counterpart of SharedTokenBuckets.take() on the default
+    cache: `limit` requests per aligned window of `period` seconds, with no
+    smoothing across windows (the cache offers no atomic compare-and-set for
+    a GCRA timestamp).
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    reset = (window + 1) * period - now
+    cache_key = f"ratelimit:{key}:{window}"
+    cache.add(cache_key, 0, int(period) + 1)
+    try:
+        count = cache.incr(cache_key)
+    except ValueError:  # expired between add() and incr()
+        cache.set(cache_key, 1, int(period) + 1)
+        count = 1
+    if count > limit:
+        return False, 0, reset, reset
+    return True, limit - count, reset, 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class: subclasses pick the scope and identity of the bucket."""
+
+    def get_scope(self, request, view):
+        raise NotImplementedError
+
+    def get_bucket_ident(self, request, scope):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        if not settings.RATE_LIMIT_ENABLED:
+            return True
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+
+        match = request.resolver_match
+        route = match.url_name if match is not None else None
+        rates = settings.RATE_LIMITS
+        if route and f"{scope}:{route}" in rates:
+            scope = f"{scope}:{route}"
+        rate = rates.get(scope)
+        if not rate:
+            return True
+
+        limit, period = parse_rate(rate)
+        key = f"{scope}|{self.get_bucket_ident(request, scope)}"
+        if settings.RATE_LIMIT_BACKEND == "cache":
+            allowed, remaining, reset, retry_after = take_from_cache(key, limit, period)
+        else:
+            allowed, remaining, reset, retry_after = get_buckets().take(key, limit, period)
+
+        self.record(request, limit, period, remaining, reset)
+        if not allowed:
+            self.retry_after = retry_after
+        return allowed
+
+    def record(self, request, limit, period, remaining, reset):
+        # Reported by RateLimitHeadersMiddleware; the tightest bucket wins.
+        current = getattr(request._request, "rate_limit", None)
+        if current is None or remaining < current["remaining"]:
+            request._request.rate_limit = {
+                "limit": limit,
+                "remaining": remaining,
+                "reset": math.ceil(reset),
+                "policy": f"{limit};w={int(period)}",
+            }
+
+    def wait(self):
+        return self.retry_after
+
+
+class ClientRateThrottle(TokenBucketThrottle):
+    """Every API request: per user when authenticated, per IP otherwise."""
+
+    def get_scope(self, request, view):
+        return "user" if request.user and request.user.is_authenticated else "anon"
+
+    def get_bucket_ident(self, request, scope):
+        if scope.startswith("user"):
+            return request.user.pk
+        return self.get_ident(request)
+
+
+class AuthRateThrottle(TokenBucketThrottle):
+    """Login, registration and password-reset attempts, per IP."""
+
+    def get_scope(self, request, view):
+        if request.method in SAFE_METHODS or not type(view).__module__.startswith(AUTH_VIEW_MODULES):
+            return None
+        return "auth"
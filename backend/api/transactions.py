@@ -0,0 +1,43 @@
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+LOCKED_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(m in str(exc) for m in LOCKED_MESSAGES)
+
+
+def write_transaction(func, *args, using="default", **kwargs):
+    """
+    Runs func in its own atomic block, retrying with jittered exponential
+    backoff when SQLite reports the database is locked by another writer.
+
+    Inside an outer transaction the call runs once: retrying half a
+    transaction is not possible, so the outer caller has to handle it.
+    """
+    if connections[using].in_atomic_block:
+        return func(*args, **kwargs)
+
+    attempts = settings.SQLITE_WRITE_RETRIES
+    delay = settings.SQLITE_WRITE_RETRY_BACKOFF
+    for attempt in range(attempts + 1):
+        try:
+            with transaction.atomic(using=using):
+                return func(*args, **kwargs)
+        except OperationalError as exc:
+            if not is_lock_error(exc) or attempt == attempts:
+                raise
+        time.sleep(delay * (2 ** attempt) * (0.5 + random.random()))
+
+
+def retry_on_locked(func):
+    """Decorator form of write_transaction()."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return write_transaction(func, *args, **kwargs)
+    return wrapper
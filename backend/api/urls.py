@@ -1,14 +1,24 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
+
 from .views import (
     CompanyViewSet,
+    JobAlertViewSet,
     JobViewSet,
     PortfolioViewSet,
     ProjectViewSet,
+    RequestProfileViewSet,
+    SavedSearchViewSet,
+    SkillViewSet,
+    TagAutocompleteView,
+    JobEventView,
+    ResumeDownloadView,
     CreateJobPostingCheckoutView,
     CreateSubscriptionCheckoutView,
     JobCreditWebhookView,
+    logo_derivative,
 )
 
 router = DefaultRouter()
@@ -16,10 +26,38 @@ router.register(r"companies", CompanyViewSet, basename="companies")
 router.register(r"jobs", JobViewSet, basename="jobs")
 router.register(r"portfolios", PortfolioViewSet, basename="portfolios")
 router.register(r"projects", ProjectViewSet, basename="projects")
+router.register(r"profiles", RequestProfileViewSet, basename="profiles")
+router.register(r"skills", SkillViewSet, basename="skills")
+router.register(r"saved-searches", SavedSearchViewSet, basename="saved-searches")
+router.register(r"job-alerts", JobAlertViewSet, basename="job-alerts")
 
 urlpatterns = [
     path("", include(router.urls)),
 
+    # Async-native read paths for ASGI deployments (same payloads as the viewsets)
+    path("read/jobs/", async_views.job_list, name="async-jobs-list"),
+    path("read/jobs/<int:pk>/", async_views.job_detail, name="async-jobs-detail"),
+    path("read/companies/", async_views.company_list, name="async-companies-list"),
+    path("read/companies/<int:pk>/", async_views.company_detail, name="async-companies-detail"),
+    path("read/portfolios/", async_views.portfolio_list, name="async-portfolios-list"),
+    path("read/portfolios/<int:pk>/", async_views.portfolio_detail, name="async-portfolios-detail"),
+
+    # Skill suggestions for tag inputs (in-memory prefix index)
+    path("tags/autocomplete/", TagAutocompleteView.as_view(), name="tags-autocomplete"),
+
+    # Job view/apply-click beacons (buffered, see api.events)
+    path("events/", JobEventView.as_view(), name="job-events"),
+
+    # Content-hashed company logo thumbnails (long-lived cache headers)
+    re_path(
+        r"^logos/(?P<name>[0-9a-f]{20}-\d+\.(?:png|webp))$",
+        logo_derivative,
+        name="logo-derivative",
+    ),
+
+    # Resume downloads (served by the web server via X-Accel-Redirect/X-Sendfile)
+    path("users/<int:pk>/resume/", ResumeDownloadView.as_view(), name="user-resume"),
+
     # Nested routes for portfolio projects
     path("portfolios/<int:portfolio_pk>/projects/", ProjectViewSet.as_view({"get": "list", "post": "create"}), name="portfolio-projects"),
 
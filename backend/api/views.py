@@ -1,27 +1,134 @@
 import stripe
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse
 from rest_framework import viewsets, permissions, status, filters
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotAuthenticated, PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from djstripe.models import Customer
-from .models import User, Company, Job, Portfolio, Project
-from .serializers import CompanySerializer, JobSerializer, PortfolioSerializer, ProjectSerializer
+from .models import User, ArchivedJob, Company, Job, JobAlert, Portfolio, Project, RequestProfile, SavedSearch, Skill
+from .serializers import (
+    CompanySerializer,
+    JobAlertSerializer,
+    JobSerializer,
+    PortfolioSerializer,
+    ProjectSerializer,
+    RequestProfileSerializer,
+    SavedSearchSerializer,
+    SkillSerializer,
+)
 from .filters import JobFilter, CompanyFilter, PortfolioFilter
-from .permissions import ensure_user_can_post_job
+from .permissions import IsStaffUser, ensure_user_can_post_job, is_staff_user
+from .analytics import company_dashboard, job_dashboard
+from .authentication import bump_token_version
+from .autocomplete import get_index
+from .bulk_jobs import bulk_write_jobs, ensure_user_can_bulk_post, validate_items
+from .company_profile import company_profile
+from .events import KINDS as EVENT_KINDS, get_buffer, visitor_hash
+from .images import DERIVATIVE_DIR
+from .lifecycle import archived_job_data, archived_jobs_data
+from .metrics import render_prometheus
+from .salaries import cached_salary_histogram
+from .sparse_fields import SparseFieldsViewMixin
+from .storage import sendfile_response
+from .transactions import write_transaction
 from .filters import JobFilter, CompanyFilter
 from rest_framework.pagination import PageNumberPagination
 
 stripe.api_key = settings.STRIPE_LIVE_SECRET_KEY
 
 
+def analytics_days(request):
+    try:
+        return min(max(int(request.query_params.get("days", 30)), 1), settings.ANALYTICS_MAX_DAYS)
+    except ValueError:
+        return 30
+
+
+def histogram_bucket_size(request):
+    try:
+        size = int(request.query_params.get("bucket_size", settings.SALARY_HISTOGRAM_BUCKET_SIZE))
+    except ValueError:
+        return settings.SALARY_HISTOGRAM_BUCKET_SIZE
+    return max(size, settings.SALARY_HISTOGRAM_MIN_BUCKET_SIZE)
+
+
+def ensure_can_view_analytics(user, company_id):
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    if not (user.company_account_id == company_id or user.role == "ADMIN" or is_staff_user(user)):
+        raise PermissionDenied("You can only view analytics for your own company.")
+
+
 class StandardPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class BatchRetrieveMixin:
+    """
+    GET <list URL>/batch/?ids=3,1,2 returns those objects in request order
+    with one query for the rows (plus the usual batched prefetches), and
+    lists the IDs that don't exist under "missing" instead of failing.
+    """
+
+    @action(detail=False, methods=["get"])
+    def batch(self, request):
+        ids = batch_ids(request)
+        found = {obj.pk: obj for obj in self.get_queryset().filter(pk__in=ids)}
+        data = dict(zip(found, self.get_serializer(list(found.values()), many=True).data))
+        data.update(self.batch_fallback([pk for pk in ids if pk not in data]))
+        return Response({
+            "results": [data[pk] for pk in ids if pk in data],
+            "missing": [pk for pk in ids if pk not in data],
+        })
+
+    def batch_fallback(self, ids):
+        """{id: representation} for IDs not found by the queryset."""
+        return {}
+
+
+def batch_ids(request):
+    """The unique IDs of ?ids=1,2&ids=3, in request order."""
+    ids = []
+    for value in request.query_params.getlist("ids"):
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                ids.append(int(part))
+            except ValueError:
+                raise ValidationError({"ids": f"Not an ID: {part!r}."})
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({"ids": "Pass the IDs to fetch, e.g. ?ids=1,2,3."})
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise ValidationError({"ids": f"At most {settings.BATCH_MAX_IDS} IDs per request."})
+    return ids
+
+
+class WriteRetryMixin:
+    """
+    Runs write actions through write_transaction(), so a request that
+    collides with another worker's SQLite write lock is retried instead of
+    failing with "database is locked".
+    """
+
+    def create(self, request, *args, **kwargs):
+        return write_transaction(super().create, request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return write_transaction(super().update, request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return write_transaction(super().destroy, request, *args, **kwargs)
+
+
+class CompanyViewSet(SparseFieldsViewMixin, BatchRetrieveMixin, WriteRetryMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all().order_by("-created_at")
     serializer_class = CompanySerializer
     pagination_class = StandardPagination
@@ -29,7 +136,11 @@ class CompanyViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = CompanyFilter
     search_fields = ["name", "description"]
-    ordering_fields = ["name", "created_at"]
+    ordering_fields = ["name", "created_at", "open_jobs_count"]
+    field_joins = {"industry": ([], ["industry"])}
+
+    def get_queryset(self):
+        return self.shape_queryset(super().get_queryset())
 
     def get_permissions(self):
         if self.request.method in ["GET", "HEAD", "OPTIONS"]:
@@ -44,8 +155,26 @@ class CompanyViewSet(viewsets.ModelViewSet):
 
         serializer.save(owner=user)
 
-class JobViewSet(viewsets.ModelViewSet):
-    queryset = Job.objects.all().order_by("-created_at")
+    @action(detail=True, methods=["get"])
+    def analytics(self, request, pk=None):
+        """Views, apply clicks and applicant skills of the company's jobs over ?days= (api.analytics)."""
+        company = self.get_object()
+        ensure_can_view_analytics(request.user, company.id)
+        return Response(company_dashboard(company.id, analytics_days(request)))
+
+    @action(detail=False, methods=["get"], url_path=r"by-slug/(?P<slug>[-\w]+)/profile")
+    def profile(self, request, slug=None):
+        """The company, its live jobs and their tags in one cached payload."""
+        data = company_profile(slug, request)
+        if data is None:
+            raise Http404("Company not found.")
+        return Response(data)
+
+class JobViewSet(SparseFieldsViewMixin, BatchRetrieveMixin, WriteRetryMixin, viewsets.ModelViewSet):
+    """
+    Listings show live jobs only; expired and closed jobs stay reachable by
+    ID, including after they were moved to the archive (api.lifecycle).
+    """
     serializer_class = JobSerializer
     pagination_class = StandardPagination
 
@@ -53,32 +182,110 @@ class JobViewSet(viewsets.ModelViewSet):
     filterset_class = JobFilter
     search_fields = ["title", "description", "requirements", "responsibilities"]
     ordering_fields = ["created_at", "min_salary", "max_salary"]
+    field_joins = {
+        "company": (["company"], ["company__industry"]),
+        "tech_tags": ([], ["tech_tags"]),
+    }
+
+    def get_queryset(self):
+        if self.action in ("list", "salary_histogram"):
+            queryset = Job.objects.live()
+        else:
+            queryset = Job.objects.all()
+        return self.shape_queryset(queryset.order_by("-created_at"))
 
     def get_permissions(self):
         if self.request.method in ["GET", "HEAD", "OPTIONS"]:
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            try:
+                data = archived_job_data(int(kwargs["pk"]))
+            except ValueError:
+                data = None
+            if data is None:
+                raise
+            return Response(self.sparse_archived_data(data))
+
+    def sparse_archived_data(self, data):
+        fields = self.selected_fields()
+        if fields is None:
+            return data
+        return {name: value for name, value in data.items() if name in fields}
+
+    def batch_fallback(self, ids):
+        # Archived jobs stay reachable by ID, as in retrieve().
+        return {pk: self.sparse_archived_data(data) for pk, data in archived_jobs_data(ids).items()}
+
     def perform_create(self, serializer):
         user = self.request.user
 
         ensure_user_can_post_job(user)
 
-        if not user.has_active_subscription and user.has_active_job_posting_plan:
-            user.has_active_job_posting_plan = False
-            user.save()
+        if not user.has_active_subscription:
+            # Spend the one-time credit with a conditional UPDATE rather than
+            # through request.user: write_transaction() may re-run this on
+            # the same in-memory user after a rolled-back attempt.
+            spent = User.objects.filter(pk=user.pk, has_active_job_posting_plan=True).update(
+                has_active_job_posting_plan=False
+            )
+            if not spent:
+                raise PermissionDenied("You must buy a job posting credit or subscribe for unlimited posting.")
+            # update() sends no signals; the credit is one of the token claims.
+            bump_token_version(user.pk)
 
         serializer.save(
             posted_by=user,
             company=user.company_account
         )
 
+    @action(detail=True, methods=["get"])
+    def analytics(self, request, pk=None):
+        """Daily views, apply clicks and applicant skills of one job, archived jobs included."""
+        try:
+            job_id = int(pk)
+        except ValueError:
+            raise Http404
+        company_id = (
+            Job.objects.filter(pk=job_id).values_list("company_id", flat=True).first()
+            or ArchivedJob.objects.filter(pk=job_id).values_list("company_id", flat=True).first()
+        )
+        if company_id is None:
+            raise Http404
+        ensure_can_view_analytics(request.user, company_id)
+        return Response(job_dashboard(job_id, analytics_days(request)))
+
+    @action(detail=False, methods=["get"], url_path="salary-histogram")
+    def salary_histogram(self, request):
+        """Live jobs matching the listing's filters per salary bucket of ?bucket_size= (api.salaries)."""
+        jobs = self.filter_queryset(self.get_queryset())
+        return Response(cached_salary_histogram(jobs, request.query_params, histogram_bucket_size(request)))
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Creates and updates many jobs at once (api.bulk_jobs). Items with an
+        "id" update that job. Nothing is written unless every item is valid;
+        the errors are reported per item, in request order.
+        """
+        ensure_user_can_bulk_post(request.user)
+        creates, updates, errors = validate_items(request.user, request.data)
+        if any(errors):
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = write_transaction(bulk_write_jobs, request.user, creates, updates)
+        return Response({"created": created, "updated": updated}, status=status.HTTP_201_CREATED)
+
     def perform_update(self, serializer):
         user = self.request.user
         job = self.get_object()
 
         if user.role != "ADMIN":
-            if not hasattr(user, "company_account") or job.company != user.company_account:
+            if job.company_id != user.company_account_id:
                 raise PermissionDenied("You can only edit jobs from your own company.")
 
         return super().perform_update(serializer)
@@ -87,13 +294,13 @@ class JobViewSet(viewsets.ModelViewSet):
         user = self.request.user
 
         if user.role != "ADMIN":
-            if not hasattr(user, "company_account") or instance.company != user.company_account:
+            if instance.company_id != user.company_account_id:
                 raise PermissionDenied("You can only delete jobs for your own company.")
 
         return super().perform_destroy(instance)
 
 
-class PortfolioViewSet(viewsets.ModelViewSet):
+class PortfolioViewSet(SparseFieldsViewMixin, BatchRetrieveMixin, WriteRetryMixin, viewsets.ModelViewSet):
     serializer_class = PortfolioSerializer
     pagination_class = StandardPagination
 
@@ -101,9 +308,13 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     filterset_class = PortfolioFilter
     search_fields = ["bio", "user__username"]
     ordering_fields = ["created_at", "years_experience"]
+    field_joins = {
+        "skills": ([], ["skills"]),
+        "projects": ([], ["projects__tech_stack"]),
+    }
 
     def get_queryset(self):
-        return Portfolio.objects.all().order_by("-created_at").prefetch_related("projects", "skills")
+        return self.shape_queryset(Portfolio.objects.all().order_by("-created_at"))
 
     def get_permissions(self):
         if self.request.method in ["GET", "HEAD", "OPTIONS"]:
@@ -123,7 +334,7 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         serializer.save(user=user)
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(WriteRetryMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
 
     def get_queryset(self):
@@ -181,6 +392,156 @@ class ProjectViewSet(viewsets.ModelViewSet):
         return super().perform_destroy(instance)
 
 
+class SkillViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The skill taxonomy: canonical names with their category and synonyms.
+    """
+    serializer_class = SkillSerializer
+    pagination_class = StandardPagination
+
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = {"category__slug": ["exact"], "job_count": ["gte"], "portfolio_count": ["gte"]}
+    search_fields = ["name", "synonyms__name"]
+    ordering_fields = ["name", "job_count", "portfolio_count"]
+
+    def get_queryset(self):
+        return Skill.objects.select_related("category").prefetch_related("synonyms").order_by("name")
+
+
+class SavedSearchViewSet(WriteRetryMixin, viewsets.ModelViewSet):
+    """
+    The current user's saved job searches. New postings matching an active
+    search are recorded as job alerts (api.percolator).
+    """
+    serializer_class = SavedSearchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardPagination
+
+    def get_queryset(self):
+        return SavedSearch.objects.filter(user=self.request.user).order_by("-created_at")
+
+    def perform_create(self, serializer):
+        user = self.request.user
+
+        if SavedSearch.objects.filter(user=user).count() >= settings.SAVED_SEARCH_MAX_PER_USER:
+            raise PermissionDenied(f"You can save at most {settings.SAVED_SEARCH_MAX_PER_USER} searches.")
+
+        serializer.save(user=user)
+
+
+class JobAlertViewSet(viewsets.ReadOnlyModelViewSet):
+    """New jobs that matched the current user's saved searches, newest first."""
+    serializer_class = JobAlertSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = StandardPagination
+
+    def get_queryset(self):
+        return (
+            JobAlert.objects.filter(user=self.request.user)
+            .select_related("job__company")
+            .prefetch_related("job__tech_tags", "job__company__industry")
+            .order_by("-created_at")
+        )
+
+
+class TagAutocompleteView(APIView):
+    """
+    Skill suggestions for tag inputs: GET /api/tags/autocomplete/?q=jav
+    Matches canonical names and synonyms by prefix, most used first, from
+    an in-memory index (api.autocomplete) without querying the database.
+    """
+    max_limit = 25
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), self.max_limit)
+        except ValueError:
+            limit = 10
+        results = get_index().search(request.query_params.get("q", ""), limit)
+        response = Response({"results": results})
+        response["Cache-Control"] = "public, max-age=60"
+        return response
+
+
+class JobEventView(APIView):
+    """
+    Job analytics beacon: POST {"job": 1, "type": "view"} or
+    {"events": [{"job": 1, "type": "apply"}, ...]}. Events are buffered
+    in memory (api.events) and answered with 202 right away. A signed-in
+    visitor's ID is kept so apply clicks count towards applicant skills.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        data = request.data
+        items = data.get("events", [data]) if isinstance(data, dict) else None
+        if not isinstance(items, list) or not items or len(items) > settings.EVENT_MAX_PER_REQUEST:
+            return Response(
+                {"detail": f"Send 1 to {settings.EVENT_MAX_PER_REQUEST} events."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        events = []
+        for item in items:
+            job_id = item.get("job") if isinstance(item, dict) else None
+            kind = item.get("type") if isinstance(item, dict) else None
+            if kind not in EVENT_KINDS or not isinstance(job_id, int) or isinstance(job_id, bool) or job_id <= 0:
+                return Response(
+                    {"detail": f"Each event needs a job ID and a type of {' or '.join(EVENT_KINDS)}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            events.append((kind, job_id))
+
+        user_id = request.user.pk if request.user.is_authenticated else None
+        get_buffer().record(events, visitor_hash(request), user_id)
+        return Response({"accepted": len(events)}, status=status.HTTP_202_ACCEPTED)
+
+
+class RequestProfileViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Stored request profiles (see RequestProfilingMiddleware), staff only.
+    The detail includes the SQL statements; `download` returns the profile.
+    """
+    queryset = RequestProfile.objects.all().order_by("-created_at")
+    serializer_class = RequestProfileSerializer
+    pagination_class = StandardPagination
+    permission_classes = [IsStaffUser]
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        profile = self.get_object()
+        return FileResponse(
+            profile.profile_file.open("rb"),
+            as_attachment=True,
+            filename=profile.profile_file.name.rsplit("/", 1)[-1],
+        )
+
+
+class ResumeDownloadView(APIView):
+    """
+    Downloads a user's resume. The bytes are sent by the front web server
+    (see SENDFILE_BACKEND), which also answers range requests.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        user = request.user
+
+        if user.pk != pk and user.role not in ["COMPANY", "ADMIN"] and not user.is_staff:
+            raise PermissionDenied("You cannot download this resume.")
+
+        owner = User.objects.filter(pk=pk).only("id", "username", "resume_file").first()
+        if owner is None or not owner.resume_file:
+            raise Http404("Resume not found.")
+
+        ext = owner.resume_file.name.rsplit(".", 1)[-1] if "." in owner.resume_file.name else "bin"
+        return sendfile_response(
+            owner.resume_file.storage,
+            owner.resume_file.name,
+            filename=f"{owner.username}-resume.{ext}",
+        )
+
+
 class CreateJobPostingCheckoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -265,3 +626,33 @@ class JobCreditWebhookView(APIView):
                         pass
 
         return Response(status=status.HTTP_200_OK)
+
+
+def logo_derivative(request, name):
+    """
+    Serves a generated logo thumbnail. Names are content hashes, so the
+    response can be cached by browsers and CDNs indefinitely.
+    """
+    path = DERIVATIVE_DIR + name
+    if not default_storage.exists(path):
+        raise Http404("Logo not found.")
+
+    response = FileResponse(default_storage.open(path, "rb"))
+    response["Cache-Control"] = settings.LOGO_DERIVATIVE_CACHE_CONTROL
+    return response
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint. Requires `Authorization: Bearer <token>`
+    when METRICS_BEARER_TOKEN is set, and a signed-in staff session
+    otherwise.
+    """
+    token = settings.METRICS_BEARER_TOKEN
+    if token:
+        if request.META.get("HTTP_AUTHORIZATION") != f"Bearer {token}":
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    elif not is_staff_user(request.user):
+        return HttpResponse(status=status.HTTP_403_FORBIDDEN)
+
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
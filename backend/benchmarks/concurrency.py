@@ -0,0 +1,124 @@
+"""
+Concurrent-connection throughput benchmark for the read API.
+
+Opens N keep-alive connections at once and drives them with plain asyncio
+sockets (no third-party client), so the load generator itself is never the
+bottleneck. Point it at the same endpoint served two ways to compare:
+
+    # WSGI: sync viewset, one thread per in-flight request
+    gunicorn core.wsgi -w 4 --threads 8 -b 127.0.0.1:8001
+    # ASGI: async read path on the event loop
+    uvicorn core.asgi:application --workers 4 --port 8002
+
+    python benchmarks/concurrency.py \
+        --target wsgi=http://127.0.0.1:8001/api/jobs/ \
+        --target asgi=http://127.0.0.1:8002/api/read/jobs/ \
+        --concurrency 2000 --requests 20000 --output asgi_vs_wsgi.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def _worker(host, port, raw_request, deadline, latencies, errors, remaining):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        errors.append("connect")
+        return
+
+    try:
+        while remaining[0] > 0 and time.perf_counter() < deadline:
+            remaining[0] -= 1
+            started = time.perf_counter()
+            writer.write(raw_request)
+            await writer.drain()
+
+            status_line = await reader.readline()
+            if not status_line:
+                errors.append("closed")
+                return
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value.strip())
+            await reader.readexactly(length)
+
+            if not status_line.split(b" ")[1].startswith(b"2"):
+                errors.append(status_line.split(b" ")[1].decode())
+            latencies.append(time.perf_counter() - started)
+    except (OSError, asyncio.IncompleteReadError):
+        errors.append("io")
+    finally:
+        writer.close()
+
+
+async def run_target(url, concurrency, requests, timeout):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    raw_request = (
+        f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+        "Accept: application/json\r\nConnection: keep-alive\r\n\r\n"
+    ).encode()
+
+    latencies, errors, remaining = [], [], [requests]
+    started = time.perf_counter()
+    deadline = started + timeout
+    await asyncio.gather(*(
+        _worker(parts.hostname, parts.port or 80, raw_request, deadline, latencies, errors, remaining)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000, 2) if latencies else None
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "completed": len(latencies),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True, help="label=url, repeatable")
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for target in args.target:
+        label, _, url = target.partition("=")
+        results[label] = asyncio.run(run_target(url, args.concurrency, args.requests, args.timeout))
+        r = results[label]
+        print(
+            f"{label:>8}: {r['requests_per_s']:>9} req/s  p50={r['p50_ms']}ms  "
+            f"p95={r['p95_ms']}ms  p99={r['p99_ms']}ms  errors={r['errors']}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Multi-process SQLite write load test.
+
+Runs the same write workload (a read followed by an INSERT in one
+transaction, like the webhook's idempotency check or a job save after the
+entitlement lookup) from several worker processes against a fresh SQLite
+file, once with Django's default connection settings and once with the
+production profile (SQLITE_PERFORMANCE_PROFILE=True + write_transaction
+retries), and reports write throughput and "database is locked" errors.
+
+    python benchmarks/sqlite_writes.py --processes 8 --writes 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker(worker_id, writes, use_retries):
+    import django
+
+    sys.path.insert(0, BACKEND_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+
+    from django.db import OperationalError, transaction
+
+    from api.models import StripeEvent
+    from api.transactions import is_lock_error, write_transaction
+
+    def write(n):
+        event_id = f"evt_{worker_id}_{n}"
+        if not StripeEvent.objects.filter(event_id=event_id).exists():
+            StripeEvent.objects.create(event_id=event_id)
+
+    ok = locked = 0
+    for n in range(writes):
+        try:
+            if use_retries:
+                write_transaction(write, n)
+            else:
+                with transaction.atomic():
+                    write(n)
+            ok += 1
+        except OperationalError as exc:
+            if not is_lock_error(exc):
+                raise
+            locked += 1
+    print(json.dumps({"ok": ok, "locked": locked}))
+
+
+def run_profile(label, processes, writes, profile_enabled):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    env = {
+        **os.environ,
+        "DB_ENGINE": "django.db.backends.sqlite3",
+        "SQLITE_PATH": db_path,
+        "SQLITE_PERFORMANCE_PROFILE": "True" if profile_enabled else "False",
+    }
+    subprocess.run(
+        [sys.executable, "manage.py", "migrate", "--verbosity", "0"],
+        cwd=BACKEND_DIR, env=env, check=True,
+    )
+
+    started = time.perf_counter()
+    procs = [
+        subprocess.Popen(
+            [sys.executable, __file__, "--worker", str(i), "--writes", str(writes)]
+            + (["--retries"] if profile_enabled else []),
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, text=True,
+        )
+        for i in range(processes)
+    ]
+    totals = {"ok": 0, "locked": 0}
+    for proc in procs:
+        out, _ = proc.communicate()
+        result = json.loads(out.strip().splitlines()[-1])
+        totals["ok"] += result["ok"]
+        totals["locked"] += result["locked"]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "profile": label,
+        "processes": processes,
+        "writes_ok": totals["ok"],
+        "lock_errors": totals["locked"],
+        "elapsed_s": round(elapsed, 3),
+        "writes_per_s": round(totals["ok"] / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=300, help="writes per process")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--retries", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        worker(args.worker, args.writes, args.retries)
+        return
+
+    results = [
+        run_profile("default", args.processes, args.writes, profile_enabled=False),
+        run_profile("production", args.processes, args.writes, profile_enabled=True),
+    ]
+    for r in results:
+        print(
+            f"{r['profile']:>10}: {r['writes_per_s']:>8} writes/s  "
+            f"ok={r['writes_ok']}  lock_errors={r['lock_errors']}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 import sys
+import tempfile
 from pathlib import Path
 import os
 from datetime import timedelta
@@ -81,11 +82,16 @@ AUTH_USER_MODEL = "api.User"
 # ==========================
 
 MIDDLEWARE = [
+    "api.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.RequestTimingMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
+    "api.middleware.RateLimitHeadersMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.RequestProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -120,9 +126,27 @@ if DB_ENGINE == "django.db.backends.sqlite3":
     DATABASES = {
         "default": {
             "ENGINE": DB_ENGINE,
-            "NAME": BASE_DIR / "db.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
         }
     }
+
+    # Production profile for SQLite deployments with several workers:
+    # WAL lets readers run alongside the single writer, IMMEDIATE transactions
+    # take the write lock up front instead of failing on lock upgrade, and
+    # busy_timeout makes writers queue for the lock instead of erroring.
+    if os.environ.get("SQLITE_PERFORMANCE_PROFILE", "False") == "True":
+        DATABASES["default"]["OPTIONS"] = {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+            "init_command": (
+                "PRAGMA journal_mode=WAL;"
+                "PRAGMA synchronous=NORMAL;"
+                "PRAGMA busy_timeout=20000;"
+                "PRAGMA mmap_size=134217728;"
+                "PRAGMA cache_size=-20000;"
+                "PRAGMA temp_store=MEMORY;"
+            ),
+        }
 else:
     # Example: DB_ENGINE = "django.db.backends.postgresql"
     DATABASES = {
@@ -133,6 +157,48 @@ else:
             "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
             "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
             "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+            # Persistent connections, validated before reuse
+            "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+        }
+    }
+
+# Optional read replicas: comma-separated hosts sharing the primary's credentials
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    h.strip() for h in os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(",") if h.strip()
+):
+    alias = f"replica_{index + 1}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["api.db_routers.PrimaryReplicaRouter"]
+
+# Retries for writes that hit "database is locked" (see api.transactions)
+SQLITE_WRITE_RETRIES = int(os.environ.get("SQLITE_WRITE_RETRIES", "5"))
+SQLITE_WRITE_RETRY_BACKOFF = float(os.environ.get("SQLITE_WRITE_RETRY_BACKOFF", "0.05"))
+
+# After a write, a client's reads stay on the primary for this many seconds
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+
+# The default cache holds state every worker must see: read-your-writes pins
+# (api.middleware), token versions (api.authentication) and the generation
+# tokens that invalidate cached profiles, histograms and the skill index.
+# REDIS_URL shares it across hosts (needs the redis package); otherwise the
+# workers of one host share a file-based cache.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("CACHE_DIR", os.path.join(tempfile.gettempdir(), "asyncskills-cache")),
+            "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", "10000"))},
         }
     }
 
@@ -169,6 +235,17 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Company logo thumbnails (pixel sizes), generated as PNG + WebP after upload
+LOGO_THUMBNAIL_SIZES = (64, 256)
+LOGO_DERIVATIVES_ASYNC = os.environ.get("LOGO_DERIVATIVES_ASYNC", "True") == "True"
+LOGO_DERIVATIVE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Protected file downloads (resumes). "nginx" -> X-Accel-Redirect to
+# SENDFILE_URL_PREFIX (an `internal` location aliased to MEDIA_ROOT),
+# "xsendfile" -> X-Sendfile with the absolute path, "" -> stream via Django.
+SENDFILE_BACKEND = os.environ.get("SENDFILE_BACKEND", "")
+SENDFILE_URL_PREFIX = os.environ.get("SENDFILE_URL_PREFIX", "/protected/")
+
 
 # ==========================
 # DRF / JWT / DJOSER
@@ -176,7 +253,7 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
@@ -186,16 +263,141 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.instrumentation.TimedJSONRenderer",
+        "api.instrumentation.TimedBrowsableAPIRenderer",
+    ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "api.throttling.ClientRateThrottle",
+        "api.throttling.AuthRateThrottle",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    # Reverse proxies in front of the app. Throttles identify clients by the
+    # address this many hops from the end of X-Forwarded-For; 0 ignores the
+    # (client-controlled) header and uses REMOTE_ADDR.
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", "0")),
+}
+
+# Token-bucket rate limits (api.throttling): "<requests>/<period>" per scope,
+# optionally per route as "<scope>:<route name>".
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "True") == "True"
+RATE_LIMITS = {
+    "anon": os.environ.get("RATE_LIMIT_ANON", "120/min"),
+    "user": os.environ.get("RATE_LIMIT_USER", "600/min"),
+    "auth": os.environ.get("RATE_LIMIT_AUTH", "10/min"),
+    # One request per keystroke; kept out of the general anonymous bucket
+    "anon:tags-autocomplete": os.environ.get("RATE_LIMIT_AUTOCOMPLETE", "600/min"),
+    # Page view / apply-click beacons, sent in the background by every page
+    "anon:job-events": os.environ.get("RATE_LIMIT_JOB_EVENTS", "600/min"),
 }
+# "local": per-host shared memory table; "cache": counters in the default cache
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "local")
+RATE_LIMIT_MMAP_PATH = os.environ.get(
+    "RATE_LIMIT_MMAP_PATH", os.path.join(tempfile.gettempdir(), "asyncskills-ratelimit.bin")
+)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "65536"))
+
+# Per-request timing (api.middleware.RequestTimingMiddleware)
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get("REQUEST_TIMING_SAMPLE_RATE", "1.0"))
+REQUEST_QUERY_BUDGET_DEFAULT = int(os.environ.get("REQUEST_QUERY_BUDGET_DEFAULT", "25"))
+# Per route name, e.g. {"jobs-list": 6, "portfolios-detail": 4}
+REQUEST_QUERY_BUDGETS = {}
+
+# On-demand profiling of single requests by staff (X-Profile header / ?_profile=)
+REQUEST_PROFILING_ENABLED = os.environ.get("REQUEST_PROFILING_ENABLED", "True") == "True"
+REQUEST_PROFILING_INTERVAL = float(os.environ.get("REQUEST_PROFILING_INTERVAL", "0.001"))
+REQUEST_PROFILING_MAX_STATEMENTS = 2000
+
+# Metrics shared by all workers through one memory-mapped file (api.metrics)
+METRICS_MMAP_PATH = os.environ.get(
+    "METRICS_MMAP_PATH", os.path.join(tempfile.gettempdir(), "asyncskills-metrics.bin")
+)
+METRICS_MAX_SERIES = int(os.environ.get("METRICS_MAX_SERIES", "4096"))
+# Bearer token for /metrics scrapers; without one only staff sessions may read it
+METRICS_BEARER_TOKEN = os.environ.get("METRICS_BEARER_TOKEN", "")
+
+# How often a process checks whether another one changed the skill
+# autocomplete index (api.autocomplete)
+SKILL_AUTOCOMPLETE_CHECK_SECONDS = float(os.environ.get("SKILL_AUTOCOMPLETE_CHECK_SECONDS", "1"))
+
+# Job lifecycle: postings expire after JOB_DEFAULT_TTL_DAYS; the expire_jobs
+# command moves jobs expired or closed for JOB_ARCHIVE_AFTER_DAYS to the
+# archive table, JOB_ARCHIVE_BATCH_SIZE rows per transaction.
+JOB_DEFAULT_TTL_DAYS = int(os.environ.get("JOB_DEFAULT_TTL_DAYS", "60"))
+JOB_ARCHIVE_AFTER_DAYS = int(os.environ.get("JOB_ARCHIVE_AFTER_DAYS", "30"))
+JOB_ARCHIVE_BATCH_SIZE = int(os.environ.get("JOB_ARCHIVE_BATCH_SIZE", "500"))
+
+# Saved searches / job alerts (api.percolator): how often a process checks
+# whether another one changed the saved searches, and how many a user may keep
+SAVED_SEARCH_INDEX_CHECK_SECONDS = float(os.environ.get("SAVED_SEARCH_INDEX_CHECK_SECONDS", "5"))
+SAVED_SEARCH_MAX_PER_USER = int(os.environ.get("SAVED_SEARCH_MAX_PER_USER", "50"))
+
+# Outgoing mail. Defaults to the local stand-in relay started with
+# `python manage.py smtp_debug_server` (api.smtp_debug).
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "localhost")
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", "1025"))
+EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD", "")
+EMAIL_USE_TLS = os.environ.get("EMAIL_USE_TLS", "False") == "True"
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", "AsyncSkills <alerts@localhost>")
+SITE_URL = os.environ.get("SITE_URL", "http://localhost:3000")
+
+# Job alert digests (api.digests, send_digests command): users per SMTP
+# connection, jobs listed per digest, sending rate per host and retries of
+# temporary SMTP failures (backoff doubles per attempt).
+EMAIL_DIGEST_BATCH_SIZE = int(os.environ.get("EMAIL_DIGEST_BATCH_SIZE", "100"))
+EMAIL_DIGEST_MAX_JOBS = int(os.environ.get("EMAIL_DIGEST_MAX_JOBS", "20"))
+EMAIL_DIGEST_RATE = os.environ.get("EMAIL_DIGEST_RATE", "10/s")
+EMAIL_DIGEST_RETRIES = int(os.environ.get("EMAIL_DIGEST_RETRIES", "3"))
+EMAIL_DIGEST_RETRY_BACKOFF = float(os.environ.get("EMAIL_DIGEST_RETRY_BACKOFF", "2"))
+
+# Job view/apply events (api.events): buffered per worker and appended to
+# per-process logs in EVENT_LOG_DIR, which the compact_events command loads.
+EVENT_LOG_DIR = os.environ.get("EVENT_LOG_DIR", os.path.join(tempfile.gettempdir(), "asyncskills-events"))
+EVENT_BUFFER_SIZE = int(os.environ.get("EVENT_BUFFER_SIZE", "500"))
+EVENT_FLUSH_SECONDS = float(os.environ.get("EVENT_FLUSH_SECONDS", "1"))
+EVENT_LOG_SEGMENT_SECONDS = int(os.environ.get("EVENT_LOG_SEGMENT_SECONDS", "60"))
+EVENT_MAX_PER_REQUEST = 50
+# Longest range the analytics dashboards (api.analytics) accept, in days
+ANALYTICS_MAX_DAYS = 366
+
+# Most IDs one GET .../batch/?ids= request may ask for
+BATCH_MAX_IDS = int(os.environ.get("BATCH_MAX_IDS", "200"))
+
+# Largest list accepted by POST /api/jobs/bulk/ (api.bulk_jobs)
+JOB_BULK_MAX_ITEMS = int(os.environ.get("JOB_BULK_MAX_ITEMS", "500"))
+
+# Radius searches on jobs (?near=...&radius_km=...): default and largest radius
+JOB_NEAR_DEFAULT_RADIUS_KM = 50
+JOB_NEAR_MAX_RADIUS_KM = 2000
+
+# Salary histograms (api.salaries): default bucket width and cache lifetime
+SALARY_HISTOGRAM_BUCKET_SIZE = 10000
+SALARY_HISTOGRAM_MIN_BUCKET_SIZE = 1000
+SALARY_HISTOGRAM_CACHE_SECONDS = int(os.environ.get("SALARY_HISTOGRAM_CACHE_SECONDS", "300"))
+
+# Upper bound on how long a company profile payload is cached (api.company_profile);
+# company and job changes through the ORM invalidate it immediately.
+COMPANY_PROFILE_CACHE_SECONDS = int(os.environ.get("COMPANY_PROFILE_CACHE_SECONDS", "600"))
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=2),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # Tokens carry role/company/entitlement claims (see api.authentication)
+    "TOKEN_OBTAIN_SERIALIZER": "api.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "api.authentication.ClaimsTokenRefreshSerializer",
 }
 
+# How long a user's current token version may be served from the cache; with
+# a per-process cache (LocMemCache) other workers only see a bump once their
+# copy expires, so it is kept much shorter there.
+JWT_TOKEN_VERSION_CACHE_SECONDS = 300
+JWT_TOKEN_VERSION_LOCAL_CACHE_SECONDS = 2
+
 DJOSER = {
     "LOGIN_FIELD": "username",
     "USER_CREATE_PASSWORD_RETYPE": True,
@@ -268,3 +470,22 @@ if "test" in sys.argv:
     DJSTRIPE_USE_NATIVE_JSONFIELD = True
     STRIPE_API_HOST = "http://localhost"  # ensures no requests go out
 
+    # Keep test runs out of the real metrics file
+    METRICS_MMAP_PATH = os.path.join(tempfile.gettempdir(), f"asyncskills-metrics-test-{os.getpid()}.bin")
+
+    # Tests make many requests from one client; rate limit tests opt in
+    RATE_LIMIT_ENABLED = False
+    RATE_LIMIT_MMAP_PATH = os.path.join(tempfile.gettempdir(), f"asyncskills-ratelimit-test-{os.getpid()}.bin")
+
+    EVENT_LOG_DIR = os.path.join(tempfile.gettempdir(), f"asyncskills-events-test-{os.getpid()}")
+
+    # One process; keep test runs out of the shared cache directory
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+    # Build logo thumbnails inline so tests can assert on them
+    LOGO_DERIVATIVES_ASYNC = False
+
+    # A second connection mirroring the test database, so replica routing
+    # can be exercised; tests opt in by overriding DATABASE_REPLICAS.
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
@@ -17,6 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from api.views import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
 
@@ -29,5 +31,8 @@ urlpatterns = [
 
     # Your API
     path("api/", include("api.urls")),
+
+    # Prometheus scrape endpoint (aggregated across workers)
+    path("metrics", metrics, name="metrics"),
 ]
 